@@ -10,6 +10,22 @@ try:
     from .cycle_segmenter import CycleSegmenter
     from .quality_analyzer import QualityAnalyzer
     from .report_generator import ReportGenerator
+    from .similarity_index import CycleSimilarityIndex
+    from .dtw_matcher import DTWMatcher
+    from .phase_detector import PhaseDetector
+    from .matrix_profile import MatrixProfile
+    from .running_statistics import CycleStatisticsAccumulator
+    from .online_quality_analyzer import OnlineQualityAnalyzer
+    from .rolling_baseline import RollingBaseline
+    from .multivariate_scorer import MultivariateScorer
+    from .template_deviation import TemplateDeviation
+    from .recipe_baseline import RecipeBaselineCache
+    from .baseline_model import BaselineModel
+    from .report_summary import ReportSummary
+    from .rollup_store import RollupStore
+    from .report_workers import ReportWorkerPool
+    from .fleet_summary import FleetSummary, MachineResult
+    from .pipeline import AnalysisPipeline
 except ImportError:
     # Handle case where package isn't installed yet
     MachineDataLoader = None
@@ -17,6 +33,23 @@ except ImportError:
     CycleSegmenter = None
     QualityAnalyzer = None
     ReportGenerator = None
+    CycleSimilarityIndex = None
+    DTWMatcher = None
+    PhaseDetector = None
+    MatrixProfile = None
+    CycleStatisticsAccumulator = None
+    OnlineQualityAnalyzer = None
+    RollingBaseline = None
+    MultivariateScorer = None
+    TemplateDeviation = None
+    RecipeBaselineCache = None
+    BaselineModel = None
+    ReportSummary = None
+    RollupStore = None
+    ReportWorkerPool = None
+    FleetSummary = None
+    MachineResult = None
+    AnalysisPipeline = None
 
 __version__ = "1.0.0"
 __all__ = [
@@ -24,5 +57,22 @@ __all__ = [
     "StateDetector", 
     "CycleSegmenter",
     "QualityAnalyzer",
-    "ReportGenerator"
+    "ReportGenerator",
+    "CycleSimilarityIndex",
+    "DTWMatcher",
+    "PhaseDetector",
+    "MatrixProfile",
+    "CycleStatisticsAccumulator",
+    "OnlineQualityAnalyzer",
+    "RollingBaseline",
+    "MultivariateScorer",
+    "TemplateDeviation",
+    "RecipeBaselineCache",
+    "BaselineModel",
+    "ReportSummary",
+    "RollupStore",
+    "ReportWorkerPool",
+    "FleetSummary",
+    "MachineResult",
+    "AnalysisPipeline"
 ] 
\ No newline at end of file
@@ -0,0 +1,204 @@
+"""
+Baseline Model - Persisted, versioned quality baseline built from historical cycles.
+"""
+
+import pandas as pd
+import numpy as np
+import hashlib
+import json
+from typing import Dict, List, Optional
+import logging
+from machine_analyzer.cycle_segmenter import CycleSegmenter, ProductionCycle
+from machine_analyzer.quality_analyzer import QualityAnalyzer, QualityResult, score_cycles
+from machine_analyzer.running_statistics import CycleStatisticsAccumulator
+
+logger = logging.getLogger(__name__)
+
+# Version of the file layout written by BaselineModel.save
+FORMAT_VERSION = 1
+
+
+def hash_cycle_arrays(cycle_arrays: Dict[str, np.ndarray]) -> str:
+    """
+    Compute a SHA-256 hash of the cycle arrays used to build a baseline.
+
+    Args:
+        cycle_arrays: Cycle arrays as from ``QualityAnalyzer.get_cycle_arrays``
+
+    Returns:
+        Hexadecimal digest
+    """
+    digest = hashlib.sha256()
+    for name in ('start_time', 'duration', 'energy', 'peak', 'variation'):
+        values = np.asarray(cycle_arrays[name])
+        if name == 'start_time':
+            values = values.astype('datetime64[ns]').view(np.int64)
+        digest.update(name.encode())
+        digest.update(np.ascontiguousarray(values, dtype=values.dtype.newbyteorder('<')).tobytes())
+    return digest.hexdigest()
+
+
+class BaselineModel:
+    """
+    Quality baseline fitted on historical cycles.
+
+    The model keeps the mergeable running statistics of the history, not the
+    cycles themselves, so a new batch is scored without loading the history.
+    It records the time range and number of cycles it was built from, the
+    scoring parameters and a hash of the inputs. ``update`` folds a new batch
+    into the baseline and increments the model version.
+    """
+
+    def __init__(self, threshold_factor: Optional[dict] = None, sketch_capacity: int = 4096):
+        """
+        Initialize an empty baseline model.
+
+        Args:
+            threshold_factor: Number of standard deviations per check
+            sketch_capacity: Capacity of the median sketches
+        """
+        self.threshold_factor = {"variation": 2, "duration": 2, "energy": 2}
+        self.threshold_factor.update(threshold_factor or {})
+        self.sketch_capacity = sketch_capacity
+        self.accumulator = CycleStatisticsAccumulator(sketch_capacity)
+        self.metadata = {
+            'format_version': FORMAT_VERSION,
+            'model_version': 0,
+            'created_at': None,
+            'start_time': None,
+            'end_time': None,
+            'n_cycles': 0,
+            'input_hash': None,
+            'parameters': {'threshold_factor': self.threshold_factor, 'sketch_capacity': sketch_capacity},
+        }
+
+    @classmethod
+    def from_cycles(cls, production_cycles: List[ProductionCycle], **kwargs) -> "BaselineModel":
+        """
+        Build a baseline model from historical production cycles.
+
+        Args:
+            production_cycles: List of historical production cycles
+            **kwargs: Arguments for the model constructor
+
+        Returns:
+            Fitted BaselineModel
+        """
+        return cls(**kwargs).update(QualityAnalyzer({}, production_cycles).get_cycle_arrays())
+
+    @classmethod
+    def from_segmenter(cls, segmenter: CycleSegmenter, **kwargs) -> "BaselineModel":
+        """
+        Build a baseline model from the cycles of a segmenter.
+
+        Args:
+            segmenter: CycleSegmenter with segmented historical cycles
+            **kwargs: Arguments for the model constructor
+
+        Returns:
+            Fitted BaselineModel
+        """
+        return cls(**kwargs).update(QualityAnalyzer.from_segmenter(segmenter).get_cycle_arrays())
+
+    @property
+    def cycle_statistics(self) -> Dict:
+        """The ``cycle_statistics`` dictionary of the baseline."""
+        return self.accumulator.to_dict()
+
+    def update(self, cycle_arrays: Dict[str, np.ndarray]) -> "BaselineModel":
+        """
+        Add a batch of cycles to the baseline.
+
+        Args:
+            cycle_arrays: Cycle arrays as from ``QualityAnalyzer.get_cycle_arrays``
+
+        Returns:
+            The updated model
+        """
+        if len(cycle_arrays['duration']) == 0:
+            return self
+        self.accumulator.update(cycle_arrays['duration'], cycle_arrays['energy'], cycle_arrays['peak'],
+                                cycle_arrays['variation'])
+
+        metadata = self.metadata
+        times = pd.DatetimeIndex(cycle_arrays['start_time'])
+        start, end = times.min(), times.max()
+        if metadata['start_time'] is not None:
+            start = min(start, pd.Timestamp(metadata['start_time']))
+            end = max(end, pd.Timestamp(metadata['end_time']))
+        # Chain the hash of each batch onto the previous one
+        batch_hash = hash_cycle_arrays(cycle_arrays)
+        if metadata['input_hash'] is not None:
+            batch_hash = hashlib.sha256((metadata['input_hash'] + batch_hash).encode()).hexdigest()
+        metadata.update(
+            model_version=metadata['model_version'] + 1,
+            created_at=pd.Timestamp.now(tz='UTC').isoformat(),
+            start_time=start.isoformat(),
+            end_time=end.isoformat(),
+            n_cycles=self.accumulator.count,
+            input_hash=batch_hash,
+        )
+        logger.info(f"Baseline model version {metadata['model_version']}: {self.accumulator.count} cycles")
+        return self
+
+    def score(self, cycle_arrays: Dict[str, np.ndarray]) -> QualityResult:
+        """
+        Score a batch of cycles against the baseline.
+
+        Args:
+            cycle_arrays: Cycle arrays as from ``QualityAnalyzer.get_cycle_arrays``
+
+        Returns:
+            Columnar QualityResult
+        """
+        if self.accumulator.count == 0:
+            raise ValueError("Baseline model has no cycles")
+        return score_cycles(cycle_arrays['cycle_id'], cycle_arrays['duration'], cycle_arrays['energy'],
+                            cycle_arrays['variation'], self.cycle_statistics, self.threshold_factor)
+
+    def create_analyzer(self, production_cycles: List[ProductionCycle]) -> QualityAnalyzer:
+        """
+        Create a QualityAnalyzer that judges cycles against this baseline.
+
+        Args:
+            production_cycles: List of production cycles to analyze
+
+        Returns:
+            QualityAnalyzer with the baseline's cycle statistics
+        """
+        return QualityAnalyzer(self.cycle_statistics, production_cycles)
+
+    def save(self, path: str) -> None:
+        """
+        Save the model to a binary ``.npz`` file.
+
+        Args:
+            path: Output file path
+        """
+        state = self.accumulator.get_state()
+        state["metadata"] = np.array(json.dumps(self.metadata))
+        with open(path, "wb") as f:
+            np.savez(f, **state)
+        logger.info(f"Saved baseline model version {self.metadata['model_version']} to {path}")
+
+    @classmethod
+    def load(cls, path: str) -> "BaselineModel":
+        """
+        Load a model saved with ``save``.
+
+        Args:
+            path: Path of the ``.npz`` file
+
+        Returns:
+            BaselineModel with the saved statistics and metadata
+        """
+        with np.load(path, allow_pickle=False) as data:
+            state = {key: data[key] for key in data.files}
+        metadata = json.loads(str(state.pop("metadata")))
+        if metadata.get('format_version') != FORMAT_VERSION:
+            raise ValueError(f"Unsupported baseline model format version: {metadata.get('format_version')}")
+        parameters = metadata['parameters']
+        model = cls(parameters['threshold_factor'], parameters['sketch_capacity'])
+        model.accumulator = CycleStatisticsAccumulator.from_state(state)
+        model.metadata = metadata
+        return model
@@ -4,10 +4,14 @@ Cycle Segmenter - Responsible for detecting production cycles using state masks.
 
 import pandas as pd
 import numpy as np
-from typing import List, Dict, Optional, Tuple
+from typing import Dict, Iterator, List, Optional, Tuple
 from dataclasses import dataclass
 from datetime import datetime
+import hashlib
 import logging
+import os
+from machine_analyzer.running_statistics import CycleStatisticsAccumulator
+from machine_analyzer.sharding import default_shard_size, resolve_workers, run_sharded, shard_bounds
 
 logger = logging.getLogger(__name__)
 
@@ -24,13 +28,325 @@ class ProductionCycle:
     average_energy: float
     variation: float
 
+
+def _mask_runs(mask: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Return inclusive (start, end) offsets of consecutive True runs in a boolean mask."""
+    padded = np.concatenate(([False], mask, [False])).view(np.int8)
+    edges = np.flatnonzero(np.diff(padded))
+    return edges[0::2].astype(np.int64), edges[1::2].astype(np.int64) - 1
+
+
+def _duration_filter(times: np.ndarray, starts: np.ndarray, ends: np.ndarray,
+                     min_duration: str, max_duration: str) -> np.ndarray:
+    """Return a mask of runs whose duration lies within [min_duration, max_duration]."""
+    durations = times[ends] - times[starts]
+    min_td = pd.Timedelta(min_duration).to_timedelta64()
+    max_td = pd.Timedelta(max_duration).to_timedelta64()
+    return (durations >= min_td) & (durations <= max_td)
+
+
+def _run_positions(starts: np.ndarray, ends: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Return row positions of all runs concatenated, with run offsets and lengths.
+    
+    Returns:
+        Tuple of (positions, offsets into positions, run lengths)
+    """
+    lengths = ends - starts + 1
+    offsets = np.concatenate(([0], np.cumsum(lengths)[:-1])).astype(np.int64)
+    positions = np.repeat(starts - offsets, lengths) + np.arange(lengths.sum())
+    return positions, offsets, lengths
+
+
+def _resample_runs(values: np.ndarray, starts: np.ndarray, ends: np.ndarray, length: int) -> np.ndarray:
+    """
+    Resample every run to ``length`` points with one ``np.interp`` call.
+    
+    Runs are concatenated and each run's query points are spread evenly over
+    its own span of the concatenated array, so interpolation never crosses
+    into a neighbouring run.
+    
+    Returns:
+        C-contiguous float32 array of shape (n_runs, length)
+    """
+    if len(starts) == 0:
+        return np.empty((0, length), dtype=np.float32)
+    
+    positions, offsets, lengths = _run_positions(starts, ends)
+    run_values = values[positions]
+    
+    fractions = np.linspace(0.0, 1.0, length) if length > 1 else np.zeros(1)
+    queries = offsets[:, None] + fractions[None, :] * (lengths - 1)[:, None]
+    resampled = np.interp(queries.ravel(), np.arange(len(run_values)), run_values)
+    return np.ascontiguousarray(resampled.reshape(len(starts), length), dtype=np.float32)
+
+
+# Largest block that NumPy's pairwise summation adds with eight interleaved accumulators
+_PAIRWISE_BLOCK = 128
+
+
+def _pairwise_block_sums(values: np.ndarray, offsets: np.ndarray, lengths: np.ndarray) -> np.ndarray:
+    """Sum blocks of at most ``_PAIRWISE_BLOCK`` values in the order NumPy's pairwise summation uses."""
+    sums = np.zeros(len(offsets))
+    short = lengths < 8
+    # Blocks under eight values are added one value at a time
+    for j in range(7):
+        inside = short & (j < lengths)
+        sums[inside] += values[offsets[inside] + j]
+    
+    offsets, lengths = offsets[~short], lengths[~short]
+    # Longer blocks keep eight accumulators, each taking every eighth value of the full rows
+    lanes = offsets[:, None] + np.arange(8)
+    a = values[lanes]
+    full = lengths - lengths % 8
+    for step in range(8, _PAIRWISE_BLOCK, 8):
+        inside = np.flatnonzero(step < full)
+        if len(inside) == 0:
+            break
+        a[inside] += values[lanes[inside] + step]
+    block_sums = ((a[:, 0] + a[:, 1]) + (a[:, 2] + a[:, 3])) + ((a[:, 4] + a[:, 5]) + (a[:, 6] + a[:, 7]))
+    # The values left over after the full rows are added to the block sum in order
+    for j in range(7):
+        inside = j < lengths % 8
+        block_sums[inside] += values[offsets[inside] + full[inside] + j]
+    sums[~short] = block_sums
+    return sums
+
+
+def _pairwise_sums(values: np.ndarray, offsets: np.ndarray, lengths: np.ndarray) -> np.ndarray:
+    """
+    Sum consecutive segments of an array bit-for-bit like ``np.sum`` on each segment.
+    
+    NumPy splits a sum recursively into halves (rounded down to a multiple
+    of eight) until a block has at most 128 values. The same split tree is
+    built for all segments level by level, the blocks are summed at once and
+    the halves are added back up the tree in the same order, so cycle
+    totals match the pandas reductions of the serial analysis exactly.
+    
+    Args:
+        values: Contiguous float64 values
+        offsets: Start position of each segment
+        lengths: Number of values in each segment
+        
+    Returns:
+        Array with the sum of each segment
+    """
+    levels = []
+    offsets = np.asarray(offsets, dtype=np.int64)
+    lengths = np.asarray(lengths, dtype=np.int64)
+    while len(offsets):
+        split = lengths > _PAIRWISE_BLOCK
+        halves = lengths[split] // 2
+        halves -= halves % 8
+        levels.append((offsets, lengths, split))
+        # Children of the split nodes form the next level, all left halves first
+        offsets = np.concatenate((offsets[split], offsets[split] + halves))
+        lengths = np.concatenate((halves, lengths[split] - halves))
+    
+    sums = np.empty(0)
+    for offsets, lengths, split in reversed(levels):
+        level_sums = np.empty(len(offsets))
+        level_sums[~split] = _pairwise_block_sums(values, offsets[~split], lengths[~split])
+        n_split = int(split.sum())
+        level_sums[split] = sums[:n_split] + sums[n_split:]
+        sums = level_sums
+    return sums
+
+
+def summarize_runs(values: np.ndarray, starts: np.ndarray, ends: np.ndarray) -> np.ndarray:
+    """
+    Summarize runs of an energy array in one vectorized pass.
+    
+    Missing values are skipped, as pandas does.
+    
+    Args:
+        values: Energy values
+        starts: Inclusive start row of each run
+        ends: Inclusive end row of each run
+        
+    Returns:
+        Array of shape (n_runs, 4) with total, peak, average and variation per run
+    """
+    summaries = np.zeros((len(starts), 4), dtype=np.float64)
+    if len(starts) == 0:
+        return summaries
+    
+    positions, offsets, lengths = _run_positions(starts, ends)
+    run_values = values[positions]
+    
+    valid = ~np.isnan(run_values)
+    filled = np.where(valid, run_values, 0.0)
+    counts = np.add.reduceat(valid.astype(np.int64), offsets)
+    # Pairwise sums and the two-pass variance give the same bits as the pandas reductions
+    totals = _pairwise_sums(filled, offsets, lengths)
+    peaks = np.fmax.reduceat(run_values, offsets)
+    
+    with np.errstate(invalid="ignore", divide="ignore"):
+        means = totals / counts
+        deviations = np.where(valid, np.repeat(means, lengths) - run_values, 0.0)
+        stds = np.sqrt(_pairwise_sums(deviations ** 2, offsets, lengths) / (counts - 1))
+        variations = np.where(means > 0, stds / means, 0.0)
+    
+    summaries[:, 0] = totals
+    summaries[:, 1] = peaks
+    summaries[:, 2] = means
+    summaries[:, 3] = variations
+    return summaries
+
+
+def _split_runs(starts: np.ndarray, ends: np.ndarray, breaks: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Split runs so that no run contains both row ``b - 1`` and row ``b`` for any break ``b``."""
+    if len(breaks) == 0 or len(starts) == 0:
+        return starts, ends
+    run = np.searchsorted(starts, breaks, side="right") - 1
+    safe_run = np.maximum(run, 0)
+    inside = (run >= 0) & (breaks > starts[safe_run]) & (breaks <= ends[safe_run])
+    splits = breaks[inside]
+    return np.sort(np.concatenate((starts, splits))), np.sort(np.concatenate((ends, splits - 1)))
+
+
+def _sampling_gaps(times: np.ndarray, samples: np.ndarray, max_gap: np.timedelta64) -> Dict[str, np.ndarray]:
+    """
+    Locate sampling gaps longer than ``max_gap`` relative to the rows of ``times``.
+    
+    Args:
+        times: Row timestamps as datetime64
+        samples: Sorted timestamps of the raw samples as datetime64
+        max_gap: Largest allowed interval between consecutive raw samples
+        
+    Returns:
+        Dictionary with ``in_gap`` (rows strictly inside a gap), ``breaks``
+        (rows starting a new gap-free stretch), and per gap ``gap_start``,
+        ``gap_end``, ``row_before`` and ``row_after``
+    """
+    times_ns = times.astype("datetime64[ns]").view(np.int64)
+    samples_ns = samples.astype("datetime64[ns]").view(np.int64)
+    gap_after = np.diff(samples_ns) > max_gap.astype("timedelta64[ns]").view(np.int64)
+    gap_index = np.flatnonzero(gap_after)
+    
+    # Last raw sample at or before each row, and the number of gaps before it
+    position = np.searchsorted(samples_ns, times_ns, side="right") - 1
+    clipped = np.clip(position, 0, max(len(samples_ns) - 1, 0))
+    gaps_before = np.concatenate(([0], np.cumsum(gap_after)))
+    stretch = gaps_before[clipped] if len(samples_ns) else np.zeros(len(times_ns), dtype=np.int64)
+    
+    flags = np.append(gap_after, False)
+    in_gap = (position >= 0) & flags[clipped] & (times_ns > samples_ns[clipped]) if len(samples_ns) else \
+        np.zeros(len(times_ns), dtype=bool)
+    
+    return {
+        'in_gap': in_gap,
+        'breaks': np.flatnonzero(stretch[1:] != stretch[:-1]).astype(np.int64) + 1,
+        'gap_start': samples[gap_index],
+        'gap_end': samples[gap_index + 1],
+        'row_before': np.searchsorted(times_ns, samples_ns[gap_index], side="right").astype(np.int64) - 1,
+        'row_after': np.searchsorted(times_ns, samples_ns[gap_index + 1], side="left").astype(np.int64),
+    }
+
+
+def find_production_runs(times: np.ndarray, production_mask: np.ndarray, min_duration: str = "5s",
+                         max_duration: str = "300s", max_gap: Optional[str] = None,
+                         sample_times: Optional[np.ndarray] = None) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Find the production cycles of a series as row offsets, without a DataFrame.
+    
+    Runs of the production mask are split at sampling gaps longer than
+    ``max_gap`` and rows inside such gaps are excluded, as in
+    ``CycleSegmenter.segment_cycles``; runs outside the duration limits are
+    dropped.
+    
+    Args:
+        times: Sorted row timestamps as datetime64
+        production_mask: Boolean production state per row
+        min_duration: Minimum duration for a valid cycle
+        max_duration: Maximum duration for a valid cycle
+        max_gap: Longest allowed interval between samples inside a cycle
+            (None disables gap detection)
+        sample_times: Timestamps of the raw samples before resampling
+            (None uses ``times``)
+            
+    Returns:
+        Tuple of inclusive (start, end) row offsets of the cycles
+    """
+    production_mask = np.asarray(production_mask, dtype=bool)
+    gaps = None
+    if max_gap is not None:
+        samples = times if sample_times is None else np.sort(np.asarray(sample_times))
+        gaps = _sampling_gaps(times, samples, pd.Timedelta(max_gap).to_timedelta64())
+        production_mask = production_mask & ~gaps['in_gap']
+    
+    starts, ends = _mask_runs(production_mask)
+    if gaps is not None:
+        starts, ends = _split_runs(starts, ends, gaps['breaks'])
+    keep = _duration_filter(times, starts, ends, min_duration, max_duration)
+    return starts[keep], ends[keep]
+
+
+def _segment_shard(task: Tuple) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Find and summarize the production runs of one shard.
+    
+    Runs touching either shard edge may continue in a neighbouring shard, so
+    they are returned unsummarized for stitching.
+    
+    Returns:
+        Tuple of (global starts, global ends, open-run mask, summaries of closed valid runs)
+    """
+    values, mask, times, offset, min_duration, max_duration, breaks = task
+    starts, ends = _split_runs(*_mask_runs(mask), breaks)
+    is_open = (starts == 0) | (ends == len(mask) - 1)
+    closed = ~is_open & _duration_filter(times, starts, ends, min_duration, max_duration)
+    summaries = summarize_runs(values, starts[closed], ends[closed])
+    return starts + offset, ends + offset, is_open, summaries
+
+
+def _stitch_shard_runs(results: List[Tuple], values: np.ndarray, times: np.ndarray,
+                       min_duration: str, max_duration: str,
+                       breaks: Optional[np.ndarray] = None) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Merge shard results, joining open runs that continue across shard boundaries."""
+    starts, ends, summaries = [], [], []
+    break_rows = set() if breaks is None else set(breaks.tolist())
+    open_start, open_end = None, None
+    
+    def close_open_run():
+        if open_start is None:
+            return
+        run_start, run_end = np.array([open_start]), np.array([open_end])
+        if _duration_filter(times, run_start, run_end, min_duration, max_duration)[0]:
+            starts.append(open_start)
+            ends.append(open_end)
+            summaries.append(summarize_runs(values, run_start, run_end)[0])
+    
+    for shard_starts, shard_ends, is_open, shard_summaries in results:
+        summary_iter = iter(shard_summaries)
+        closed_valid = ~is_open & _duration_filter(times, shard_starts, shard_ends, min_duration, max_duration)
+        for start, end, run_open, valid in zip(shard_starts, shard_ends, is_open, closed_valid):
+            if open_start is not None and start == open_end + 1 and start not in break_rows:
+                # Continuation of a run from the previous shard
+                open_end = end
+                continue
+            close_open_run()
+            open_start, open_end = None, None
+            if run_open:
+                open_start, open_end = start, end
+            elif valid:
+                starts.append(start)
+                ends.append(end)
+                summaries.append(next(summary_iter))
+    close_open_run()
+    
+    return (np.array(starts, dtype=np.int64), np.array(ends, dtype=np.int64),
+            np.array(summaries, dtype=np.float64).reshape(-1, 4))
+
+
 class CycleSegmenter:
     """
     Detects and segments production cycles using state masks.
     """
     
     def __init__(self, energy_data: pd.DataFrame, state_masks: Dict[str, pd.Series], 
-                 energy_column: str = "value"):
+                 energy_column: str = "value", max_gap: Optional[str] = None,
+                 sample_index: Optional[pd.DatetimeIndex] = None):
         """
         Initialize the cycle segmenter.
         
@@ -38,12 +354,27 @@ class CycleSegmenter:
             energy_data: DataFrame containing energy consumption data
             state_masks: Dictionary containing state masks from StateDetector
             energy_column: Name of the energy consumption column
+            max_gap: Longest allowed interval between samples inside a cycle
+                (None disables gap detection)
+            sample_index: Timestamps of the raw samples, e.g.
+                ``MachineDataLoader.get_timestamps()`` before preprocessing
+                (None uses the index of ``energy_data``)
         """
         self.energy_data = energy_data
         self.state_masks = state_masks
         self.energy_column = energy_column
+        self.max_gap = max_gap
+        self.sample_index = sample_index
+        self.gap_report = pd.DataFrame()
+        self._gaps = None
         self.production_cycles = []
         self.cycle_statistics = {}
+        self.statistics_accumulator = CycleStatisticsAccumulator()
+        self._cycle_starts = np.array([], dtype=np.int64)
+        self._cycle_ends = np.array([], dtype=np.int64)
+        self._cycle_summaries = np.empty((0, 4), dtype=np.float64)
+        self._energy_values = None
+        self._energy_source = None
         
     def find_production_segments(self, min_duration: str = "5s", max_duration: str = "300s") -> List[Tuple[pd.Timestamp, pd.Timestamp]]:
         """
@@ -56,30 +387,35 @@ class CycleSegmenter:
         Returns:
             List of (start_time, end_time) tuples for production segments
         """
+        starts, ends = self._find_production_runs(min_duration, max_duration)
+        index = self.energy_data.index
+        return list(zip(index[starts], index[ends]))
+    
+    def _find_production_runs(self, min_duration: str, max_duration: str) -> Tuple[np.ndarray, np.ndarray]:
+        """Return inclusive (start, end) row offsets of valid production runs."""
         if 'production_state' not in self.state_masks:
             raise ValueError("Production state mask not found in state_masks")
         
-        production_mask = self.state_masks['production_state']
-
-        # Créer un groupe de valeurs consécutives identiques (True/False)
-        self.energy_data["groups"] = (production_mask != production_mask.shift()).cumsum()
-
-        # Filtrer uniquement les groupes avec mask=True (production)
-        production_groups = self.energy_data[production_mask].groupby("groups")
-
-        min_td = pd.Timedelta(min_duration)
-        max_td = pd.Timedelta(max_duration)
-
-        segments = []
-        for _, group in production_groups:
-            start_time = group.index[0]
-            end_time = group.index[-1]
-            duration = end_time - start_time
-            if min_td <= duration <= max_td:
-                segments.append((start_time, end_time))
-
-        return segments
-
+        production_mask = self._production_mask()
+        times = self.energy_data.index.to_numpy()
+        
+        starts, ends = _mask_runs(production_mask)
+        if self._gaps is not None:
+            starts, ends = _split_runs(starts, ends, self._gaps['breaks'])
+        keep = _duration_filter(times, starts, ends, min_duration, max_duration)
+        return starts[keep], ends[keep]
+    
+    def _production_mask(self) -> np.ndarray:
+        """Return the production mask, cleared inside sampling gaps when ``max_gap`` is set."""
+        production_mask = np.asarray(self.state_masks['production_state'], dtype=bool)
+        self._gaps = None
+        if self.max_gap is None:
+            return production_mask
+        
+        times = self.energy_data.index.to_numpy()
+        samples = times if self.sample_index is None else np.sort(pd.DatetimeIndex(self.sample_index).to_numpy())
+        self._gaps = _sampling_gaps(times, samples, pd.Timedelta(self.max_gap).to_timedelta64())
+        return production_mask & ~self._gaps['in_gap']
     
     def segment_cycles(self, min_duration: str = "5s", max_duration: str = "300s",
                       ) -> List[ProductionCycle]:
@@ -94,77 +430,300 @@ class CycleSegmenter:
             List of ProductionCycle objects
         """
         # Find production segments
-        segments = self.find_production_segments(min_duration, max_duration)
+        starts, ends = self._find_production_runs(min_duration, max_duration)
+        values = self._load_energy_values()
+        summaries = summarize_runs(values, starts, ends)
+        
+        self._build_cycles(starts, ends, summaries)
+        
+        logger.info(f"Detected {len(self.production_cycles)} production cycles")
+        return self.production_cycles
+    
+    def segment_cycles_sharded(self, min_duration: str = "5s", max_duration: str = "300s",
+                               n_workers: Optional[int] = None,
+                               shard_size: Optional[int] = None) -> List[ProductionCycle]:
+        """
+        Segment energy data into production cycles over time shards in a process pool.
+        
+        Each shard summarizes the runs that lie entirely inside it. Runs that
+        touch a shard boundary are stitched with their neighbours and summarized
+        once over the full run, and cycle IDs are renumbered globally. The
+        result is identical to ``segment_cycles``.
+        
+        Args:
+            min_duration: Minimum duration for a valid cycle
+            max_duration: Maximum duration for a valid cycle
+            n_workers: Number of worker processes (None uses all cores)
+            shard_size: Number of rows per shard (None gives one shard per worker)
+            
+        Returns:
+            List of ProductionCycle objects
+        """
+        if 'production_state' not in self.state_masks:
+            raise ValueError("Production state mask not found in state_masks")
+        
+        n_workers = resolve_workers(n_workers)
+        production_mask = self._production_mask()
+        breaks = np.empty(0, dtype=np.int64) if self._gaps is None else self._gaps['breaks']
+        values = self._load_energy_values()
+        times = self.energy_data.index.to_numpy()
+        if shard_size is None:
+            shard_size = default_shard_size(len(values), n_workers)
+        
+        tasks = [
+            (values[start:end], production_mask[start:end], times[start:end], start, min_duration, max_duration,
+             breaks[(breaks > start) & (breaks < end)] - start)
+            for start, end, _, _ in shard_bounds(len(values), shard_size)
+        ]
+        results = run_sharded(_segment_shard, tasks, n_workers)
+        
+        starts, ends, summaries = _stitch_shard_runs(results, values, times, min_duration, max_duration, breaks)
+        self._build_cycles(starts, ends, summaries)
+        
+        logger.info(f"Detected {len(self.production_cycles)} production cycles in {len(tasks)} shards")
+        return self.production_cycles
+    
+    def _build_cycles(self, starts: np.ndarray, ends: np.ndarray, summaries: np.ndarray) -> None:
+        """Create ProductionCycle objects from run offsets and per-run summaries."""
+        index = self.energy_data.index
+        self._cycle_starts = starts
+        self._cycle_ends = ends
+        self._cycle_summaries = summaries
+        
         # Create ProductionCycle objects
         self.production_cycles = []
         
-        for cycle_id, (start_time, end_time) in enumerate(segments):
-            # Get cycle data
-            cycle_mask = (self.energy_data.index >= start_time) & (self.energy_data.index <= end_time)
-            cycle_energy = self.energy_data.loc[cycle_mask, self.energy_column]
+        for cycle_id, (start, end) in enumerate(zip(starts, ends)):
+            start_time = index[start]
+            end_time = index[end]
+            total_energy, peak_energy, average_energy, variation = summaries[cycle_id]
             
-            # Calculate cycle characteristics
-            duration = end_time - start_time
-            total_energy = cycle_energy.sum()
-            peak_energy = cycle_energy.max()
-            average_energy = cycle_energy.mean()
-            variation = cycle_energy.std() / cycle_energy.mean() if cycle_energy.mean() > 0 else 0
-
             # Create cycle object
             cycle = ProductionCycle(
                 cycle_id=cycle_id,
                 start_time=start_time,
                 end_time=end_time,
-                duration=duration,
-                energy_consumption=total_energy,
-                peak_energy=peak_energy,
-                average_energy=average_energy,
-                variation=variation
+                duration=end_time - start_time,
+                energy_consumption=float(total_energy),
+                peak_energy=float(peak_energy),
+                average_energy=float(average_energy),
+                variation=float(variation)
             )
             
             self.production_cycles.append(cycle)
         
         # Calculate statistics
         self._calculate_cycle_statistics()
+        self._build_gap_report()
+    
+    def _build_gap_report(self) -> None:
+        """Record the sampling gaps and the cycles that end right before or start right after them."""
+        if self._gaps is None:
+            self.gap_report = pd.DataFrame()
+            return
         
-        logger.info(f"Detected {len(self.production_cycles)} production cycles")
-        return self.production_cycles
+        gaps = self._gaps
+        before = np.searchsorted(self._cycle_ends, gaps['row_before'])
+        before_found = before < len(self._cycle_ends)
+        before_found[before_found] = self._cycle_ends[before[before_found]] == gaps['row_before'][before_found]
+        after = np.searchsorted(self._cycle_starts, gaps['row_after'])
+        after_found = after < len(self._cycle_starts)
+        after_found[after_found] = self._cycle_starts[after[after_found]] == gaps['row_after'][after_found]
+        
+        self.gap_report = pd.DataFrame({
+            'gap_start': gaps['gap_start'],
+            'gap_end': gaps['gap_end'],
+            'gap_seconds': (gaps['gap_end'] - gaps['gap_start']) / np.timedelta64(1, "s"),
+            'cycle_before': np.where(before_found, before, -1),
+            'cycle_after': np.where(after_found, after, -1)
+        })
+        
+        affected = int((before_found | after_found).sum())
+        if len(self.gap_report):
+            logger.warning(f"Found {len(self.gap_report)} sampling gaps longer than {self.max_gap}, "
+                           f"{affected} of them next to a production cycle")
+    
+    def get_gap_report(self) -> pd.DataFrame:
+        """
+        Get the sampling gaps found during segmentation and the cycles next to them.
+        
+        Returns:
+            DataFrame with gap_start, gap_end, gap_seconds, cycle_before and
+            cycle_after (-1 when no cycle touches the gap), empty when
+            ``max_gap`` is not set
+        """
+        return self.gap_report
     
     def _calculate_cycle_statistics(self) -> None:
         """Calculate statistics for all detected cycles."""
-        if not self.production_cycles:
-            self.cycle_statistics = {}
-            return
+        times = self.energy_data.index.to_numpy()
+        durations = (times[self._cycle_ends] - times[self._cycle_starts]) / np.timedelta64(1, "s")
+        summaries = self._cycle_summaries
+        
+        self.statistics_accumulator = CycleStatisticsAccumulator()
+        self.statistics_accumulator.update(durations, summaries[:, 0], summaries[:, 1], summaries[:, 3])
+        self.cycle_statistics = self.statistics_accumulator.to_dict()
+    
+    def append_cycles(self, cycles: List[ProductionCycle]) -> Dict:
+        """
+        Fold cycles detected elsewhere (e.g. a newer batch of data) into the statistics.
+        
+        The cycles are added to the running accumulator without recomputing
+        over the existing ones. They are not added to ``production_cycles``.
         
-        durations = [cycle.duration.total_seconds() for cycle in self.production_cycles]
-        energy_consumptions = [cycle.energy_consumption for cycle in self.production_cycles]
-        peak_energies = [cycle.peak_energy for cycle in self.production_cycles]
-        variations = [cycle.variation for cycle in self.production_cycles]
-
-        self.cycle_statistics = {
-            'total_cycles': len(self.production_cycles),
-            'duration_stats': {
-                'mean': np.mean(durations),
-                'std': np.std(durations),
-                'min': np.min(durations),
-                'max': np.max(durations),
-                'median': np.median(durations)
-            },
-            'energy_stats': {
-                'mean': np.mean(energy_consumptions),
-                'std': np.std(energy_consumptions),
-                'mean_peak': np.mean(peak_energies),
-                'std_peak': np.std(peak_energies),
-                'total_energy': np.sum(energy_consumptions)
-            },
-            'variation_stats': {
-                'mean': np.mean(variations),
-                'std': np.std(variations),
-                'min': np.min(variations),
-                'max': np.max(variations),
-                'median': np.median(variations)
-            }
-        }
+        Args:
+            cycles: List of ProductionCycle objects
+            
+        Returns:
+            Updated dictionary with cycle statistics
+        """
+        self.statistics_accumulator.add_cycles(cycles)
+        self.cycle_statistics = self.statistics_accumulator.to_dict()
+        return self.cycle_statistics
+    
+    def merge_statistics(self, other: CycleStatisticsAccumulator) -> Dict:
+        """
+        Merge statistics accumulated on another shard or machine.
+        
+        Args:
+            other: CycleStatisticsAccumulator to merge
+            
+        Returns:
+            Updated dictionary with cycle statistics
+        """
+        self.statistics_accumulator.merge(other)
+        self.cycle_statistics = self.statistics_accumulator.to_dict()
+        return self.cycle_statistics
+    
+    def get_cycle_shape_matrix(self, length: int = 64, cache_path: Optional[str] = None) -> np.ndarray:
+        """
+        Get the energy profile of every cycle resampled to a fixed length.
+        
+        Each cycle is linearly interpolated over its samples to ``length``
+        evenly spaced points. When ``cache_path`` is given, a matrix saved there
+        for the same cycles, length and energy data (compared by a digest of
+        the timestamps and values) is reused, otherwise it is computed and
+        saved.
+        
+        Args:
+            length: Number of points per resampled cycle
+            cache_path: Optional path of a ``.npz`` cache file
+            
+        Returns:
+            C-contiguous float32 array of shape (n_cycles, length)
+        """
+        if length < 1:
+            raise ValueError("length must be a positive integer")
+        
+        values = self.get_energy_values()
+        if cache_path is not None:
+            digest = self._energy_digest(values)
+            if os.path.exists(cache_path):
+                with np.load(cache_path) as cached:
+                    if (int(cached["length"]) == length
+                            and "digest" in cached.files and str(cached["digest"]) == digest
+                            and np.array_equal(cached["starts"], self._cycle_starts)
+                            and np.array_equal(cached["ends"], self._cycle_ends)):
+                        logger.info(f"Loaded cycle shape matrix from {cache_path}")
+                        return np.ascontiguousarray(cached["matrix"], dtype=np.float32)
+        
+        matrix = _resample_runs(values, self._cycle_starts, self._cycle_ends, length)
+        
+        if cache_path is not None:
+            with open(cache_path, "wb") as f:
+                np.savez(f, matrix=matrix, starts=self._cycle_starts,
+                         ends=self._cycle_ends, length=length, digest=digest)
+            logger.info(f"Saved cycle shape matrix to {cache_path}")
+        
+        return matrix
+    
+    def _energy_digest(self, values: np.ndarray) -> str:
+        """SHA-256 digest of the timestamps and energy values, used to validate the shape cache."""
+        digest = hashlib.sha256()
+        times = self.energy_data.index.to_numpy().astype('datetime64[ns]').view(np.int64)
+        digest.update(np.ascontiguousarray(times, dtype='<i8').tobytes())
+        digest.update(np.ascontiguousarray(values, dtype='<f8').tobytes())
+        return digest.hexdigest()
+    
+    def get_cycle_feature_matrix(self, shape_length: int = 0) -> np.ndarray:
+        """
+        Get a numeric feature matrix with one row per cycle.
+        
+        The first columns are duration in seconds, energy consumption, peak
+        energy and variation. When ``shape_length`` is positive, the resampled
+        cycle profile from ``get_cycle_shape_matrix`` is appended.
+        
+        Args:
+            shape_length: Number of shape points to append (0 for none)
+            
+        Returns:
+            Float64 array of shape (n_cycles, 4 + shape_length)
+        """
+        times = self.energy_data.index.to_numpy()
+        durations = (times[self._cycle_ends] - times[self._cycle_starts]) / np.timedelta64(1, "s")
+        columns = [durations[:, None], self._cycle_summaries[:, [0, 1, 3]]]
+        if shape_length > 0:
+            columns.append(self.get_cycle_shape_matrix(length=shape_length))
+        return np.hstack(columns).astype(np.float64)
+    
+    @property
+    def cycle_starts(self) -> np.ndarray:
+        """Read-only inclusive start row offset of each cycle."""
+        starts = self._cycle_starts.view()
+        starts.flags.writeable = False
+        return starts
+    
+    @property
+    def cycle_ends(self) -> np.ndarray:
+        """Read-only inclusive end row offset of each cycle."""
+        ends = self._cycle_ends.view()
+        ends.flags.writeable = False
+        return ends
+    
+    def get_energy_values(self) -> np.ndarray:
+        """
+        Get the energy column as the contiguous float64 array the cycle offsets refer to.
+        
+        Returns:
+            Read-only array with one value per row of ``energy_data``
+        """
+        if self._energy_values is None or self._energy_source is not self.energy_data:
+            return self._load_energy_values()
+        return self._energy_values
+    
+    def _load_energy_values(self) -> np.ndarray:
+        """(Re)load the energy column as a contiguous read-only array."""
+        values = np.ascontiguousarray(self.energy_data[self.energy_column].to_numpy(dtype=np.float64)).view()
+        values.flags.writeable = False
+        self._energy_values = values
+        self._energy_source = self.energy_data
+        return values
+    
+    def cycle_view(self, i: int) -> np.ndarray:
+        """
+        Get the energy samples of one cycle without copying.
+        
+        Args:
+            i: Position of the cycle in ``production_cycles``
+            
+        Returns:
+            Read-only NumPy view into the energy array
+        """
+        n_cycles = len(self._cycle_starts)
+        if not -n_cycles <= i < n_cycles:
+            raise IndexError(f"Cycle index {i} out of range for {n_cycles} cycles")
+        return self.get_energy_values()[self._cycle_starts[i]:self._cycle_ends[i] + 1]
+    
+    def iter_cycle_views(self) -> Iterator[np.ndarray]:
+        """
+        Iterate over the energy samples of all cycles without copying.
+        
+        Yields:
+            Read-only NumPy view of each cycle, in cycle order
+        """
+        values = self.get_energy_values()
+        for start, end in zip(self._cycle_starts.tolist(), self._cycle_ends.tolist()):
+            yield values[start:end + 1]
     
     def get_cycles(self) -> List[ProductionCycle]:
         """
@@ -0,0 +1,93 @@
+"""
+Downsampling - Shape-preserving reduction of long series for charts.
+"""
+
+import numpy as np
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+def lttb_indices(x: np.ndarray, y: np.ndarray, n_out: int) -> np.ndarray:
+    """
+    Select points with Largest-Triangle-Three-Buckets.
+
+    The first and last points are kept and the points in between are split
+    into ``n_out - 2`` buckets of equal size. From each bucket the point that
+    forms the largest triangle with the point selected from the previous
+    bucket and the average of the next bucket is kept. The loop runs once
+    per output point; the work in each bucket is vectorized.
+
+    Args:
+        x: Sorted x values, e.g. timestamps as numbers
+        y: Y values without NaN
+        n_out: Number of points to keep, at least 3
+
+    Returns:
+        Sorted indices of the selected points
+    """
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    n = len(x)
+    if n_out < 3:
+        raise ValueError("n_out must be at least 3")
+    if n <= n_out:
+        return np.arange(n)
+
+    edges = np.linspace(1, n - 1, n_out - 1).astype(np.int64)
+    counts = np.diff(edges)
+    # Average of each bucket, followed by the last point as the anchor of the last bucket
+    average_x = np.append(np.add.reduceat(x[:n - 1], edges[:-1]) / counts, x[-1])
+    average_y = np.append(np.add.reduceat(y[:n - 1], edges[:-1]) / counts, y[-1])
+
+    selected = np.empty(n_out, dtype=np.int64)
+    selected[0], selected[-1] = 0, n - 1
+    previous = 0
+    for i in range(n_out - 2):
+        low, high = edges[i], edges[i + 1]
+        ax, ay = x[previous], y[previous]
+        area = np.abs((ax - average_x[i + 1]) * (y[low:high] - ay) - (ax - x[low:high]) * (average_y[i + 1] - ay))
+        previous = low + int(np.argmax(area))
+        selected[i + 1] = previous
+    return selected
+
+
+def minmax_indices(x: np.ndarray, y: np.ndarray, n_buckets: int) -> np.ndarray:
+    """
+    Select the minimum and maximum point of each x bucket, e.g. each pixel column.
+
+    The x range is split into ``n_buckets`` equal-width buckets, so gaps in
+    the data stay visible. Fully vectorized.
+
+    Args:
+        x: Sorted x values, e.g. timestamps as numbers
+        y: Y values without NaN
+        n_buckets: Number of buckets
+
+    Returns:
+        Sorted indices of the selected points (at most ``2 * n_buckets + 2``)
+    """
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    n = len(x)
+    if n_buckets < 1:
+        raise ValueError("n_buckets must be at least 1")
+    if n <= 2 * n_buckets:
+        return np.arange(n)
+
+    span = x[-1] - x[0]
+    if span > 0:
+        bucket = np.minimum(((x - x[0]) * (n_buckets / span)).astype(np.int64), n_buckets - 1)
+    else:
+        bucket = np.arange(n) * n_buckets // n
+    starts = np.flatnonzero(np.r_[True, bucket[1:] != bucket[:-1]])
+    sizes = np.diff(np.r_[starts, n])
+    bucket_number = np.repeat(np.arange(len(starts)), sizes)
+
+    selected = [np.array([0, n - 1])]
+    for extreme in (np.minimum.reduceat(y, starts), np.maximum.reduceat(y, starts)):
+        # First point of each bucket that attains the bucket's extreme
+        candidates = np.flatnonzero(y == np.repeat(extreme, sizes))
+        _, first = np.unique(bucket_number[candidates], return_index=True)
+        selected.append(candidates[first])
+    return np.unique(np.concatenate(selected))
@@ -0,0 +1,231 @@
+"""
+DTW Matcher - Match production cycles to reference templates with dynamic time warping.
+"""
+
+import numpy as np
+from typing import Dict, Optional
+from dataclasses import dataclass, field
+import logging
+from machine_analyzer.cycle_segmenter import CycleSegmenter
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class DTWMatchResult:
+    """Best matching template and DTW distance for each cycle."""
+    template_index: np.ndarray
+    distance: np.ndarray
+    pruning_stats: Dict[str, int] = field(default_factory=dict)
+
+
+def _z_normalize(series: np.ndarray) -> np.ndarray:
+    """Z-normalize each row, leaving constant rows at zero."""
+    mean = series.mean(axis=1, keepdims=True)
+    std = series.std(axis=1, keepdims=True)
+    return (series - mean) / np.where(std > 0, std, 1.0)
+
+
+def _envelopes(series: np.ndarray, band: int) -> tuple:
+    """Return the (upper, lower) running max/min of each row over a window of +/- band."""
+    upper = series.copy()
+    lower = series.copy()
+    for shift in range(1, band + 1):
+        np.maximum(upper[:, shift:], series[:, :-shift], out=upper[:, shift:])
+        np.maximum(upper[:, :-shift], series[:, shift:], out=upper[:, :-shift])
+        np.minimum(lower[:, shift:], series[:, :-shift], out=lower[:, shift:])
+        np.minimum(lower[:, :-shift], series[:, shift:], out=lower[:, :-shift])
+    return upper, lower
+
+
+def _lb_keogh(queries: np.ndarray, upper: np.ndarray, lower: np.ndarray) -> np.ndarray:
+    """LB_Keogh of each query row against the envelope on the same row."""
+    above = np.maximum(queries - upper, 0)
+    below = np.maximum(lower - queries, 0)
+    return (above * above + below * below).sum(axis=1)
+
+
+def batch_dtw(x: np.ndarray, y: np.ndarray, band: int,
+              thresholds: Optional[np.ndarray] = None) -> np.ndarray:
+    """
+    Squared DTW distance between paired rows of ``x`` and ``y`` within a Sakoe-Chiba band.
+
+    The dynamic program advances one row at a time for all pairs at once. The
+    in-row recurrence D[j] = min(tmp[j], c[j] + D[j-1]) is solved with a
+    cumulative sum and a running minimum, so each row is fully vectorized.
+    Pairs whose best partial path already reaches their threshold are
+    abandoned early and reported as infinity.
+
+    Args:
+        x: Array of shape (n_pairs, length)
+        y: Array of shape (n_pairs, length)
+        band: Sakoe-Chiba band half-width in samples
+        thresholds: Optional per-pair early abandoning thresholds
+
+    Returns:
+        Array of squared DTW distances, infinite for abandoned pairs
+    """
+    n_pairs, length = x.shape
+    result = np.full(n_pairs, np.inf)
+    if n_pairs == 0:
+        return result
+
+    active = np.arange(n_pairs)
+    limits = np.full(n_pairs, np.inf) if thresholds is None else np.asarray(thresholds, dtype=np.float64)
+    previous = np.full((n_pairs, length), np.inf)
+
+    for i in range(length):
+        lo, hi = max(0, i - band), min(length - 1, i + band)
+        cost = x[active, i, None] - y[active, lo:hi + 1]
+        cost *= cost
+
+        if i == 0:
+            candidates = np.full_like(cost, np.inf)
+            candidates[:, 0] = cost[:, 0]
+        else:
+            diagonal = np.full_like(cost, np.inf)
+            if lo > 0:
+                diagonal[:] = previous[:, lo - 1:hi]
+            else:
+                diagonal[:, 1:] = previous[:, lo:hi]
+            candidates = cost + np.minimum(diagonal, previous[:, lo:hi + 1])
+
+        cumulative = np.cumsum(cost, axis=1)
+        row = cumulative + np.minimum.accumulate(candidates - cumulative, axis=1)
+
+        current = np.full((len(active), length), np.inf)
+        current[:, lo:hi + 1] = row
+
+        # Early abandoning: every path through this row costs at least its minimum
+        alive = row.min(axis=1) < limits[active]
+        if not alive.all():
+            active = active[alive]
+            current = current[alive]
+            if len(active) == 0:
+                return result
+        previous = current
+
+    final = previous[:, length - 1]
+    result[active] = np.where(final < limits[active], final, np.inf)
+    return result
+
+
+class DTWMatcher:
+    """
+    Matches cycles to reference templates with banded DTW and lower-bound pruning.
+
+    Candidate (cycle, template) pairs are pruned by a cascade of LB_Kim and
+    LB_Keogh against an initial Euclidean upper bound. The remaining pairs are
+    evaluated in rounds, in ascending lower-bound order, where each pair must
+    still beat the best distance found so far and pass the reversed LB_Keogh
+    before an early abandoning DTW batched over all cycles.
+    """
+
+    def __init__(self, templates: np.ndarray, band: float = 0.1, normalize: bool = True):
+        """
+        Initialize the DTW matcher.
+
+        Args:
+            templates: Reference profiles of shape (n_templates, length)
+            band: Sakoe-Chiba band half-width as a fraction of the length
+            normalize: Whether to z-normalize cycles and templates
+        """
+        templates = np.atleast_2d(np.asarray(templates, dtype=np.float64))
+        if templates.shape[0] == 0 or templates.shape[1] < 2:
+            raise ValueError("templates must have at least one profile of length 2 or more")
+
+        self.normalize = normalize
+        self.length = templates.shape[1]
+        self.band = max(0, int(np.ceil(band * self.length)))
+        self.templates = _z_normalize(templates) if normalize else templates
+        self.upper, self.lower = _envelopes(self.templates, self.band)
+
+    def match(self, cycles: np.ndarray) -> DTWMatchResult:
+        """
+        Find the nearest template of every cycle.
+
+        Args:
+            cycles: Cycle profiles of shape (n_cycles, length), e.g. from
+                ``CycleSegmenter.get_cycle_shape_matrix``
+
+        Returns:
+            DTWMatchResult with template indices, DTW distances and pruning counts
+        """
+        cycles = np.atleast_2d(np.asarray(cycles, dtype=np.float64))
+        if cycles.shape[1] != self.length:
+            raise ValueError(f"Cycles must have length {self.length}, got {cycles.shape[1]}")
+        if self.normalize:
+            cycles = _z_normalize(cycles)
+
+        n_cycles, n_templates = len(cycles), len(self.templates)
+        stats = {"pairs": n_cycles * n_templates, "pruned_kim": 0, "pruned_keogh": 0,
+                 "pruned_keogh_reverse": 0, "pruned_ordered": 0, "abandoned": 0, "full_dtw": 0}
+        if n_cycles == 0:
+            return DTWMatchResult(np.empty(0, dtype=np.int64), np.empty(0), stats)
+
+        # LB_Kim: first and last points are always aligned
+        lb = ((cycles[:, None, 0] - self.templates[None, :, 0]) ** 2
+              + (cycles[:, None, -1] - self.templates[None, :, -1]) ** 2)
+
+        # Upper bound from the Euclidean (diagonal path) distance to the most promising template
+        best_template = lb.argmin(axis=1)
+        best = ((cycles - self.templates[best_template]) ** 2).sum(axis=1)
+
+        candidate = lb < best[:, None]
+        stats["pruned_kim"] = int(stats["pairs"] - candidate.sum())
+
+        # LB_Keogh of each cycle against each template envelope
+        for t in range(n_templates):
+            rows = np.flatnonzero(candidate[:, t])
+            bound = _lb_keogh(cycles[rows], self.upper[t], self.lower[t])
+            lb[rows, t] = np.maximum(lb[rows, t], bound)
+            pruned = bound >= best[rows]
+            candidate[rows[pruned], t] = False
+            stats["pruned_keogh"] += int(pruned.sum())
+
+        # Evaluate surviving pairs in rounds of ascending lower bound per cycle,
+        # so the first round tightens the best-so-far used by later rounds
+        cycle_upper, cycle_lower = _envelopes(cycles, self.band)
+        order = np.argsort(np.where(candidate, lb, np.inf), axis=1, kind="stable")
+        for rank in range(n_templates):
+            cols = order[:, rank]
+            rows = np.flatnonzero(candidate[np.arange(n_cycles), cols])
+            if len(rows) == 0:
+                break
+            cols = cols[rows]
+
+            promising = lb[rows, cols] < best[rows]
+            stats["pruned_ordered"] += int((~promising).sum())
+            rows, cols = rows[promising], cols[promising]
+
+            # Reversed LB_Keogh: template against the cycle envelope
+            bound = _lb_keogh(self.templates[cols], cycle_upper[rows], cycle_lower[rows])
+            promising = bound < best[rows]
+            stats["pruned_keogh_reverse"] += int((~promising).sum())
+            rows, cols = rows[promising], cols[promising]
+            if len(rows) == 0:
+                continue
+
+            distances = batch_dtw(cycles[rows], self.templates[cols], self.band, thresholds=best[rows])
+            finished = np.isfinite(distances)
+            stats["full_dtw"] += int(finished.sum())
+            stats["abandoned"] += int((~finished).sum())
+
+            improved = distances < best[rows]
+            best[rows[improved]] = distances[improved]
+            best_template[rows[improved]] = cols[improved]
+
+        logger.info(f"DTW matching: {stats['full_dtw']} of {stats['pairs']} pairs fully computed")
+        return DTWMatchResult(best_template.astype(np.int64), np.sqrt(best), stats)
+
+    def match_segmenter(self, segmenter: CycleSegmenter) -> DTWMatchResult:
+        """
+        Match all cycles of a segmenter to the templates.
+
+        Args:
+            segmenter: CycleSegmenter with segmented cycles
+
+        Returns:
+            DTWMatchResult with one entry per cycle
+        """
+        return self.match(segmenter.get_cycle_shape_matrix(length=self.length))
@@ -0,0 +1,183 @@
+"""
+Fleet Summary - Per-machine aggregates computed in parallel and merged into fleet totals.
+"""
+
+import pandas as pd
+import numpy as np
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Sequence, Tuple
+import logging
+from machine_analyzer.quality_analyzer import ISSUE_MESSAGES, QUALITY_GRADES, QualityResult
+from machine_analyzer.running_statistics import CycleStatisticsAccumulator, RunningStats
+from machine_analyzer.sharding import resolve_workers, run_sharded
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class MachineResult:
+    """Analysis results of one machine."""
+    machine: str
+    energy_data: pd.DataFrame
+    cycle_arrays: Dict[str, np.ndarray]
+    quality_result: Optional[QualityResult] = None
+
+
+@dataclass
+class MachineAggregate:
+    """Mergeable aggregates of one machine, or of several merged machines."""
+    machine: str
+    energy: RunningStats = field(default_factory=RunningStats)
+    start_time: Optional[pd.Timestamp] = None
+    end_time: Optional[pd.Timestamp] = None
+    cycles: CycleStatisticsAccumulator = field(default_factory=CycleStatisticsAccumulator)
+    scores: RunningStats = field(default_factory=RunningStats)
+    anomalous_cycles: int = 0
+    grade_counts: np.ndarray = field(default_factory=lambda: np.zeros(len(QUALITY_GRADES), dtype=np.int64))
+    issue_counts: np.ndarray = field(default_factory=lambda: np.zeros(len(ISSUE_MESSAGES), dtype=np.int64))
+
+    @property
+    def total_cycles(self) -> int:
+        return self.cycles.count
+
+    @property
+    def anomaly_rate(self) -> float:
+        """Share of scored cycles that are anomalous."""
+        return self.anomalous_cycles / self.scores.count if self.scores.count else 0.0
+
+    @property
+    def energy_per_cycle(self) -> float:
+        """Average energy consumption per cycle."""
+        return self.cycles.stats["energy"].mean if self.total_cycles else float("nan")
+
+    def merge(self, other: "MachineAggregate") -> "MachineAggregate":
+        """
+        Merge the aggregates of another machine into this one.
+
+        Args:
+            other: Aggregates to merge
+
+        Returns:
+            The updated aggregates
+        """
+        self.energy.merge(other.energy)
+        if other.start_time is not None:
+            self.start_time = other.start_time if self.start_time is None else min(self.start_time, other.start_time)
+            self.end_time = other.end_time if self.end_time is None else max(self.end_time, other.end_time)
+        self.cycles.merge(other.cycles)
+        self.scores.merge(other.scores)
+        self.anomalous_cycles += other.anomalous_cycles
+        self.grade_counts += other.grade_counts
+        self.issue_counts += other.issue_counts
+        return self
+
+
+def aggregate_machine(result: MachineResult) -> MachineAggregate:
+    """
+    Aggregate the results of one machine.
+
+    Args:
+        result: Analysis results of the machine
+
+    Returns:
+        MachineAggregate of the machine
+    """
+    aggregate = MachineAggregate(result.machine)
+    if not result.energy_data.empty:
+        values = result.energy_data.iloc[:, 0].to_numpy(dtype=np.float64)
+        aggregate.energy.update(values[~np.isnan(values)])
+        aggregate.start_time = result.energy_data.index.min()
+        aggregate.end_time = result.energy_data.index.max()
+
+    arrays = result.cycle_arrays
+    if len(arrays['duration']):
+        aggregate.cycles.update(arrays['duration'], arrays['energy'], arrays['peak'], arrays['variation'])
+
+    quality = result.quality_result
+    if quality is not None and len(quality):
+        summary = quality.summary()
+        aggregate.scores.update(quality.quality_scores)
+        aggregate.anomalous_cycles = summary['anomalous_cycles']
+        aggregate.grade_counts = np.bincount(quality.grade_codes, minlength=len(QUALITY_GRADES)).astype(np.int64)
+        aggregate.issue_counts = np.array(list(summary['issue_counts'].values()), dtype=np.int64)
+    return aggregate
+
+
+def _aggregate_machines(results: List[MachineResult]) -> List[MachineAggregate]:
+    """Aggregate a batch of machines; module level so that it can run in worker processes."""
+    return [aggregate_machine(result) for result in results]
+
+
+class FleetSummary:
+    """
+    Aggregates of a fleet of machines.
+
+    Each machine is aggregated on its own, in a process pool, into mergeable
+    running statistics and counts; the fleet totals are the merge of the
+    per-machine aggregates, so no raw data is combined across machines.
+    """
+
+    def __init__(self, machine_results: Sequence[MachineResult], n_workers: Optional[int] = None):
+        """
+        Aggregate the machines of a fleet.
+
+        Args:
+            machine_results: Analysis results, one per machine
+            n_workers: Number of worker processes (None uses all available cores)
+        """
+        names = [result.machine for result in machine_results]
+        if len(set(names)) != len(names):
+            raise ValueError("Machine names must be unique")
+        n_workers = resolve_workers(n_workers)
+        # One batch per worker keeps the number of pickled tasks small for large fleets
+        batches = [list(machine_results[i::n_workers]) for i in range(min(n_workers, len(machine_results)))]
+        aggregates = {aggregate.machine: aggregate
+                      for batch in run_sharded(_aggregate_machines, batches, n_workers) for aggregate in batch}
+        self.machines = [aggregates[name] for name in names]
+        self._machine_frame = None
+
+        self.total = MachineAggregate("fleet")
+        for aggregate in self.machines:
+            self.total.merge(aggregate)
+        logger.info(f"Aggregated {len(self.machines)} machines with {self.total.total_cycles} cycles")
+
+    def machine_frame(self) -> pd.DataFrame:
+        """
+        Per-machine table of the main aggregates.
+
+        Returns:
+            Cached DataFrame indexed by machine with total_cycles,
+            anomalous_cycles, anomaly_rate, energy_per_cycle,
+            average_duration, average_quality_score, total_energy and peak_energy
+        """
+        if self._machine_frame is not None:
+            return self._machine_frame
+        self._machine_frame = pd.DataFrame({
+            'total_cycles': [aggregate.total_cycles for aggregate in self.machines],
+            'anomalous_cycles': [aggregate.anomalous_cycles for aggregate in self.machines],
+            'anomaly_rate': [aggregate.anomaly_rate for aggregate in self.machines],
+            'energy_per_cycle': [aggregate.energy_per_cycle for aggregate in self.machines],
+            'average_duration': [aggregate.cycles.stats["duration"].mean if aggregate.total_cycles else np.nan
+                                 for aggregate in self.machines],
+            'average_quality_score': [aggregate.scores.mean if aggregate.scores.count else np.nan
+                                      for aggregate in self.machines],
+            'total_energy': [aggregate.energy.total for aggregate in self.machines],
+            'peak_energy': [aggregate.energy.max if aggregate.energy.count else np.nan
+                            for aggregate in self.machines],
+        }, index=pd.Index([aggregate.machine for aggregate in self.machines], name='machine'))
+        return self._machine_frame
+
+    def ranking(self, column: str, top_n: int = 10) -> List[Tuple[str, float]]:
+        """
+        Machines with the highest values of a ``machine_frame`` column.
+
+        Args:
+            column: Column to rank by, e.g. "anomaly_rate" or "energy_per_cycle"
+            top_n: Number of machines to return
+
+        Returns:
+            List of (machine, value) pairs, highest first
+        """
+        values = self.machine_frame()[column].dropna()
+        ranked = values.sort_values(ascending=False, kind="stable").head(top_n)
+        return list(zip(ranked.index, ranked.to_numpy().tolist()))
@@ -0,0 +1,313 @@
+"""
+Matrix Profile - Motif and discord discovery over the energy series.
+"""
+
+import pandas as pd
+import numpy as np
+from typing import Dict, List, Optional, Tuple
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+
+
+def sliding_dot_product(query: np.ndarray, series: np.ndarray) -> np.ndarray:
+    """
+    Dot product of ``query`` with every subsequence of ``series`` using the FFT.
+
+    Args:
+        query: Query of length m
+        series: Series of length n >= m
+
+    Returns:
+        Array of n - m + 1 dot products
+    """
+    m, n = len(query), len(series)
+    size = 1 << int(np.ceil(np.log2(n + m)))
+    product = np.fft.irfft(np.fft.rfft(series, size) * np.fft.rfft(query[::-1], size), size)
+    return product[m - 1:n]
+
+
+def window_sums(values: np.ndarray, m: int, block: int = 4096) -> np.ndarray:
+    """
+    Sum of every length-m window, from cumulative sums restarted every ``block`` samples.
+
+    Restarting keeps the cumulative sums of the size of one block, so the
+    window sums do not lose precision to cancellation on long series.
+
+    Args:
+        values: Values to sum
+        m: Window length
+        block: Samples per cumulative-sum block (at least m)
+
+    Returns:
+        Array of len(values) - m + 1 window sums
+    """
+    values = np.asarray(values, dtype=np.float64)
+    n = len(values)
+    block = max(int(block), m)
+    n_blocks = -(-n // block)
+    padded = np.zeros(n_blocks * block)
+    padded[:n] = values
+    partial = padded.reshape(n_blocks, block).cumsum(axis=1)
+    # local[j]: sum from the start of the block holding sample j - 1 up to sample j - 1
+    local = np.concatenate(([0.0], partial.ravel()[:n]))
+    block_of = np.maximum(np.arange(n + 1) - 1, 0) // block
+    starts = np.arange(n - m + 1)
+    first, last = block_of[starts], block_of[starts + m]
+    # Windows ending in the next block also include the rest of their first block
+    sums = local[starts + m] - local[starts]
+    crossing = last != first
+    sums[crossing] += partial[first[crossing], -1]
+    return sums
+
+
+def moving_mean_std(series: np.ndarray, m: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Mean and standard deviation of every length-m subsequence."""
+    series = np.asarray(series, dtype=np.float64)
+    offset = float(series.mean()) if len(series) else 0.0
+    centered = series - offset
+    means = window_sums(centered, m) / m
+    variances = window_sums(centered * centered, m) / m - means * means
+    return means + offset, np.sqrt(np.maximum(variances, 0.0))
+
+
+def _distances(dot: np.ndarray, m: int, mean_a: np.ndarray, std_a: np.ndarray,
+               mean_b: np.ndarray, std_b: np.ndarray, eps: float) -> np.ndarray:
+    """
+    Z-normalized Euclidean distances from sliding dot products.
+
+    Two constant subsequences are at distance 0, and a constant and a
+    non-constant subsequence at distance sqrt(m).
+    """
+    flat_a = std_a < eps
+    flat_b = std_b < eps
+    with np.errstate(divide="ignore", invalid="ignore"):
+        correlation = (dot - m * mean_a * mean_b) / (m * std_a * std_b)
+    squared = 2 * m * (1 - np.clip(correlation, -1.0, 1.0))
+    squared = np.where(flat_a | flat_b, np.where(flat_a & flat_b, 0.0, m), squared)
+    return np.sqrt(np.maximum(squared, 0.0))
+
+
+class MatrixProfile:
+    """
+    Computes the matrix profile of an energy series to find motifs and discords.
+
+    The exact profile is built diagonal by diagonal (SCRIMP): along a diagonal
+    of the distance matrix, sliding dot products are differences of
+    cumulative sums of the mean-centered series, restarted every few
+    thousand samples to stay precise, so each diagonal costs O(n)
+    vectorized operations. The
+    anytime mode first seeds the profile with FFT distance profiles of
+    sampled subsequences (PreSCRIMP) and then processes diagonals in random
+    order until the time budget runs out.
+    """
+
+    def __init__(self, energy_data: pd.DataFrame, window_size: int, energy_column: str = "value",
+                 exclusion_factor: float = 0.25):
+        """
+        Initialize the matrix profile.
+
+        Args:
+            energy_data: DataFrame containing energy consumption data
+            window_size: Subsequence length in samples
+            energy_column: Name of the energy consumption column
+            exclusion_factor: Trivial-match exclusion zone as a fraction of the window
+        """
+        self.energy_data = energy_data
+        self.energy_column = energy_column
+        self.window_size = int(window_size)
+        self.series = energy_data[energy_column].to_numpy(dtype=np.float64)
+        self.n_subsequences = len(self.series) - self.window_size + 1
+        if self.window_size < 3 or self.n_subsequences < 2:
+            raise ValueError("window_size must be at least 3 and shorter than the series")
+
+        self.exclusion_zone = max(1, int(np.ceil(self.window_size * exclusion_factor)))
+        # Z-normalized distances do not change with an offset, and the centered series keeps sums small
+        self._centered = self.series - self.series.mean()
+        self._means, self.stds = moving_mean_std(self._centered, self.window_size)
+        self.means = self._means + self.series.mean()
+        self._eps = 1e-8 * max(1.0, float(np.abs(self.series).max()))
+
+        self.profile = np.full(self.n_subsequences, np.inf)
+        self.profile_index = np.full(self.n_subsequences, -1, dtype=np.int64)
+        self.diagonals_processed = 0
+
+    def compute(self, time_budget: Optional[float] = None, seed: int = 0) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Compute the matrix profile.
+
+        Args:
+            time_budget: Seconds available for an approximate anytime result
+                (None computes the exact profile)
+            seed: Seed for the anytime sampling order
+
+        Returns:
+            Tuple of (profile distances, index of each nearest neighbour)
+        """
+        diagonals = np.arange(self.exclusion_zone + 1, self.n_subsequences)
+        deadline = None
+        if time_budget is not None:
+            deadline = time.perf_counter() + time_budget
+            rng = np.random.default_rng(seed)
+            self._prescrimp(rng, deadline)
+            diagonals = rng.permutation(diagonals)
+
+        for k in diagonals:
+            self._process_diagonal(int(k))
+            self.diagonals_processed += 1
+            if deadline is not None and time.perf_counter() > deadline:
+                break
+
+        logger.info(f"Matrix profile: processed {self.diagonals_processed} of {len(diagonals)} diagonals")
+        return self.profile, self.profile_index
+
+    def get_progress(self) -> float:
+        """Fraction of distance-matrix diagonals processed so far."""
+        total = max(1, self.n_subsequences - self.exclusion_zone - 1)
+        return min(1.0, self.diagonals_processed / total)
+
+    def distance_profile(self, position: int) -> np.ndarray:
+        """
+        Distances from the subsequence at ``position`` to every subsequence (MASS).
+
+        Args:
+            position: Start of the query subsequence
+
+        Returns:
+            Array of n_subsequences distances
+        """
+        m = self.window_size
+        dot = sliding_dot_product(self._centered[position:position + m], self._centered)
+        return _distances(dot, m, self._means[position], self.stds[position], self._means, self.stds, self._eps)
+
+    def find_motifs(self, k: int = 3, radius_factor: float = 2.0) -> List[Dict]:
+        """
+        Find the top-k motifs and all their occurrences.
+
+        Each motif is the closest remaining pair in the profile. Its
+        occurrences are all non-overlapping subsequences within
+        ``radius_factor`` times the pair distance.
+
+        Args:
+            k: Number of motifs
+            radius_factor: Occurrence radius as a multiple of the motif pair distance
+
+        Returns:
+            List of dicts with motif_index, neighbor_index, distance and occurrences
+        """
+        self._require_profile()
+        profile = self.profile.copy()
+        motifs = []
+        for _ in range(k):
+            if not np.isfinite(profile).any():
+                break
+            position = int(np.nanargmin(profile))
+            distance = float(profile[position])
+
+            distances = self.distance_profile(position)
+            radius = max(radius_factor * distance, self._eps)
+            occurrences = self._non_overlapping(np.flatnonzero(distances <= radius), distances)
+
+            motifs.append({
+                'motif_index': position,
+                'neighbor_index': int(self.profile_index[position]),
+                'distance': distance,
+                'occurrences': occurrences,
+            })
+            for occurrence in occurrences:
+                profile[max(0, occurrence - self.window_size):occurrence + self.window_size] = np.inf
+        return motifs
+
+    def find_discords(self, k: int = 3) -> List[Dict]:
+        """
+        Find the top-k discords, the subsequences farthest from their nearest neighbour.
+
+        Args:
+            k: Number of discords
+
+        Returns:
+            List of dicts with discord_index, start_time and distance
+        """
+        self._require_profile()
+        profile = np.where(np.isfinite(self.profile), self.profile, -np.inf)
+        discords = []
+        for _ in range(k):
+            position = int(np.argmax(profile))
+            if not np.isfinite(profile[position]):
+                break
+            discords.append({
+                'discord_index': position,
+                'start_time': self.energy_data.index[position],
+                'distance': float(profile[position]),
+            })
+            profile[max(0, position - self.exclusion_zone):position + self.exclusion_zone + 1] = -np.inf
+        return discords
+
+    def get_motif_segments(self, motif: Dict) -> List[Tuple[pd.Timestamp, pd.Timestamp]]:
+        """
+        Convert motif occurrences into (start_time, end_time) segments, e.g. as cycles.
+
+        Args:
+            motif: Motif dictionary from ``find_motifs``
+
+        Returns:
+            List of (start_time, end_time) tuples
+        """
+        index = self.energy_data.index
+        return [(index[start], index[start + self.window_size - 1]) for start in motif['occurrences']]
+
+    def _process_diagonal(self, k: int) -> None:
+        """Update the profile with all pairs (i, i + k) on one diagonal."""
+        rows, cols, distances = self._diagonal_distances(k)
+        self._update(rows, cols, distances)
+        self._update(cols, rows, distances)
+
+    def _diagonal_distances(self, k: int) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Distances of all pairs (i, i + k) on one diagonal, from block-wise sums of the centered series."""
+        m = self.window_size
+        dot = window_sums(self._centered[:len(self._centered) - k] * self._centered[k:], m)
+        rows = np.arange(len(dot))
+        cols = rows + k
+        distances = _distances(dot, m, self._means[rows], self.stds[rows],
+                               self._means[cols], self.stds[cols], self._eps)
+        return rows, cols, distances
+
+    def _prescrimp(self, rng: np.random.Generator, deadline: float) -> None:
+        """Seed the profile with full distance profiles of sampled subsequences."""
+        step = max(1, self.exclusion_zone)
+        for position in rng.permutation(np.arange(0, self.n_subsequences, step)):
+            distances = self.distance_profile(int(position))
+            lo, hi = max(0, position - self.exclusion_zone), position + self.exclusion_zone + 1
+            distances[lo:hi] = np.inf
+            neighbor = int(np.argmin(distances))
+
+            update = distances < self.profile
+            self.profile[update] = distances[update]
+            self.profile_index[update] = position
+            if distances[neighbor] < self.profile[position]:
+                self.profile[position] = distances[neighbor]
+                self.profile_index[position] = neighbor
+            if time.perf_counter() > deadline:
+                break
+
+    def _update(self, rows: np.ndarray, cols: np.ndarray, distances: np.ndarray) -> None:
+        """Keep the smaller of the current and new distances for each row."""
+        better = distances < self.profile[rows]
+        self.profile[rows[better]] = distances[better]
+        self.profile_index[rows[better]] = cols[better]
+
+    def _non_overlapping(self, positions: np.ndarray, distances: np.ndarray) -> np.ndarray:
+        """Greedily keep the closest positions that do not overlap each other."""
+        taken = np.zeros(self.n_subsequences, dtype=bool)
+        kept = []
+        for position in positions[np.argsort(distances[positions], kind="stable")]:
+            lo, hi = max(0, position - self.window_size + 1), position + self.window_size
+            if not taken[lo:hi].any():
+                kept.append(position)
+                taken[position] = True
+        return np.sort(np.array(kept, dtype=np.int64))
+
+    def _require_profile(self) -> None:
+        if not np.isfinite(self.profile).any():
+            raise ValueError("Matrix profile must be computed first")
@@ -0,0 +1,339 @@
+"""
+Multivariate Scorer - Batch anomaly scoring over the cycle feature matrix.
+"""
+
+import numpy as np
+from typing import Dict
+import logging
+from machine_analyzer.cycle_segmenter import CycleSegmenter
+
+logger = logging.getLogger(__name__)
+
+EULER_GAMMA = 0.5772156649015329
+
+
+def _average_path_length(n: np.ndarray) -> np.ndarray:
+    """Average path length of an unsuccessful search in a binary search tree of n points."""
+    n = np.asarray(n, dtype=np.float64)
+    result = np.zeros_like(n)
+    result[n == 2] = 1.0
+    large = n > 2
+    result[large] = 2 * (np.log(n[large] - 1) + EULER_GAMMA) - 2 * (n[large] - 1) / n[large]
+    return result
+
+
+def _robust_location_scale(features: np.ndarray):
+    """Median and MAD-based scale of each column ignoring NaN, with constant or empty columns at scale 1."""
+    empty = np.isnan(features).all(axis=0)
+    # Columns without values are centred at 0 and never fed to nanmedian, which would warn
+    filled = np.where(empty, 0.0, features)
+    center = np.nanmedian(filled, axis=0)
+    scale = 1.4826 * np.nanmedian(np.abs(filled - center), axis=0)
+    fallback = np.nanstd(filled, axis=0)
+    scale = np.where(scale > 0, scale, np.where(fallback > 0, fallback, 1.0))
+    return center, scale
+
+
+def _check_finite(features: np.ndarray) -> None:
+    """Reject infinite feature values, which cannot be imputed."""
+    if np.isinf(features).any():
+        raise ValueError("features must not contain infinite values")
+
+
+class MultivariateScorer:
+    """
+    Scores cycles that are abnormal in the combination of their features.
+
+    Two methods are available:
+
+    - ``mahalanobis``: robust Mahalanobis distance. Location and covariance
+      are estimated with concentration steps of the minimum covariance
+      determinant, starting from the points closest to the median.
+    - ``isolation_forest``: NumPy isolation forest. Trees are stored as
+      padded node arrays and all samples descend all trees together, one
+      level per step.
+
+    Higher scores are more anomalous. The decision threshold is the
+    ``1 - contamination`` quantile of the training scores. Missing feature
+    values are imputed with the robust centre fitted for the feature, as in
+    CycleSimilarityIndex; infinite values are rejected.
+    """
+
+    def __init__(self, method: str = "mahalanobis", contamination: float = 0.01,
+                 support_fraction: float = 0.75, n_trees: int = 100, max_samples: int = 256,
+                 seed: int = 0, chunk_size: int = 4096):
+        """
+        Initialize the scorer.
+
+        Args:
+            method: "mahalanobis" or "isolation_forest"
+            contamination: Expected fraction of anomalous cycles
+            support_fraction: Fraction of cycles used for the robust covariance
+            n_trees: Number of isolation trees
+            max_samples: Number of cycles sampled per tree
+            seed: Seed for the isolation forest sampling
+            chunk_size: Number of cycles scored at once
+        """
+        if method not in ("mahalanobis", "isolation_forest"):
+            raise ValueError(f"Unknown scoring method: {method}")
+        if not 0 < contamination < 0.5:
+            raise ValueError("contamination must be between 0 and 0.5")
+        self.method = method
+        self.contamination = contamination
+        self.support_fraction = support_fraction
+        self.n_trees = n_trees
+        self.max_samples = max_samples
+        self.seed = seed
+        self.chunk_size = chunk_size
+
+        self.is_fitted = False
+        self.threshold = None
+        self._center = None
+        self._scale = None
+        self._state: Dict[str, np.ndarray] = {}
+        self._flat_cache = None
+
+    @classmethod
+    def from_segmenter(cls, segmenter: CycleSegmenter, shape_length: int = 0, **kwargs) -> "MultivariateScorer":
+        """
+        Fit a scorer on the cycle feature matrix of a segmenter.
+
+        Args:
+            segmenter: CycleSegmenter with segmented cycles
+            shape_length: Number of shape points appended to the features
+            **kwargs: Arguments for the scorer constructor
+
+        Returns:
+            Fitted MultivariateScorer
+        """
+        return cls(**kwargs).fit(segmenter.get_cycle_feature_matrix(shape_length=shape_length))
+
+    def fit(self, features: np.ndarray) -> "MultivariateScorer":
+        """
+        Fit the scorer on a feature matrix.
+
+        Args:
+            features: Array of shape (n_cycles, n_features), e.g. from
+                ``CycleSegmenter.get_cycle_feature_matrix``
+
+        Returns:
+            The fitted scorer
+        """
+        features = np.asarray(features, dtype=np.float64)
+        if features.ndim != 2 or len(features) < 2:
+            raise ValueError("features must be a 2D array with at least two rows")
+        _check_finite(features)
+
+        self._center, self._scale = _robust_location_scale(features)
+        standardized = self._standardize(features)
+        self._flat_cache = None
+        if self.method == "mahalanobis":
+            self._fit_mahalanobis(standardized)
+        else:
+            self._fit_isolation_forest(standardized)
+        self.is_fitted = True
+
+        self.threshold = float(np.quantile(self.score(features), 1 - self.contamination))
+        logger.info(f"Fitted {self.method} scorer on {len(features)} cycles, threshold {self.threshold:.3f}")
+        return self
+
+    def score(self, features: np.ndarray) -> np.ndarray:
+        """
+        Compute anomaly scores in batch.
+
+        Args:
+            features: Array of shape (n_cycles, n_features)
+
+        Returns:
+            Array of scores: squared robust Mahalanobis distances, or isolation
+            forest scores in (0, 1]
+        """
+        if not self.is_fitted:
+            raise ValueError("Scorer must be fitted before scoring")
+        features = np.atleast_2d(np.asarray(features, dtype=np.float64))
+        if features.shape[1] != len(self._center):
+            raise ValueError(f"Expected {len(self._center)} features, got {features.shape[1]}")
+        _check_finite(features)
+
+        scores = np.empty(len(features))
+        for start in range(0, len(features), self.chunk_size):
+            chunk = self._standardize(features[start:start + self.chunk_size])
+            if self.method == "mahalanobis":
+                scores[start:start + len(chunk)] = self._score_mahalanobis(chunk)
+            else:
+                scores[start:start + len(chunk)] = self._score_isolation_forest(chunk)
+        return scores
+
+    def predict(self, features: np.ndarray) -> np.ndarray:
+        """
+        Flag anomalous cycles.
+
+        Args:
+            features: Array of shape (n_cycles, n_features)
+
+        Returns:
+            Boolean array, True where the score exceeds the fitted threshold
+        """
+        return self.score(features) > self.threshold
+
+    def get_state(self) -> Dict[str, np.ndarray]:
+        """Serialize the fitted scorer to arrays."""
+        if not self.is_fitted:
+            raise ValueError("Scorer must be fitted before it can be serialized")
+        state = {f"model_{key}": value for key, value in self._state.items()}
+        state.update(
+            method=np.array(self.method),
+            params=np.array([self.contamination, self.support_fraction, self.n_trees,
+                             self.max_samples, self.seed, self.chunk_size, self.threshold]),
+            center=self._center,
+            scale=self._scale,
+        )
+        return state
+
+    @classmethod
+    def from_state(cls, state: Dict[str, np.ndarray]) -> "MultivariateScorer":
+        """Restore a scorer from ``get_state`` output."""
+        contamination, support_fraction, n_trees, max_samples, seed, chunk_size, threshold = state["params"]
+        scorer = cls(str(state["method"]), float(contamination), float(support_fraction), int(n_trees),
+                     int(max_samples), int(seed), int(chunk_size))
+        scorer.threshold = float(threshold)
+        scorer._center = np.asarray(state["center"])
+        scorer._scale = np.asarray(state["scale"])
+        scorer._state = {key[len("model_"):]: np.asarray(value)
+                         for key, value in state.items() if key.startswith("model_")}
+        scorer.is_fitted = True
+        return scorer
+
+    def save(self, path: str) -> None:
+        """
+        Save the fitted scorer to a ``.npz`` file.
+
+        Args:
+            path: Output file path
+        """
+        with open(path, "wb") as f:
+            np.savez(f, **self.get_state())
+        logger.info(f"Saved {self.method} scorer to {path}")
+
+    @classmethod
+    def load(cls, path: str) -> "MultivariateScorer":
+        """
+        Load a scorer saved with ``save``.
+
+        Args:
+            path: Path of the ``.npz`` file
+
+        Returns:
+            Fitted MultivariateScorer
+        """
+        with np.load(path, allow_pickle=False) as data:
+            return cls.from_state({key: data[key] for key in data.files})
+
+    def _standardize(self, features: np.ndarray) -> np.ndarray:
+        """Scale features robustly and impute missing values with the centre, i.e. 0."""
+        return np.nan_to_num((features - self._center) / self._scale, nan=0.0)
+
+    def _fit_mahalanobis(self, standardized: np.ndarray, max_steps: int = 30) -> None:
+        """Estimate robust location and covariance with MCD concentration steps."""
+        n_samples, n_features = standardized.shape
+        support = max(n_features + 1, int(np.ceil(self.support_fraction * n_samples)))
+        support = min(support, n_samples)
+
+        subset = np.argsort((standardized ** 2).sum(axis=1), kind="stable")[:support]
+        for _ in range(max_steps):
+            location = standardized[subset].mean(axis=0)
+            covariance = np.cov(standardized[subset], rowvar=False).reshape(n_features, n_features)
+            precision = np.linalg.pinv(covariance)
+            centered = standardized - location
+            distances = np.einsum("ij,jk,ik->i", centered, precision, centered)
+            new_subset = np.sort(np.argpartition(distances, support - 1)[:support])
+            if np.array_equal(new_subset, np.sort(subset)):
+                break
+            subset = new_subset
+
+        self._state = {"location": location, "precision": precision}
+
+    def _score_mahalanobis(self, standardized: np.ndarray) -> np.ndarray:
+        centered = standardized - self._state["location"]
+        return np.einsum("ij,jk,ik->i", centered, self._state["precision"], centered)
+
+    def _fit_isolation_forest(self, standardized: np.ndarray) -> None:
+        """Grow isolation trees and store them as padded node arrays."""
+        rng = np.random.default_rng(self.seed)
+        n_samples, n_features = standardized.shape
+        sample_size = min(self.max_samples, n_samples)
+        max_depth = int(np.ceil(np.log2(max(sample_size, 2))))
+        max_nodes = 2 ** (max_depth + 1) - 1
+
+        feature = np.full((self.n_trees, max_nodes), -1, dtype=np.int64)
+        threshold = np.zeros((self.n_trees, max_nodes))
+        children = np.zeros((self.n_trees, max_nodes, 2), dtype=np.int64)
+        leaf_value = np.zeros((self.n_trees, max_nodes))
+
+        for tree in range(self.n_trees):
+            sample = standardized[rng.choice(n_samples, sample_size, replace=False)]
+            n_nodes = 1
+            stack = [(0, np.arange(sample_size), 0)]
+            while stack:
+                node, rows, depth = stack.pop()
+                values = sample[rows]
+                spans = values.max(axis=0) - values.min(axis=0) if len(rows) else np.zeros(n_features)
+                splittable = np.flatnonzero(spans > 0)
+                if depth >= max_depth or len(rows) <= 1 or len(splittable) == 0:
+                    leaf_value[tree, node] = depth + _average_path_length(np.array([len(rows)]))[0]
+                    continue
+
+                column = rng.choice(splittable)
+                low, high = values[:, column].min(), values[:, column].max()
+                split = rng.uniform(low, high)
+                go_left = values[:, column] < split
+
+                feature[tree, node] = column
+                threshold[tree, node] = split
+                children[tree, node] = (n_nodes, n_nodes + 1)
+                stack.append((n_nodes, rows[go_left], depth + 1))
+                stack.append((n_nodes + 1, rows[~go_left], depth + 1))
+                n_nodes += 2
+
+        self._state = {
+            "feature": feature,
+            "threshold": threshold,
+            "children": children,
+            "leaf_value": leaf_value,
+            "normalizer": np.array([_average_path_length(np.array([sample_size]))[0], max_depth]),
+        }
+
+    def _score_isolation_forest(self, standardized: np.ndarray) -> np.ndarray:
+        """Descend all trees level by level for all samples at once."""
+        feature, threshold, left, leaf_value = self._flat_forest()
+        normalizer, max_depth = self._state["normalizer"]
+        n_samples, n_features = standardized.shape
+        n_trees, max_nodes = self._state["feature"].shape
+
+        # Global node IDs: tree * max_nodes + node. Leaves loop back to themselves.
+        nodes = np.broadcast_to(np.arange(n_trees) * max_nodes, (n_samples, n_trees)).copy()
+        row_offsets = (np.arange(n_samples) * n_features)[:, None]
+        flat = standardized.ravel()
+        for _ in range(int(max_depth)):
+            values = flat[row_offsets + feature[nodes]]
+            nodes = left[nodes] + (values >= threshold[nodes])
+
+        path_lengths = leaf_value[nodes].mean(axis=1)
+        return 2.0 ** (-path_lengths / max(normalizer, 1e-12))
+
+    def _flat_forest(self):
+        """Flatten the node arrays so that a leaf's left child is itself and its threshold is infinite."""
+        if self._flat_cache is None:
+            feature = self._state["feature"]
+            n_trees, max_nodes = feature.shape
+            offsets = (np.arange(n_trees) * max_nodes)[:, None]
+            leaf = feature < 0
+            own_ids = offsets + np.arange(max_nodes)[None, :]
+            left = np.where(leaf, own_ids, self._state["children"][:, :, 0] + offsets)
+            self._flat_cache = (
+                np.where(leaf, 0, feature).ravel(),
+                np.where(leaf, np.inf, self._state["threshold"]).ravel(),
+                left.ravel(),
+                self._state["leaf_value"].ravel(),
+            )
+        return self._flat_cache
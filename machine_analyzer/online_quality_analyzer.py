@@ -0,0 +1,222 @@
+"""
+Online Quality Analyzer - Scores production cycles as they complete.
+"""
+
+import pandas as pd
+import numpy as np
+from typing import Dict, Optional
+import logging
+from machine_analyzer.cycle_segmenter import ProductionCycle
+from machine_analyzer.quality_analyzer import (GRADE_THRESHOLDS, ISSUE_MESSAGES, N_CHECKS, QUALITY_GRADES,
+                                               QualityIssue, QualityMetrics)
+from machine_analyzer.rolling_baseline import RollingBaseline
+from machine_analyzer.running_statistics import CycleStatisticsAccumulator, QuantileSketch, RunningStats
+
+logger = logging.getLogger(__name__)
+
+# Standard deviation of a normal distribution per unit of interquartile range
+IQR_TO_STD = 1 / 1.349
+
+
+class OnlineQualityAnalyzer:
+    """
+    Scores each new cycle against a running baseline, then adds it to the baseline.
+
+    The ``mean_std`` baseline keeps Welford mean and standard deviation, so
+    scoring and updating are O(1). The ``robust`` baseline uses the median
+    and the interquartile range of quantile sketches. New values are buffered
+    and the robust centre and spread are refreshed every ``refresh_interval``
+    cycles, which keeps the amortized cost per cycle constant. A
+    RollingBaseline can replace both with a drift-aware window. Each check
+    flags values beyond centre +/- factor * spread, as in QualityAnalyzer.
+    """
+
+    FEATURES = ("duration", "energy", "variation")
+
+    def __init__(self, threshold_factor: Optional[dict] = None, method: str = "mean_std",
+                 warmup_cycles: int = 10, refresh_interval: int = 64, sketch_capacity: int = 1024,
+                 rolling_baseline: Optional[RollingBaseline] = None):
+        """
+        Initialize the online quality analyzer.
+
+        Args:
+            threshold_factor: Number of standard deviations per check
+            method: Baseline type, "mean_std" or "robust"
+            warmup_cycles: Number of cycles learned before any cycle is flagged
+            refresh_interval: Cycles between robust baseline refreshes
+            sketch_capacity: Capacity of the robust quantile sketches
+            rolling_baseline: Optional rolling or exponentially weighted
+                baseline over (duration, energy, variation) used instead of
+                the all-history baseline
+        """
+        if method not in ("mean_std", "robust"):
+            raise ValueError(f"Unknown baseline method: {method}")
+        self.threshold_factor = {"variation": 2, "duration": 2, "energy": 2}
+        self.threshold_factor.update(threshold_factor or {})
+        self.method = method
+        self.warmup_cycles = warmup_cycles
+        self.refresh_interval = max(1, refresh_interval)
+        self.rolling_baseline = rolling_baseline
+
+        self.stats = {feature: RunningStats() for feature in self.FEATURES}
+        self.sketches = {feature: QuantileSketch(sketch_capacity) for feature in self.FEATURES}
+        self._pending = {feature: [] for feature in self.FEATURES}
+        self._robust = {feature: (np.nan, np.nan) for feature in self.FEATURES}
+
+        self.cycles_scored = 0
+        self.anomalous_units = []
+
+    @classmethod
+    def from_accumulator(cls, accumulator: CycleStatisticsAccumulator, **kwargs) -> "OnlineQualityAnalyzer":
+        """
+        Start from the running statistics of historical cycles, e.g. ``CycleSegmenter.statistics_accumulator``.
+
+        The mean/std moments of all features are taken over. A robust
+        baseline also starts from the duration and variation sketches. The
+        accumulator has no energy sketch, so the energy check uses the mean
+        and standard deviation of the history until new cycles have been
+        added to the energy sketch.
+
+        Args:
+            accumulator: CycleStatisticsAccumulator of the history
+            **kwargs: Arguments for the analyzer constructor
+
+        Returns:
+            OnlineQualityAnalyzer seeded with the history
+        """
+        analyzer = cls(**kwargs)
+        for feature in cls.FEATURES:
+            analyzer.stats[feature].merge(accumulator.stats[feature])
+        for feature, sketch in accumulator.sketches.items():
+            analyzer.sketches[feature].merge(sketch)
+        analyzer._refresh_robust()
+        return analyzer
+
+    @property
+    def baseline_count(self) -> int:
+        """Number of cycles in the baseline."""
+        return self.stats["duration"].count
+
+    def score(self, cycle: ProductionCycle) -> QualityMetrics:
+        """
+        Score a cycle against the current baseline without learning it.
+
+        Args:
+            cycle: Completed production cycle
+
+        Returns:
+            QualityMetrics of the cycle
+        """
+        values = {
+            "duration": cycle.duration.total_seconds(),
+            "energy": cycle.energy_consumption,
+            "variation": cycle.variation,
+        }
+        flags = QualityIssue(0)
+        if self.baseline_count >= self.warmup_cycles:
+            limits = self._limits(cycle.start_time)
+            if values["variation"] > limits["variation"][1]:
+                flags |= QualityIssue.HIGH_VARIATION
+            if values["duration"] < limits["duration"][0]:
+                flags |= QualityIssue.SHORT_DURATION
+            if values["energy"] > limits["energy"][1]:
+                flags |= QualityIssue.HIGH_ENERGY
+
+        issues = [message for issue, message in ISSUE_MESSAGES.items() if flags & issue]
+        quality_score = 1 - len(issues) / N_CHECKS
+        grade = next((i for i, threshold in enumerate(GRADE_THRESHOLDS) if quality_score >= threshold),
+                     len(GRADE_THRESHOLDS))
+        return QualityMetrics(
+            cycle_id=cycle.cycle_id,
+            quality_score=quality_score,
+            quality_grade=str(QUALITY_GRADES[grade]),
+            is_anomalous=bool(flags),
+            issues=issues
+        )
+
+    def learn(self, cycle: ProductionCycle) -> None:
+        """
+        Add a cycle to the baseline.
+
+        Args:
+            cycle: Completed production cycle
+        """
+        values = (cycle.duration.total_seconds(), cycle.energy_consumption, cycle.variation)
+        if self.rolling_baseline is not None:
+            self.rolling_baseline.update(np.array(values), cycle.start_time)
+        for feature, value in zip(self.FEATURES, values):
+            self.stats[feature].push(value)
+            if self.method == "robust":
+                self._pending[feature].append(value)
+        # Refresh every cycle while the baseline is young, then every refresh_interval cycles
+        if self.method == "robust" and (len(self._pending["duration"]) >= self.refresh_interval
+                                        or self.baseline_count <= self.refresh_interval):
+            self._refresh_robust()
+
+    def update(self, cycle: ProductionCycle) -> QualityMetrics:
+        """
+        Score a new cycle, then add it to the baseline.
+
+        Args:
+            cycle: Completed production cycle
+
+        Returns:
+            QualityMetrics of the cycle
+        """
+        metrics = self.score(cycle)
+        self.learn(cycle)
+        self.cycles_scored += 1
+        if metrics.is_anomalous:
+            self.anomalous_units.append(cycle.cycle_id)
+            logger.info(f"Cycle {cycle.cycle_id} graded {metrics.quality_grade}: {'; '.join(metrics.issues)}")
+        return metrics
+
+    def get_baseline(self, time: Optional[pd.Timestamp] = None) -> Dict[str, Dict[str, float]]:
+        """
+        Get the centre and spread used for each check.
+
+        Args:
+            time: Time of the next cycle, required for time-based rolling baselines
+
+        Returns:
+            Dictionary of feature -> {'center', 'spread', 'count'}
+        """
+        center_spread = self._center_spread(time)
+        return {
+            feature: {'center': center_spread[feature][0], 'spread': center_spread[feature][1],
+                      'count': self.stats[feature].count}
+            for feature in self.FEATURES
+        }
+
+    def _center_spread(self, time: Optional[pd.Timestamp]) -> Dict[str, tuple]:
+        """Return (centre, spread) of each feature for a cycle at ``time``."""
+        if self.rolling_baseline is not None:
+            means, stds = self.rolling_baseline.baseline(time)
+            means = np.broadcast_to(means, len(self.FEATURES))
+            stds = np.broadcast_to(stds, len(self.FEATURES))
+            return {feature: (float(means[i]), float(stds[i])) for i, feature in enumerate(self.FEATURES)}
+        if self.method == "robust":
+            return dict(self._robust)
+        return {feature: (stats.mean, stats.std) for feature, stats in self.stats.items()}
+
+    def _limits(self, time: Optional[pd.Timestamp]) -> Dict[str, tuple]:
+        """Return (centre - factor * spread, centre + factor * spread) for each feature."""
+        limits = {}
+        for feature, (center, spread) in self._center_spread(time).items():
+            width = self.threshold_factor[feature] * spread
+            limits[feature] = (center - width, center + width)
+        return limits
+
+    def _refresh_robust(self) -> None:
+        """Flush buffered values into the sketches and recompute median and IQR-based spread."""
+        for feature in self.FEATURES:
+            sketch = self.sketches[feature]
+            if self._pending[feature]:
+                sketch.update(self._pending[feature])
+                self._pending[feature] = []
+            if sketch.count:
+                spread = (sketch.quantile(0.75) - sketch.quantile(0.25)) * IQR_TO_STD
+                self._robust[feature] = (sketch.median(), spread)
+            elif self.stats[feature].count:
+                # Seeded moments without a sketch, e.g. energy from an accumulator
+                self._robust[feature] = (self.stats[feature].mean, self.stats[feature].std)
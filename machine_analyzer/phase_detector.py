@@ -0,0 +1,207 @@
+"""
+Phase Detector - Splits production cycles into phases with change-point detection.
+"""
+
+import pandas as pd
+import numpy as np
+from typing import Optional, Tuple
+import logging
+from machine_analyzer.cycle_segmenter import CycleSegmenter, summarize_runs
+
+logger = logging.getLogger(__name__)
+
+
+def _noise_variance(values: np.ndarray, lengths: np.ndarray) -> np.ndarray:
+    """Estimate the noise variance of each padded row from the MAD of its first differences."""
+    n_rows, width = values.shape
+    diffs = np.abs(np.diff(values, axis=1))
+    valid = np.arange(width - 1)[None, :] < (lengths - 1)[:, None]
+    diffs = np.where(valid, diffs, np.nan)
+    with np.errstate(all="ignore"):
+        sigma = 1.4826 * np.nanmedian(diffs, axis=1) / np.sqrt(2) if width > 1 else np.zeros(n_rows)
+        variance = np.nanvar(np.where(np.arange(width)[None, :] < lengths[:, None], values, np.nan), axis=1)
+    sigma2 = np.nan_to_num(sigma ** 2)
+    return np.maximum(sigma2, 1e-6 * np.nan_to_num(variance) + 1e-12)
+
+
+def pelt_batch(values: np.ndarray, lengths: np.ndarray, penalties: np.ndarray,
+               min_size: int = 3) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Detect changes in mean for many series at once with PELT.
+
+    All series advance in lockstep over time. Segment costs come from
+    cumulative sums of x and x^2, and each series keeps its own pruned
+    candidate set, stored as a padded matrix that is compacted as candidates
+    are pruned.
+
+    Args:
+        values: Array of shape (n_series, max_length), padded past each length
+        lengths: Length of each series
+        penalties: Penalty per change point for each series
+        min_size: Minimum number of samples per segment
+
+    Returns:
+        Tuple of (backpointers of shape (n_series, max_length + 1), optimal costs)
+    """
+    n_series, width = values.shape
+    min_size = max(1, int(min_size))
+    rows = np.arange(n_series)[:, None]
+
+    padded = np.where(np.arange(width)[None, :] < lengths[:, None], values, 0.0)
+    sum1 = np.zeros((n_series, width + 1))
+    sum2 = np.zeros((n_series, width + 1))
+    np.cumsum(padded, axis=1, out=sum1[:, 1:])
+    np.cumsum(padded * padded, axis=1, out=sum2[:, 1:])
+
+    cost = np.full((n_series, width + 1), np.inf)
+    cost[:, 0] = -penalties
+    backpointers = np.zeros((n_series, width + 1), dtype=np.int64)
+
+    candidates = np.zeros((n_series, 1), dtype=np.int64)
+    valid = np.ones((n_series, 1), dtype=bool)
+
+    for t in range(min_size, width + 1):
+        active = lengths >= t
+        sizes = t - candidates
+        usable = valid & (sizes >= min_size)
+
+        with np.errstate(divide="ignore", invalid="ignore"):
+            seg_sum = sum1[:, t, None] - sum1[rows, candidates]
+            seg_cost = sum2[:, t, None] - sum2[rows, candidates] - seg_sum * seg_sum / sizes
+        totals = np.where(usable, cost[rows, candidates] + seg_cost + penalties[:, None], np.inf)
+
+        best = totals.argmin(axis=1)
+        best_cost = totals[np.arange(n_series), best]
+        cost[:, t] = np.where(active, best_cost, np.inf)
+        backpointers[:, t] = candidates[np.arange(n_series), best]
+
+        # PELT pruning: a candidate that cannot beat the optimum now never will
+        pruned = usable & (totals - penalties[:, None] > best_cost[:, None])
+        valid = valid & ~pruned & active[:, None]
+
+        # Add t as a new candidate and compact the candidate matrix
+        candidates = np.hstack([candidates, np.full((n_series, 1), t)])
+        valid = np.hstack([valid, active[:, None]])
+        order = np.argsort(~valid, axis=1, kind="stable")
+        candidates = np.take_along_axis(candidates, order, axis=1)
+        valid = np.take_along_axis(valid, order, axis=1)
+        keep = valid.any(axis=0)
+        candidates, valid = candidates[:, keep], valid[:, keep]
+        if candidates.shape[1] == 0:
+            candidates = np.zeros((n_series, 1), dtype=np.int64)
+            valid = np.zeros((n_series, 1), dtype=bool)
+
+    return backpointers, cost[np.arange(n_series), lengths]
+
+
+class PhaseDetector:
+    """
+    Detects phases inside production cycles (e.g. heat, press, release).
+    """
+
+    def __init__(self, segmenter: CycleSegmenter, min_phase_length: int = 3,
+                 penalty: Optional[float] = None, penalty_factor: float = 3.0,
+                 chunk_size: int = 4096):
+        """
+        Initialize the phase detector.
+
+        Args:
+            segmenter: CycleSegmenter with segmented cycles
+            min_phase_length: Minimum number of samples per phase
+            penalty: Fixed penalty per phase change (None uses a per-cycle BIC penalty)
+            penalty_factor: Multiplier of sigma^2 * log(n) for the BIC penalty
+            chunk_size: Number of cycles processed together
+        """
+        self.segmenter = segmenter
+        self.min_phase_length = min_phase_length
+        self.penalty = penalty
+        self.penalty_factor = penalty_factor
+        self.chunk_size = chunk_size
+        self.phase_table = pd.DataFrame()
+
+    def detect_phases(self) -> pd.DataFrame:
+        """
+        Detect phases in every cycle.
+
+        Cycles are sorted by length and processed in chunks, so that cycles
+        in a chunk share a similar padded length.
+
+        Returns:
+            DataFrame with one row per phase: cycle_id, phase, start_time,
+            end_time, n_samples, energy and mean_energy
+        """
+        cycles = self.segmenter.get_cycles()
+        starts = self.segmenter.cycle_starts
+        ends = self.segmenter.cycle_ends
+        if len(cycles) == 0:
+            self.phase_table = pd.DataFrame(columns=['cycle_id', 'phase', 'start_time', 'end_time',
+                                                     'n_samples', 'energy', 'mean_energy'])
+            return self.phase_table
+
+        energy_data = self.segmenter.energy_data
+        values = self.segmenter.get_energy_values()
+        lengths = ends - starts + 1
+
+        phase_cycles, phase_starts, phase_ends = [], [], []
+        order = np.argsort(lengths, kind="stable")
+        for chunk_start in range(0, len(order), self.chunk_size):
+            chunk = order[chunk_start:chunk_start + self.chunk_size]
+            chunk_cycles, chunk_starts, chunk_ends = self._detect_chunk(values, starts[chunk], lengths[chunk])
+            phase_cycles.append(chunk[chunk_cycles])
+            phase_starts.append(chunk_starts)
+            phase_ends.append(chunk_ends)
+
+        phase_cycles = np.concatenate(phase_cycles)
+        phase_starts = np.concatenate(phase_starts)
+        phase_ends = np.concatenate(phase_ends)
+        ordering = np.lexsort((phase_starts, phase_cycles))
+        phase_cycles, phase_starts, phase_ends = phase_cycles[ordering], phase_starts[ordering], phase_ends[ordering]
+
+        # Phase number within each cycle
+        first_phase = np.concatenate(([True], phase_cycles[1:] != phase_cycles[:-1]))
+        group_start = np.maximum.accumulate(np.where(first_phase, np.arange(len(phase_cycles)), 0))
+        phase_numbers = np.arange(len(phase_cycles)) - group_start
+
+        summaries = summarize_runs(values, phase_starts, phase_ends)
+        cycle_ids = np.array([cycle.cycle_id for cycle in cycles], dtype=np.int64)
+
+        self.phase_table = pd.DataFrame({
+            'cycle_id': cycle_ids[phase_cycles],
+            'phase': phase_numbers,
+            'start_time': energy_data.index[phase_starts],
+            'end_time': energy_data.index[phase_ends],
+            'n_samples': phase_ends - phase_starts + 1,
+            'energy': summaries[:, 0],
+            'mean_energy': summaries[:, 2]
+        })
+
+        logger.info(f"Detected {len(self.phase_table)} phases in {len(cycles)} cycles")
+        return self.phase_table
+
+    def _detect_chunk(self, values: np.ndarray, starts: np.ndarray,
+                      lengths: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Run PELT on a chunk of cycles and return (chunk row, start, end) for every phase."""
+        width = int(lengths.max())
+        offsets = np.minimum(np.arange(width)[None, :], (lengths - 1)[:, None])
+        padded = values[starts[:, None] + offsets]
+
+        if self.penalty is None:
+            penalties = self.penalty_factor * _noise_variance(padded, lengths) * np.log(np.maximum(lengths, 2))
+        else:
+            penalties = np.full(len(lengths), float(self.penalty))
+
+        backpointers, _ = pelt_batch(padded, lengths, penalties, self.min_phase_length)
+
+        # Walk the backpointers of all cycles together
+        phase_rows, phase_starts, phase_ends = [], [], []
+        rows = np.arange(len(lengths))
+        position = lengths.copy()
+        while len(rows):
+            previous = backpointers[rows, position]
+            phase_rows.append(rows)
+            phase_starts.append(starts[rows] + previous)
+            phase_ends.append(starts[rows] + position - 1)
+            remaining = previous > 0
+            rows, position = rows[remaining], previous[remaining]
+
+        return np.concatenate(phase_rows), np.concatenate(phase_starts), np.concatenate(phase_ends)
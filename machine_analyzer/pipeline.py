@@ -0,0 +1,278 @@
+"""
+Analysis Pipeline - Load, state detection, segmentation, scoring and reporting on shared arrays.
+"""
+
+import pandas as pd
+import numpy as np
+from typing import Dict, Optional, Union
+import logging
+import time
+from machine_analyzer.cycle_segmenter import find_production_runs, summarize_runs
+from machine_analyzer.machine_data_loader import MachineDataLoader
+from machine_analyzer.quality_analyzer import QualityResult, score_cycles
+from machine_analyzer.report_generator import ReportGenerator
+from machine_analyzer.running_statistics import CycleStatisticsAccumulator
+from machine_analyzer.state_detector import STATE_NAMES, detect_state_codes
+
+logger = logging.getLogger(__name__)
+
+
+class AnalysisPipeline:
+    """
+    Runs the analysis stages on one copy of the data.
+
+    The pipeline keeps the timestamps and energy values as two contiguous
+    arrays and passes arrays and views between the stages instead of
+    DataFrames: states are a uint8 code per row, cycles are row offsets into
+    the energy array and the quality result is columnar. The wall time of
+    each stage is recorded in ``timings``.
+    """
+
+    def __init__(self, energy_column: str = "value", frequency: Optional[str] = None, window_size: int = 20,
+                 production_threshold: float = 5, min_duration: str = "5s", max_duration: str = "300s",
+                 threshold_factor: Optional[dict] = None, cycle_statistics: Optional[Dict] = None,
+                 shard_size: int = 65536, max_gap: Optional[str] = None):
+        """
+        Initialize the pipeline.
+
+        Args:
+            energy_column: Name of the energy consumption column
+            frequency: Optional resampling frequency; when given, the data is
+                resampled and cleaned as by ``MachineDataLoader.preprocess_data``
+            window_size: Rolling window size for state detection
+            production_threshold: Maximum energy threshold for production state
+            min_duration: Minimum duration for a valid cycle
+            max_duration: Maximum duration for a valid cycle
+            threshold_factor: Number of standard deviations per quality check
+            cycle_statistics: Optional baseline cycle statistics; by default
+                the cycles are scored against their own statistics
+            shard_size: Number of rows processed at a time by the rolling
+                median and the cycle summaries, which bounds temporary memory
+            max_gap: Longest allowed interval between raw samples inside a cycle
+                (None disables gap detection); cycles are split at longer gaps
+                as in ``CycleSegmenter``
+        """
+        self.energy_column = energy_column
+        self.frequency = frequency
+        self.window_size = window_size
+        self.production_threshold = production_threshold
+        self.min_duration = min_duration
+        self.max_duration = max_duration
+        self.threshold_factor = threshold_factor
+        self.cycle_statistics = cycle_statistics
+        self.shard_size = shard_size
+        self.max_gap = max_gap
+        self.times = None
+        self.sample_times = None
+        self.values = None
+        self.state_codes = None
+        self.cycle_starts = None
+        self.cycle_ends = None
+        self.cycle_arrays = None
+        self.quality_result = None
+        self.timings = {}
+
+    def run(self, data: Union[str, pd.DataFrame], output_dir: Optional[str] = None, **loader_kwargs) -> QualityResult:
+        """
+        Run all stages.
+
+        Args:
+            data: Path of a data file or a DataFrame with a DatetimeIndex
+            output_dir: Optional report directory; a text report is written when given
+            **loader_kwargs: Arguments for ``MachineDataLoader.load_data``
+
+        Returns:
+            Columnar QualityResult of the detected cycles
+        """
+        self.timings = {}
+        self.load(data, **loader_kwargs)
+        self.detect_states()
+        self.segment_cycles()
+        self.score_quality()
+        if output_dir is not None:
+            self.generate_report(output_dir)
+        logger.info("Pipeline timings: " + ", ".join(f"{stage} {seconds:.3f}s"
+                                                     for stage, seconds in self.timings.items()))
+        return self.quality_result
+
+    def load(self, data: Union[str, pd.DataFrame], **loader_kwargs) -> "AnalysisPipeline":
+        """
+        Load the data into the pipeline's timestamp and energy arrays.
+
+        Args:
+            data: Path of a data file or a DataFrame with a DatetimeIndex
+            **loader_kwargs: Arguments for ``MachineDataLoader.load_data``
+
+        Returns:
+            The pipeline
+        """
+        start = time.perf_counter()
+        if isinstance(data, str):
+            data = MachineDataLoader().load_data(data, energy_column=self.energy_column, **loader_kwargs)
+        if not isinstance(data.index, pd.DatetimeIndex):
+            raise ValueError("DataFrame must have DatetimeIndex")
+        column = data[self.energy_column]
+        if not data.index.is_monotonic_increasing:
+            column = column.sort_index()
+        self.times = column.index.to_numpy().astype("datetime64[ns]")
+        self.values = np.array(column.to_numpy(dtype=np.float64), dtype=np.float64, order="C")
+        del data, column
+
+        self.sample_times = None
+        if self.frequency is not None:
+            self._preprocess()
+        self.state_codes = self.cycle_starts = self.cycle_ends = None
+        self.cycle_arrays = self.quality_result = None
+        self.timings["load"] = time.perf_counter() - start
+        logger.info(f"Pipeline loaded {len(self.values)} records")
+        return self
+
+    def _preprocess(self) -> None:
+        """Resample, then replace negative and missing values by time interpolation, in place."""
+        if self.max_gap is not None:
+            # Gaps are measured between the raw samples, which resampling hides
+            self.sample_times = self.times
+        resampled = pd.Series(self.values, index=pd.DatetimeIndex(self.times), copy=False).resample(
+            self.frequency).mean()
+        self.times = resampled.index.to_numpy().astype("datetime64[ns]")
+        self.values = np.require(resampled.to_numpy(dtype=np.float64), requirements=["C", "W"])
+        del resampled
+
+        values = self.values
+        values[values < 0] = np.nan
+        missing = np.isnan(values)
+        if missing.any() and not missing.all():
+            # Linear in time inside, constant beyond the first and last valid values
+            times = self.times.view(np.int64)
+            values[missing] = np.interp(times[missing], times[~missing], values[~missing])
+
+    def detect_states(self) -> np.ndarray:
+        """
+        Detect the machine state of each row.
+
+        Returns:
+            uint8 array of indices into STATE_NAMES
+        """
+        self._require("values", "load")
+        start = time.perf_counter()
+        self.state_codes = detect_state_codes(self.values, self.window_size, self.production_threshold,
+                                              self.shard_size)
+        self.timings["states"] = time.perf_counter() - start
+        return self.state_codes
+
+    def segment_cycles(self) -> Dict[str, np.ndarray]:
+        """
+        Find the production cycles and summarize them.
+
+        Returns:
+            Cycle arrays as from ``QualityAnalyzer.get_cycle_arrays``
+        """
+        self._require("state_codes", "detect_states")
+        start = time.perf_counter()
+        self.cycle_starts, self.cycle_ends = find_production_runs(
+            self.times, self.state_codes == STATE_NAMES.index("production"), self.min_duration, self.max_duration,
+            self.max_gap, self.sample_times)
+        # Summarize batches of about shard_size rows to bound the temporary per-row arrays
+        rows = np.cumsum(self.cycle_ends - self.cycle_starts + 1)
+        splits = np.searchsorted(rows, np.arange(self.shard_size, rows[-1] if len(rows) else 0, self.shard_size))
+        summaries = np.concatenate([np.empty((0, 4))] + [
+            summarize_runs(self.values, batch_starts, batch_ends)
+            for batch_starts, batch_ends in zip(np.split(self.cycle_starts, splits), np.split(self.cycle_ends, splits))])
+        self.cycle_arrays = {
+            'cycle_id': np.arange(len(self.cycle_starts), dtype=np.int64),
+            'start_time': self.times[self.cycle_starts],
+            'duration': (self.times[self.cycle_ends] - self.times[self.cycle_starts]) / np.timedelta64(1, "s"),
+            'energy': summaries[:, 0],
+            'peak': summaries[:, 1],
+            'variation': summaries[:, 3],
+        }
+        self.timings["segment"] = time.perf_counter() - start
+        logger.info(f"Pipeline detected {len(self.cycle_starts)} production cycles")
+        return self.cycle_arrays
+
+    def score_quality(self) -> QualityResult:
+        """
+        Score the cycles against the baseline statistics, or their own statistics.
+
+        Returns:
+            Columnar QualityResult
+        """
+        self._require("cycle_arrays", "segment_cycles")
+        start = time.perf_counter()
+        arrays = self.cycle_arrays
+        statistics = self.cycle_statistics
+        if statistics is None:
+            statistics = CycleStatisticsAccumulator().update(
+                arrays['duration'], arrays['energy'], arrays['peak'], arrays['variation']).to_dict()
+        self.quality_result = score_cycles(arrays['cycle_id'], arrays['duration'], arrays['energy'],
+                                           arrays['variation'], statistics, self.threshold_factor)
+        self.timings["quality"] = time.perf_counter() - start
+        return self.quality_result
+
+    def generate_report(self, output_dir: str = "reports", **kwargs) -> str:
+        """
+        Write the streaming text report.
+
+        Args:
+            output_dir: Directory to save reports
+            **kwargs: Arguments for ``ReportGenerator.generate_streaming_report``
+
+        Returns:
+            Path to generated report
+        """
+        self._require("quality_result", "score_quality")
+        start = time.perf_counter()
+        report_path = ReportGenerator(output_dir).generate_streaming_report(
+            self.energy_frame(), self.cycle_arrays, self.quality_result, **kwargs)
+        self.timings["report"] = time.perf_counter() - start
+        return report_path
+
+    def energy_frame(self, with_states: bool = False) -> pd.DataFrame:
+        """
+        Wrap the pipeline's arrays in a DataFrame without copying the energy values.
+
+        Args:
+            with_states: Whether to add a categorical "machine_state" column
+
+        Returns:
+            DataFrame indexed by timestamp with the energy column
+        """
+        self._require("values", "load")
+        frame = pd.DataFrame({self.energy_column: self.values}, index=pd.DatetimeIndex(self.times), copy=False)
+        if with_states:
+            self._require("state_codes", "detect_states")
+            frame["machine_state"] = pd.Categorical.from_codes(self.state_codes, STATE_NAMES)
+        return frame
+
+    def state_masks(self) -> Dict[str, np.ndarray]:
+        """
+        Boolean masks of the states, as returned by ``StateDetector.detect_states``.
+
+        Returns:
+            Dictionary with off_state, on_state, standby_state and production_state
+        """
+        self._require("state_codes", "detect_states")
+        off_state = self.state_codes == STATE_NAMES.index("off")
+        return {
+            'off_state': off_state,
+            'on_state': ~off_state,
+            'standby_state': self.state_codes == STATE_NAMES.index("standby"),
+            'production_state': self.state_codes == STATE_NAMES.index("production"),
+        }
+
+    def cycle_view(self, i: int) -> np.ndarray:
+        """
+        Get the energy samples of one cycle without copying.
+
+        Args:
+            i: Position of the cycle
+
+        Returns:
+            NumPy view into the energy array
+        """
+        self._require("cycle_starts", "segment_cycles")
+        return self.values[self.cycle_starts[i]:self.cycle_ends[i] + 1]
+
+    def _require(self, attribute: str, stage: str) -> None:
+        if getattr(self, attribute) is None:
+            raise ValueError(f"Run {stage} first")
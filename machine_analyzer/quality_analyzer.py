@@ -4,10 +4,15 @@ Quality Analyzer - Simple quality assessment for production cycles.
 
 import pandas as pd
 import numpy as np
-from typing import Dict, List
-from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+from dataclasses import dataclass, field
+from enum import IntFlag
 import logging
-from machine_analyzer.cycle_segmenter import ProductionCycle
+from machine_analyzer.cycle_segmenter import CycleSegmenter, ProductionCycle
+from machine_analyzer.recipe_baseline import RecipeBaselineCache
+from machine_analyzer.rolling_baseline import RollingBaseline
+from machine_analyzer.running_statistics import CycleStatisticsAccumulator
+from machine_analyzer.template_deviation import TemplateDeviation
 
 logger = logging.getLogger(__name__)
 
@@ -22,96 +27,460 @@ class QualityMetrics:
     issues: List[str]
 
 
+class QualityIssue(IntFlag):
+    """Bit flags for the quality checks a cycle can fail."""
+    HIGH_VARIATION = 1
+    SHORT_DURATION = 2
+    HIGH_ENERGY = 4
+    TEMPLATE_DEVIATION = 8
+
+
+ISSUE_MESSAGES = {
+    QualityIssue.HIGH_VARIATION: "Variation is too high",
+    QualityIssue.SHORT_DURATION: "Duration is too short",
+    QualityIssue.HIGH_ENERGY: "Energy consumption is too high",
+    QualityIssue.TEMPLATE_DEVIATION: "Deviation from reference template is too high",
+}
+
+QUALITY_GRADES = np.array(["A", "B", "C", "D"])
+GRADE_THRESHOLDS = (0.8, 0.6, 0.4)
+# Checks against the cycle statistics; the template check is added when templates are given
+N_CHECKS = 3
+
+
+@dataclass
+class QualityResult:
+    """
+    Columnar quality analysis result with one entry per cycle.
+    
+    Scores are float32, issues are stored as ``QualityIssue`` bit flags and
+    grades as indices into ``QUALITY_GRADES``. ``summary`` is computed once
+    with counting operations and cached. ``to_metrics`` expands the result
+    into QualityMetrics objects when needed, with the float64 score
+    ``1 - n_issues / n_checks`` of the list-based analysis.
+    """
+    cycle_ids: np.ndarray
+    quality_scores: np.ndarray
+    grade_codes: np.ndarray
+    issue_flags: np.ndarray
+    template_index: Optional[np.ndarray] = None
+    template_deviation: Optional[np.ndarray] = None
+    group_keys: Optional[np.ndarray] = None
+    n_checks: int = N_CHECKS
+    is_anomalous: np.ndarray = field(init=False)
+    _summary: Optional[Dict] = field(default=None, init=False, repr=False, compare=False)
+    
+    def __post_init__(self):
+        self.quality_scores = np.asarray(self.quality_scores, dtype=np.float32)
+        self.grade_codes = np.asarray(self.grade_codes, dtype=np.uint8)
+        self.issue_flags = np.asarray(self.issue_flags, dtype=np.uint8)
+        self.is_anomalous = self.issue_flags != 0
+    
+    def __len__(self) -> int:
+        return len(self.cycle_ids)
+    
+    @property
+    def quality_grades(self) -> pd.Categorical:
+        """Categorical array of grade letters."""
+        return pd.Categorical.from_codes(self.grade_codes, categories=QUALITY_GRADES)
+    
+    def summary(self) -> Dict:
+        """
+        Summarize the result with counting operations; computed once and cached.
+        
+        Returns:
+            Dictionary with total_cycles, anomalous_cycles, anomaly_rate,
+            average_quality_score, quality_grade_distribution (grades that
+            occur, in order of first appearance), issue_counts by message and
+            quality_score_percentiles (5, 25, 50, 75, 95)
+        """
+        if self._summary is None:
+            n_cycles = len(self)
+            grade_counts = np.bincount(self.grade_codes, minlength=len(QUALITY_GRADES))
+            _, first_rows = np.unique(self.grade_codes, return_index=True)
+            grade_order = self.grade_codes[np.sort(first_rows)]
+            bit_counts = np.unpackbits(self.issue_flags[:, None], axis=1, bitorder="little").sum(axis=0)
+            percentiles = (5, 25, 50, 75, 95)
+            # Scores take few distinct values, so percentiles come from counts of each value
+            values, counts = np.unique(self.quality_scores, return_counts=True)
+            if n_cycles:
+                cumulative = np.cumsum(counts)
+                ranks = np.ceil(np.array(percentiles) / 100 * n_cycles).astype(np.int64)
+                score_percentiles = values[np.searchsorted(cumulative, np.maximum(ranks, 1))]
+                average = float(np.dot(values.astype(np.float64), counts) / n_cycles)
+            else:
+                score_percentiles = np.full(len(percentiles), np.nan)
+                average = float("nan")
+            anomalous = int(np.count_nonzero(self.is_anomalous))
+            self._summary = {
+                'total_cycles': n_cycles,
+                'anomalous_cycles': anomalous,
+                'anomaly_rate': anomalous / n_cycles if n_cycles else 0.0,
+                'average_quality_score': average,
+                'quality_grade_distribution': {str(QUALITY_GRADES[code]): int(grade_counts[code])
+                                               for code in grade_order},
+                'issue_counts': {message: int(bit_counts[int(issue).bit_length() - 1])
+                                 for issue, message in ISSUE_MESSAGES.items()},
+                'quality_score_percentiles': {p: float(v) for p, v in zip(percentiles, score_percentiles)},
+            }
+        return self._summary
+    
+    def anomalous_units(self) -> List[int]:
+        """Get the IDs of anomalous cycles."""
+        return self.cycle_ids[self.is_anomalous].tolist()
+    
+    def issues(self, i: int) -> List[str]:
+        """Get the issue messages of the cycle at position i."""
+        flags = int(self.issue_flags[i])
+        return [message for issue, message in ISSUE_MESSAGES.items() if flags & issue]
+    
+    def metric(self, i: int) -> QualityMetrics:
+        """Expand the cycle at position i into a QualityMetrics object."""
+        return QualityMetrics(
+            cycle_id=int(self.cycle_ids[i]),
+            quality_score=1 - bin(int(self.issue_flags[i])).count("1") / self.n_checks,
+            quality_grade=str(QUALITY_GRADES[self.grade_codes[i]]),
+            is_anomalous=bool(self.issue_flags[i]),
+            issues=self.issues(i)
+        )
+    
+    def to_metrics(self) -> List[QualityMetrics]:
+        """
+        Expand the result into QualityMetrics objects.
+        
+        Returns:
+            List of QualityMetrics objects
+        """
+        return [self.metric(i) for i in range(len(self))]
+    
+    def to_dataframe(self) -> pd.DataFrame:
+        """
+        Convert the result to a DataFrame.
+        
+        Returns:
+            DataFrame with cycle_id, quality_score, quality_grade, is_anomalous
+            and issue_flags, plus template_index and template_deviation when
+            cycles were compared with templates, and group when cycles were
+            scored against per-recipe baselines
+        """
+        frame = pd.DataFrame({
+            'cycle_id': self.cycle_ids,
+            'quality_score': self.quality_scores,
+            'quality_grade': self.quality_grades,
+            'is_anomalous': self.is_anomalous,
+            'issue_flags': self.issue_flags
+        })
+        if self.template_index is not None:
+            frame['template_index'] = self.template_index
+            frame['template_deviation'] = self.template_deviation
+        if self.group_keys is not None:
+            frame['group'] = self.group_keys
+        return frame
+
+
+def _stat_limit(cycle_statistics: dict, group: str, factor: float, sign: float) -> Optional[float]:
+    """Return mean + sign * factor * std of a statistics group, or None when unavailable."""
+    stats = cycle_statistics.get(group)
+    if not isinstance(stats, dict) or 'mean' not in stats or 'std' not in stats:
+        return None
+    return stats['mean'] + sign * factor * stats['std']
+
+
+def grade_scores(quality_scores: np.ndarray) -> np.ndarray:
+    """
+    Map quality scores to indices into ``QUALITY_GRADES``.
+    
+    Args:
+        quality_scores: Array of quality scores
+        
+    Returns:
+        Array of uint8 grade codes
+    """
+    return np.searchsorted(-np.asarray(GRADE_THRESHOLDS), -np.asarray(quality_scores), side="left").astype(np.uint8)
+
+
+def score_cycles(cycle_ids: np.ndarray, durations: np.ndarray, energies: np.ndarray,
+                 variations: np.ndarray, cycle_statistics: dict,
+                 threshold_factor: Optional[dict] = None,
+                 baselines: Optional[Dict[str, Tuple[np.ndarray, np.ndarray]]] = None,
+                 template_failures: Optional[np.ndarray] = None) -> QualityResult:
+    """
+    Score all cycles at once against the cycle statistics.
+    
+    A cycle fails a check when its variation or energy consumption is above
+    mean + factor * std, or its duration is below mean - factor * std. Checks
+    whose statistics are missing are skipped. Per-cycle ``baselines`` replace
+    the global statistics of a feature, and cycles with a NaN baseline pass.
+    ``template_failures`` adds the template deviation check as a fourth check.
+    
+    Args:
+        cycle_ids: Cycle IDs
+        durations: Cycle durations in seconds
+        energies: Cycle energy consumptions
+        variations: Cycle variations
+        cycle_statistics: Dictionary of cycle statistics, as from CycleSegmenter
+        threshold_factor: Number of standard deviations per check
+        baselines: Optional per-cycle (means, stds) by feature name
+            ("duration", "energy", "variation"), e.g. from RollingBaseline
+        template_failures: Optional boolean array, True for cycles that
+            deviate too much from their reference template
+        
+    Returns:
+        QualityResult with one entry per cycle
+    """
+    factors = {"variation": 2, "duration": 2, "energy": 2}
+    factors.update(threshold_factor or {})
+    baselines = baselines or {}
+    
+    flags = np.zeros(len(cycle_ids), dtype=np.uint8)
+    checks = [
+        ("variation", variations, 'variation_stats', 1, QualityIssue.HIGH_VARIATION),
+        ("duration", durations, 'duration_stats', -1, QualityIssue.SHORT_DURATION),
+        ("energy", energies, 'energy_stats', 1, QualityIssue.HIGH_ENERGY),
+    ]
+    for feature, values, group, direction, issue in checks:
+        if feature in baselines:
+            means, stds = baselines[feature]
+            limit = np.asarray(means) + direction * factors[feature] * np.asarray(stds)
+        else:
+            limit = _stat_limit(cycle_statistics, group, factors[feature], direction)
+        if limit is None:
+            continue
+        values = np.asarray(values, dtype=np.float64)
+        failed = values > limit if direction > 0 else values < limit
+        flags |= np.where(failed, np.uint8(issue), np.uint8(0))
+    
+    n_checks = N_CHECKS
+    if template_failures is not None:
+        flags |= np.where(template_failures, np.uint8(QualityIssue.TEMPLATE_DEVIATION), np.uint8(0))
+        n_checks += 1
+    
+    issue_counts = np.unpackbits(flags[:, None], axis=1).sum(axis=1)
+    quality_scores = 1 - issue_counts / n_checks
+    
+    return QualityResult(
+        cycle_ids=np.asarray(cycle_ids, dtype=np.int64),
+        quality_scores=quality_scores,
+        grade_codes=grade_scores(quality_scores),
+        issue_flags=flags,
+        n_checks=n_checks
+    )
+
+
 class QualityAnalyzer:
     """
     Simple quality analyzer for production cycles.
     """
     
-    def __init__(self,cycle_statistics: dict,production_cycles: List[ProductionCycle]):
+    def __init__(self,cycle_statistics: dict,production_cycles: List[ProductionCycle],
+                 cycle_shapes: Optional[np.ndarray] = None):
         """
         Initialize the quality analyzer.
         
         Args:
             cycle_statistics: Dictionary containing cycle statistics
             production_cycles: List of production cycles to analyze
+            cycle_shapes: Optional length-normalized cycle profiles of shape
+                (n_cycles, length), needed for template deviation checks
         """
         self.cycle_statistics = cycle_statistics
         self.production_cycles = production_cycles
-        self.quality_metrics = []
+        self.cycle_shapes = cycle_shapes
+        self.quality_result = None
         self.anomalous_units = []
+        self._quality_metrics = []
+        self._cycle_arrays = None
+        self._segmenter = None
+    
+    @classmethod
+    def from_segmenter(cls, segmenter: CycleSegmenter) -> "QualityAnalyzer":
+        """
+        Create an analyzer that reads cycle features as arrays from a segmenter.
+        
+        Args:
+            segmenter: CycleSegmenter with segmented cycles
+            
+        Returns:
+            QualityAnalyzer for the segmenter's cycles and statistics
+        """
+        analyzer = cls(segmenter.get_cycle_statistics(), segmenter.get_cycles())
+        features = segmenter.get_cycle_feature_matrix()
+        analyzer._cycle_arrays = {
+            'cycle_id': np.arange(len(features), dtype=np.int64),
+            'start_time': segmenter.energy_data.index.to_numpy()[segmenter.cycle_starts],
+            'duration': features[:, 0],
+            'energy': features[:, 1],
+            'peak': features[:, 2],
+            'variation': features[:, 3]
+        }
+        analyzer._segmenter = segmenter
+        return analyzer
+    
+    @property
+    def quality_metrics(self) -> List[QualityMetrics]:
+        """QualityMetrics objects, expanded from the columnar result on first access."""
+        if self._quality_metrics is None:
+            self._quality_metrics = self.quality_result.to_metrics()
+        return self._quality_metrics
+    
+    @quality_metrics.setter
+    def quality_metrics(self, quality_metrics: List[QualityMetrics]) -> None:
+        # Assigned metrics replace the columnar result, which no longer describes them
+        self._quality_metrics = quality_metrics
+        self.quality_result = None
+    
+    def get_cycle_arrays(self) -> Dict[str, np.ndarray]:
+        """
+        Get cycle IDs, start times, durations in seconds, energy consumptions, peak energies and variations as arrays.
         
+        Returns:
+            Dictionary with cycle_id, start_time, duration, energy, peak and variation arrays
+        """
+        if self._cycle_arrays is None:
+            cycles = self.production_cycles
+            n_cycles = len(cycles)
+            self._cycle_arrays = {
+                'cycle_id': np.fromiter((cycle.cycle_id for cycle in cycles), dtype=np.int64, count=n_cycles),
+                'start_time': pd.DatetimeIndex([cycle.start_time for cycle in cycles]).to_numpy(),
+                'duration': np.fromiter((cycle.duration.total_seconds() for cycle in cycles),
+                                        dtype=np.float64, count=n_cycles),
+                'energy': np.fromiter((cycle.energy_consumption for cycle in cycles), dtype=np.float64, count=n_cycles),
+                'peak': np.fromiter((cycle.peak_energy for cycle in cycles), dtype=np.float64, count=n_cycles),
+                'variation': np.fromiter((cycle.variation for cycle in cycles), dtype=np.float64, count=n_cycles)
+            }
+        return self._cycle_arrays
     
-    def analyze_quality(self,threshold_factor: dict = {"variation": 2, "duration": 2, "energy": 2}) -> List[QualityMetrics]:
+    def get_cycle_shapes(self, length: int) -> np.ndarray:
         """
-        Analyze quality of all production cycles.
+        Get the length-normalized cycle profiles.
         
+        Args:
+            length: Number of points per profile
+            
         Returns:
-            List of QualityMetrics objects
+            Array of shape (n_cycles, length)
+        """
+        if self.cycle_shapes is None or self.cycle_shapes.shape[1] != length:
+            if self._segmenter is None:
+                if self.cycle_shapes is None:
+                    raise ValueError("Cycle shapes are required for template deviation checks")
+                raise ValueError(f"Cycle shapes have length {self.cycle_shapes.shape[1]}, templates {length}")
+            self.cycle_shapes = self._segmenter.get_cycle_shape_matrix(length=length)
+        return self.cycle_shapes
+    
+    def score_quality(self, threshold_factor: dict = {"variation": 2, "duration": 2, "energy": 2},
+                      baseline: Optional[RollingBaseline] = None,
+                      template_deviation: Optional[TemplateDeviation] = None,
+                      recipe_baselines: Optional[RecipeBaselineCache] = None,
+                      recipes: Optional[np.ndarray] = None) -> Optional[QualityResult]:
         """
-        self.quality_metrics = []
+        Score all production cycles with vectorized checks.
+        
+        Args:
+            threshold_factor: Number of standard deviations per check
+            baseline: Optional RollingBaseline that replaces the global
+                statistics with drift-aware per-cycle baselines (cycles must
+                be in time order)
+            template_deviation: Optional TemplateDeviation that adds a check
+                of each cycle profile against the reference templates. Without
+                explicit limits it uses the "template" threshold factor
+                (default 2).
+            recipe_baselines: Optional RecipeBaselineCache. Each cycle is
+                scored against the cached statistics of its group instead of
+                ``cycle_statistics``; groups missing from the cache use the
+                statistics of their cycles in this batch.
+            recipes: Optional recipe or product key per cycle, used with
+                ``recipe_baselines`` instead of automatic clustering
+            
+        Returns:
+            Columnar QualityResult, or None when there is nothing to analyze
+        """
+        self.quality_result = None
         self.anomalous_units = []
+        self._quality_metrics = []
         
         # Check if cycle statistics are available
-        if not self.cycle_statistics or not self.production_cycles:
+        if (not self.cycle_statistics and recipe_baselines is None) or not self.production_cycles:
             logger.warning("No cycle statistics or production cycles available for quality analysis")
-            return []
+            return None
         
-        for cycle in self.production_cycles:
-            # Get cycle energy data
-            anomaly_count = 0
-            issues = []
-            
-            try:
-                # Check variation
-                if 'variation_stats' in self.cycle_statistics and 'mean' in self.cycle_statistics['variation_stats'] and 'std' in self.cycle_statistics['variation_stats']:
-                    if cycle.variation > self.cycle_statistics["variation_stats"]["mean"] + threshold_factor["variation"] * self.cycle_statistics["variation_stats"]["std"]:
-                        anomaly_count += 1
-                        issues.append("Variation is too high")
-                
-                # Check duration
-                if 'duration_stats' in self.cycle_statistics and 'mean' in self.cycle_statistics['duration_stats'] and 'std' in self.cycle_statistics['duration_stats']:
-                    if cycle.duration.total_seconds() < self.cycle_statistics["duration_stats"]["mean"] - threshold_factor["duration"] * self.cycle_statistics["duration_stats"]["std"]:
-                        anomaly_count += 1
-                        issues.append("Duration is too short")
-                
-                # Check energy consumption
-                if 'energy_stats' in self.cycle_statistics and 'mean' in self.cycle_statistics['energy_stats'] and 'std' in self.cycle_statistics['energy_stats']:
-                    if cycle.energy_consumption > self.cycle_statistics["energy_stats"]["mean"] + threshold_factor["energy"] * self.cycle_statistics["energy_stats"]["std"]:
-                        anomaly_count += 1
-                        issues.append("Energy consumption is too high")
-                        
-            except Exception as e:
-                logger.error(f"Error analyzing cycle {cycle.cycle_id}: {e}")
-                logger.error(f"Cycle statistics: {self.cycle_statistics}")
-                continue
-            
-            quality_score = 1 - anomaly_count / 3
-
-            quality_grade = "A"
-            if quality_score >= 0.8:
-                quality_grade = "A"
-            elif quality_score >= 0.6:
-                quality_grade = "B"
-            elif quality_score >= 0.4:
-                quality_grade = "C"
-            else:
-                quality_grade = "D"
-            
-            quality_metrics = QualityMetrics(
-                cycle_id=cycle.cycle_id,
-                quality_score=quality_score,
-                quality_grade=quality_grade,
-                is_anomalous=anomaly_count > 0,
-                issues=issues
-            )
-
-            self.quality_metrics.append(quality_metrics)
-            if anomaly_count > 0:
-                self.anomalous_units.append(cycle.cycle_id) 
-            
-        logger.info(f"Quality analysis completed: {len(self.quality_metrics)} cycles analyzed")
+        arrays = self.get_cycle_arrays()
+        baselines = None
+        if baseline is not None:
+            features = ("duration", "energy", "variation")
+            means, stds = baseline.compute(np.column_stack([arrays[feature] for feature in features]),
+                                           arrays['start_time'])
+            baselines = {feature: (means[:, i], stds[:, i]) for i, feature in enumerate(features)}
+        template_failures = template_index = deviations = None
+        if template_deviation is not None:
+            shapes = self.get_cycle_shapes(template_deviation.length)
+            template_failures, template_index, deviations = template_deviation.check(
+                shapes, threshold_factor.get("template", 2))
+        if recipe_baselines is None:
+            self.quality_result = score_cycles(arrays['cycle_id'], arrays['duration'], arrays['energy'],
+                                               arrays['variation'], self.cycle_statistics, threshold_factor,
+                                               baselines, template_failures)
+        else:
+            keys = recipe_baselines.group_keys(arrays['duration'], arrays['energy'], recipes)
+            self.quality_result = self._score_groups(arrays, keys, recipe_baselines, threshold_factor,
+                                                     baselines, template_failures)
+        self.quality_result.template_index = template_index
+        self.quality_result.template_deviation = deviations
+        self.anomalous_units = self.quality_result.anomalous_units()
+        self._quality_metrics = None
+        
+        logger.info(f"Quality analysis completed: {len(self.quality_result)} cycles analyzed")
         logger.info(f"Anomalous units detected: {len(self.anomalous_units)}")
         
+        return self.quality_result
+    
+    def _score_groups(self, arrays: Dict[str, np.ndarray], keys: np.ndarray,
+                      recipe_baselines: RecipeBaselineCache, threshold_factor: dict,
+                      baselines: Optional[Dict[str, Tuple[np.ndarray, np.ndarray]]],
+                      template_failures: Optional[np.ndarray]) -> QualityResult:
+        """Score the cycles of each group against the group's baseline statistics."""
+        n_cycles = len(keys)
+        quality_scores = np.ones(n_cycles, dtype=np.float32)
+        grade_codes = np.zeros(n_cycles, dtype=np.uint8)
+        issue_flags = np.zeros(n_cycles, dtype=np.uint8)
+        for key in np.unique(keys):
+            rows = np.flatnonzero(keys == key)
+            statistics = recipe_baselines.get_statistics(key)
+            if not statistics:
+                logger.warning(f"No cached baseline for group {key}, using the statistics of this batch")
+                statistics = CycleStatisticsAccumulator().update(
+                    *(arrays[feature][rows] for feature in ('duration', 'energy', 'peak', 'variation'))).to_dict()
+            group_baselines = None
+            if baselines is not None:
+                group_baselines = {feature: (means[rows], stds[rows]) for feature, (means, stds) in baselines.items()}
+            group_result = score_cycles(arrays['cycle_id'][rows], arrays['duration'][rows], arrays['energy'][rows],
+                                        arrays['variation'][rows], statistics, threshold_factor, group_baselines,
+                                        None if template_failures is None else template_failures[rows])
+            quality_scores[rows] = group_result.quality_scores
+            grade_codes[rows] = group_result.grade_codes
+            issue_flags[rows] = group_result.issue_flags
+        return QualityResult(np.asarray(arrays['cycle_id'], dtype=np.int64), quality_scores, grade_codes,
+                             issue_flags, group_keys=keys, n_checks=N_CHECKS + (template_failures is not None))
+    
+    def analyze_quality(self,threshold_factor: dict = {"variation": 2, "duration": 2, "energy": 2},
+                        baseline: Optional[RollingBaseline] = None,
+                        template_deviation: Optional[TemplateDeviation] = None,
+                        recipe_baselines: Optional[RecipeBaselineCache] = None,
+                        recipes: Optional[np.ndarray] = None) -> List[QualityMetrics]:
+        """
+        Analyze quality of all production cycles.
+        
+        Args:
+            threshold_factor: Number of standard deviations per check
+            baseline: Optional RollingBaseline for drift-aware thresholds
+            template_deviation: Optional TemplateDeviation for reference template checks
+            recipe_baselines: Optional RecipeBaselineCache with per-group statistics
+            recipes: Optional recipe or product key per cycle
+        
+        Returns:
+            List of QualityMetrics objects
+        """
+        self.score_quality(threshold_factor, baseline, template_deviation, recipe_baselines, recipes)
         return self.quality_metrics
     
     def get_quality_summary(self) -> Dict:
@@ -119,23 +488,21 @@ class QualityAnalyzer:
         Get simple summary of quality analysis.
         
         Returns:
-            Dictionary with quality summary
+            Dictionary with quality summary, as from ``QualityResult.summary``
         """
-        if not self.quality_metrics:
+        if self.quality_result is not None:
+            return self.quality_result.summary() if len(self.quality_result) else {}
+        if not self._quality_metrics:
             return {}
         
-        
-        quality_scores = [metric.quality_score for metric in self.quality_metrics]
-        
-        # Count grades
+        # Metrics assigned directly, without a columnar result
         grade_counts = {}
-        for metric in self.quality_metrics:
+        for metric in self._quality_metrics:
             grade_counts[metric.quality_grade] = grade_counts.get(metric.quality_grade, 0) + 1
-        
         return {
-            'total_cycles': len(self.quality_metrics),
+            'total_cycles': len(self._quality_metrics),
             'anomalous_cycles': len(self.anomalous_units),
-            'average_quality_score': np.mean(quality_scores),
+            'average_quality_score': float(np.mean([metric.quality_score for metric in self._quality_metrics])),
             'quality_grade_distribution': grade_counts,
         }
     
@@ -0,0 +1,234 @@
+"""
+Recipe Baseline - Cached cycle statistics per recipe or product group.
+"""
+
+import numpy as np
+from typing import Dict, List, Optional
+import logging
+from machine_analyzer.running_statistics import CycleStatisticsAccumulator
+
+logger = logging.getLogger(__name__)
+
+
+class RecipeBaselineCache:
+    """
+    Cycle statistics cached per recipe, product or cluster of cycles.
+
+    Cycles are grouped by a recipe key given by the caller or, when
+    ``n_clusters`` is set and no keys are given, by k-means clustering on
+    standardized duration and energy consumption. Each group keeps a
+    mergeable CycleStatisticsAccumulator, so new batches are added without
+    recomputing over the history. The cache is saved to and loaded from a
+    ``.npz`` file.
+    """
+
+    def __init__(self, n_clusters: Optional[int] = None, sketch_capacity: int = 4096,
+                 seed: int = 0, max_iter: int = 100):
+        """
+        Initialize the cache.
+
+        Args:
+            n_clusters: Number of automatic clusters, or None to require recipe keys
+            sketch_capacity: Capacity of the median sketches of each group
+            seed: Seed for the k-means initialization
+            max_iter: Maximum number of k-means iterations
+        """
+        if n_clusters is not None and n_clusters < 1:
+            raise ValueError("n_clusters must be a positive integer")
+        self.n_clusters = n_clusters
+        self.sketch_capacity = sketch_capacity
+        self.seed = seed
+        self.max_iter = max_iter
+
+        self.groups: Dict[str, CycleStatisticsAccumulator] = {}
+        self.centroids = None
+        self._center = None
+        self._scale = None
+
+    @property
+    def keys(self) -> List[str]:
+        """Keys of the cached groups."""
+        return list(self.groups)
+
+    def fit_clusters(self, durations: np.ndarray, energies: np.ndarray) -> np.ndarray:
+        """
+        Fit k-means clusters on duration and energy consumption.
+
+        Args:
+            durations: Cycle durations in seconds
+            energies: Cycle energy consumptions
+
+        Returns:
+            Array of cluster keys, one per cycle
+        """
+        if self.n_clusters is None:
+            raise ValueError("n_clusters is required for automatic grouping")
+        points = np.column_stack([durations, energies]).astype(np.float64)
+        if len(points) < self.n_clusters:
+            raise ValueError(f"At least {self.n_clusters} cycles are required to fit {self.n_clusters} clusters")
+
+        self._center = points.mean(axis=0)
+        scale = points.std(axis=0)
+        self._scale = np.where(scale > 0, scale, 1.0)
+        points = (points - self._center) / self._scale
+
+        # k-means++ initialization
+        rng = np.random.default_rng(self.seed)
+        centroids = points[[rng.integers(len(points))]]
+        for _ in range(1, self.n_clusters):
+            distances = ((points[:, None, :] - centroids[None]) ** 2).sum(axis=2).min(axis=1)
+            total = distances.sum()
+            index = rng.choice(len(points), p=distances / total) if total > 0 else rng.integers(len(points))
+            centroids = np.vstack([centroids, points[index]])
+
+        for _ in range(self.max_iter):
+            labels = ((points[:, None, :] - centroids[None]) ** 2).sum(axis=2).argmin(axis=1)
+            counts = np.bincount(labels, minlength=self.n_clusters)
+            sums = np.zeros_like(centroids)
+            np.add.at(sums, labels, points)
+            new_centroids = np.where(counts[:, None] > 0, sums / np.maximum(counts, 1)[:, None], centroids)
+            if np.allclose(new_centroids, centroids):
+                break
+            centroids = new_centroids
+
+        # Order clusters by duration, then energy, so keys do not depend on the initialization
+        order = np.lexsort((centroids[:, 1], centroids[:, 0]))
+        self.centroids = centroids[order]
+        logger.info(f"Fitted {self.n_clusters} cycle clusters on {len(points)} cycles")
+        return self.assign(durations, energies)
+
+    def assign(self, durations: np.ndarray, energies: np.ndarray) -> np.ndarray:
+        """
+        Assign cycles to the nearest fitted cluster.
+
+        Args:
+            durations: Cycle durations in seconds
+            energies: Cycle energy consumptions
+
+        Returns:
+            Array of cluster keys ("cluster_0", "cluster_1", ...)
+        """
+        if self.centroids is None:
+            raise ValueError("Clusters must be fitted before cycles can be assigned")
+        points = (np.column_stack([durations, energies]).astype(np.float64) - self._center) / self._scale
+        labels = ((points[:, None, :] - self.centroids[None]) ** 2).sum(axis=2).argmin(axis=1)
+        return np.char.add("cluster_", labels.astype(str))
+
+    def group_keys(self, durations: np.ndarray, energies: np.ndarray,
+                   recipes: Optional[np.ndarray] = None) -> np.ndarray:
+        """
+        Get the group key of every cycle.
+
+        Args:
+            durations: Cycle durations in seconds
+            energies: Cycle energy consumptions
+            recipes: Optional recipe or product key per cycle
+
+        Returns:
+            Array of string keys
+        """
+        if recipes is not None:
+            recipes = np.asarray(recipes).astype(str)
+            if len(recipes) != len(durations):
+                raise ValueError(f"Expected {len(durations)} recipe keys, got {len(recipes)}")
+            return recipes
+        if self.n_clusters is None:
+            raise ValueError("Recipe keys are required when n_clusters is not set")
+        if self.centroids is None:
+            return self.fit_clusters(durations, energies)
+        return self.assign(durations, energies)
+
+    def update(self, keys: np.ndarray, durations: np.ndarray, energies: np.ndarray, peaks: np.ndarray,
+               variations: np.ndarray) -> "RecipeBaselineCache":
+        """
+        Add a batch of cycles to the statistics of their groups.
+
+        Args:
+            keys: Group key per cycle
+            durations: Cycle durations in seconds
+            energies: Cycle energy consumptions
+            peaks: Cycle peak energies
+            variations: Cycle variations
+
+        Returns:
+            The updated cache
+        """
+        keys = np.asarray(keys).astype(str)
+        for key in np.unique(keys):
+            rows = keys == key
+            if key not in self.groups:
+                self.groups[key] = CycleStatisticsAccumulator(self.sketch_capacity)
+            self.groups[key].update(durations[rows], energies[rows], peaks[rows], variations[rows])
+        return self
+
+    def learn(self, cycle_arrays: Dict[str, np.ndarray], recipes: Optional[np.ndarray] = None) -> np.ndarray:
+        """
+        Group a batch of cycles and add it to the cache.
+
+        Args:
+            cycle_arrays: Cycle arrays as from ``QualityAnalyzer.get_cycle_arrays``
+            recipes: Optional recipe or product key per cycle
+
+        Returns:
+            Array of group keys, one per cycle
+        """
+        keys = self.group_keys(cycle_arrays['duration'], cycle_arrays['energy'], recipes)
+        self.update(keys, cycle_arrays['duration'], cycle_arrays['energy'], cycle_arrays['peak'],
+                    cycle_arrays['variation'])
+        return keys
+
+    def get_statistics(self, key: str) -> Dict:
+        """
+        Get the ``cycle_statistics`` dictionary of a group.
+
+        Args:
+            key: Group key
+
+        Returns:
+            Dictionary with cycle statistics, empty for unknown groups
+        """
+        accumulator = self.groups.get(str(key))
+        return accumulator.to_dict() if accumulator is not None else {}
+
+    def save(self, path: str) -> None:
+        """
+        Save the cache to a ``.npz`` file.
+
+        Args:
+            path: Output file path
+        """
+        state = {
+            "keys": np.array(self.keys, dtype=str),
+            "params": np.array([-1 if self.n_clusters is None else self.n_clusters, self.sketch_capacity,
+                                self.seed, self.max_iter], dtype=np.int64),
+        }
+        if self.centroids is not None:
+            state.update(centroids=self.centroids, center=self._center, scale=self._scale)
+        for i, accumulator in enumerate(self.groups.values()):
+            state.update({f"group_{i}_{key}": value for key, value in accumulator.get_state().items()})
+        with open(path, "wb") as f:
+            np.savez(f, **state)
+        logger.info(f"Saved baselines of {len(self.groups)} groups to {path}")
+
+    @classmethod
+    def load(cls, path: str) -> "RecipeBaselineCache":
+        """
+        Load a cache saved with ``save``.
+
+        Args:
+            path: Path of the ``.npz`` file
+
+        Returns:
+            RecipeBaselineCache with the saved groups and clusters
+        """
+        with np.load(path, allow_pickle=False) as data:
+            state = {key: data[key] for key in data.files}
+        n_clusters, sketch_capacity, seed, max_iter = (int(value) for value in state["params"])
+        cache = cls(None if n_clusters < 0 else n_clusters, sketch_capacity, seed, max_iter)
+        if "centroids" in state:
+            cache.centroids, cache._center, cache._scale = state["centroids"], state["center"], state["scale"]
+        for i, key in enumerate(state["keys"].tolist()):
+            prefix = f"group_{i}_"
+            cache.groups[key] = CycleStatisticsAccumulator.from_state(
+                {name[len(prefix):]: value for name, value in state.items() if name.startswith(prefix)})
+        return cache
@@ -4,27 +4,51 @@ Report Generator - Simple report generation for machine energy analysis.
 
 import pandas as pd
 import numpy as np
-from typing import Dict, List
+from typing import Dict, List, Optional, Sequence, TextIO, Union
 from datetime import datetime
+import html
+import io
 import logging
 import os
+from machine_analyzer.downsampling import lttb_indices, minmax_indices
+from machine_analyzer.fleet_summary import FleetSummary, MachineResult
+from machine_analyzer.quality_analyzer import ISSUE_MESSAGES, QUALITY_GRADES, QualityResult
+from machine_analyzer.report_summary import ReportSummary
+from machine_analyzer.rollup_store import RollupStore
 
 logger = logging.getLogger(__name__)
 
+# Background colors of the machine states and colors of the cycle band in HTML charts
+STATE_COLORS = {"off": "#e0e0e0", "on": "#c6dbef", "standby": "#fdd49e", "production": "#c7e9c0"}
+CYCLE_COLORS = {1: "#4a7ebb", 2: "#d62728"}
+
+
+def _import_pyarrow():
+    """Import pyarrow, which is only needed for Parquet and Arrow output."""
+    try:
+        import pyarrow
+    except ImportError as e:
+        raise ImportError("Parquet and Arrow reports require pyarrow: pip install machine-analyzer[arrow]") from e
+    return pyarrow
+
 
 class ReportGenerator:
     """
     Simple report generator for machine energy analysis.
     """
     
-    def __init__(self, output_dir: str = "reports"):
+    def __init__(self, output_dir: str = "reports", rollup_path: Optional[str] = None):
         """
         Initialize the report generator.
         
         Args:
             output_dir: Directory to save reports
+            rollup_path: SQLite file of the rollup store, by default
+                "rollups.sqlite" in the output directory
         """
         self.output_dir = output_dir
+        self.rollup_path = rollup_path or os.path.join(output_dir, "rollups.sqlite")
+        self._rollup_store = None
         
         # Create output directory if it doesn't exist
         if not os.path.exists(output_dir):
@@ -33,29 +57,28 @@ class ReportGenerator:
     def generate_simple_report(self, 
                              energy_data: pd.DataFrame,
                              production_cycles: List,
-                             quality_metrics: List,
-                             anomalous_units: List[int]) -> str:
+                             quality_metrics: Union[List, QualityResult],
+                             anomalous_units: List[int],
+                             summary: Optional[ReportSummary] = None) -> str:
         """
         Generate a simple analysis report.
         
         Args:
             energy_data: Processed energy data
             production_cycles: List of production cycles
-            quality_metrics: List of quality metrics
-            production_counts: Production counts by time period
+            quality_metrics: List of quality metrics or a QualityResult
             anomalous_units: List of anomalous unit IDs
+            summary: Optional ReportSummary of these inputs from ``summarize``
             
         Returns:
             Path to generated report
         """
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        report_filename = f"machine_analysis_report_{timestamp}.txt"
-        report_path = os.path.join(self.output_dir, report_filename)
+        report_path = self._reserve_path("machine_analysis_report", "txt")
         
         # Generate simple text report
         report_content = self._create_simple_report(
             energy_data, production_cycles, quality_metrics, 
-            anomalous_units
+            anomalous_units, summary
         )
         
         # Save report
@@ -65,191 +88,646 @@ class ReportGenerator:
         logger.info(f"Generated simple report: {report_path}")
         return report_path
     
-    def _create_simple_report(self, energy_data: pd.DataFrame, production_cycles: List,
-                            quality_metrics: List,
-                            anomalous_units: List[int]) -> str:
-        """Create simple text report content."""
+    def __getstate__(self) -> Dict:
+        # Worker processes get the settings only; caches and the database connection stay here
+        state = self.__dict__.copy()
+        state['_rollup_store'] = None
+        return state
+    
+    def _reserve_path(self, prefix: str, extension: str = "", directory: bool = False) -> str:
+        """
+        Create a new timestamped report file or directory and return its path.
+        
+        The file is created exclusively, with a numeric suffix when the name
+        is taken, so reports written concurrently never overwrite each other.
+        """
+        base = os.path.join(self.output_dir, f"{prefix}_{datetime.now().strftime('%Y%m%d_%H%M%S')}")
+        suffix = f".{extension}" if extension else ""
+        attempt = 0
+        while True:
+            path = f"{base}_{attempt}{suffix}" if attempt else f"{base}{suffix}"
+            try:
+                if directory:
+                    os.mkdir(path)
+                else:
+                    os.close(os.open(path, os.O_CREAT | os.O_EXCL | os.O_WRONLY))
+                return path
+            except FileExistsError:
+                attempt += 1
+    
+    def summarize(self, energy_data: pd.DataFrame, production_cycles: Union[List, Dict[str, np.ndarray]],
+                  quality_metrics: Optional[Union[List, QualityResult]] = None,
+                  anomalous_units: Optional[List[int]] = None) -> ReportSummary:
+        """
+        Get the shared aggregates of an analysis.
+        
+        Pass the summary to several report methods, or use
+        ``generate_all_reports``, to aggregate the data only once. Nothing is
+        cached between calls, so a report generated after the inputs changed
+        always reflects the changes.
         
-        report_lines = []
-        report_lines.append("=" * 50)
-        report_lines.append("MACHINE ENERGY ANALYSIS REPORT")
-        report_lines.append("=" * 50)
-        report_lines.append(f"Generated on: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
-        report_lines.append("")
-        
-        # Executive Summary
-        report_lines.append("EXECUTIVE SUMMARY")
-        report_lines.append("-" * 20)
-        total_cycles = len(production_cycles)
-        anomalous_count = len(anomalous_units)
-        
-        # Calculate average quality score
-        avg_quality = 0
-        if quality_metrics:
-            avg_quality = np.mean([metric.quality_score for metric in quality_metrics])
-        
-        report_lines.append(f"Total Production Cycles: {total_cycles}")
-        report_lines.append(f"Anomalous Units: {anomalous_count}")
-        report_lines.append(f"Average Quality Score: {avg_quality:.2f}")
-        report_lines.append("")
-        
-        # Production Analysis
-        report_lines.append("PRODUCTION ANALYSIS")
-        report_lines.append("-" * 20)
-        if production_cycles:
-            durations = [cycle.duration.total_seconds() for cycle in production_cycles]
-            energy_consumptions = [cycle.energy_consumption for cycle in production_cycles]
+        Args:
+            energy_data: Processed energy data
+            production_cycles: List of production cycles or cycle arrays
+            quality_metrics: List of quality metrics or a QualityResult
+            anomalous_units: List of anomalous unit IDs
             
-            avg_duration = np.mean(durations)
-            avg_energy = np.mean(energy_consumptions)
-            total_energy = np.sum(energy_consumptions)
+        Returns:
+            ReportSummary of the inputs
+        """
+        return ReportSummary(energy_data, production_cycles, quality_metrics, anomalous_units)
+    
+    def generate_all_reports(self, energy_data: pd.DataFrame, production_cycles: Union[List, Dict[str, np.ndarray]],
+                             quality_metrics: Optional[Union[List, QualityResult]] = None,
+                             anomalous_units: Optional[List[int]] = None,
+                             formats: Sequence[str] = ("simple", "csv", "html")) -> Dict[str, str]:
+        """
+        Generate several report formats from one summary of the inputs.
+        
+        Args:
+            energy_data: Processed energy data
+            production_cycles: List of production cycles or cycle arrays
+            quality_metrics: List of quality metrics or a QualityResult
+            anomalous_units: List of anomalous unit IDs
+            formats: Report formats: "simple", "csv" and/or "html"
             
-            report_lines.append(f"Average Cycle Duration: {avg_duration:.1f} seconds")
-            report_lines.append(f"Average Energy per Cycle: {avg_energy:.1f}")
-            report_lines.append(f"Total Energy Consumed: {total_energy:.1f}")
-            report_lines.append("")
-        
-        # Quality Assessment
-        report_lines.append("QUALITY ASSESSMENT")
-        report_lines.append("-" * 20)
-        if quality_metrics:
-            # Count grades
-            grade_counts = {}
-            for metric in quality_metrics:
-                grade_counts[metric.quality_grade] = grade_counts.get(metric.quality_grade, 0) + 1
+        Returns:
+            Dictionary of report paths by format
+        """
+        unknown = set(formats) - {"simple", "csv", "html"}
+        if unknown:
+            raise ValueError(f"Unknown report formats: {sorted(unknown)}")
+        summary = self.summarize(energy_data, production_cycles, quality_metrics, anomalous_units)
+        paths = {}
+        if "simple" in formats:
+            paths["simple"] = self.generate_simple_report(energy_data, production_cycles, quality_metrics,
+                                                          anomalous_units, summary=summary)
+        if "csv" in formats:
+            paths["csv"] = self.generate_csv_report(production_cycles, quality_metrics, summary=summary)
+        if "html" in formats:
+            paths["html"] = self.generate_html_report(energy_data, production_cycles, quality_metrics,
+                                                      anomalous_units, summary=summary)
+        return paths
+    
+    def _create_simple_report(self, energy_data: pd.DataFrame, production_cycles: List,
+                            quality_metrics: Union[List, QualityResult],
+                            anomalous_units: List[int], summary: Optional[ReportSummary] = None) -> str:
+        """Create simple text report content."""
+        buffer = io.StringIO()
+        self._write_sections(buffer, summary or self.summarize(energy_data, production_cycles, quality_metrics,
+                                                               anomalous_units))
+        return buffer.getvalue()
+    
+    def generate_streaming_report(self, energy_data: pd.DataFrame, cycle_arrays: Dict[str, np.ndarray],
+                                  quality_result: Optional[QualityResult] = None,
+                                  max_listed_anomalies: int = 100, ids_per_line: int = 10) -> str:
+        """
+        Generate the text report by writing each section straight to the file.
+        
+        All aggregates come from one pass over columnar inputs, and only the
+        first ``max_listed_anomalies`` anomalous cycle IDs are listed, so
+        memory does not grow with the number of cycles.
+        
+        Args:
+            energy_data: Processed energy data
+            cycle_arrays: Cycle arrays as from ``QualityAnalyzer.get_cycle_arrays``
+            quality_result: Optional columnar QualityResult of the cycles
+            max_listed_anomalies: Maximum number of anomalous cycle IDs listed
+            ids_per_line: Number of cycle IDs per line in the anomaly list
             
-            report_lines.append("Quality Grade Distribution:")
-            for grade, count in grade_counts.items():
-                report_lines.append(f"  Grade {grade}: {count} cycles")
-            report_lines.append("")
-        
-        # Anomalous Units
-        if anomalous_units:
-            report_lines.append("ANOMALOUS UNITS")
-            report_lines.append("-" * 20)
-            report_lines.append(f"Found {len(anomalous_units)} anomalous units:")
-            for unit_id in anomalous_units:
-                report_lines.append(f"  Cycle ID: {unit_id}")
-            report_lines.append("")
-        
-        # Energy Statistics
-        report_lines.append("ENERGY STATISTICS")
-        report_lines.append("-" * 20)
-        if not energy_data.empty:
-            energy_series = energy_data.iloc[:, 0]
-            report_lines.append(f"Total Energy: {energy_series.sum():.1f}")
-            report_lines.append(f"Average Energy: {energy_series.mean():.1f}")
-            report_lines.append(f"Peak Energy: {energy_series.max():.1f}")
-            report_lines.append(f"Minimum Energy: {energy_series.min():.1f}")
-            report_lines.append("")
-        
-        # Recommendations
-        report_lines.append("RECOMMENDATIONS")
-        report_lines.append("-" * 20)
-        recommendations = []
+        Returns:
+            Path to generated report
+        """
+        report_path = self._reserve_path("machine_analysis_report", "txt")
+        
+        with open(report_path, 'w', encoding='utf-8') as f:
+            self.write_report(f, energy_data, cycle_arrays, quality_result, max_listed_anomalies, ids_per_line)
+        
+        logger.info(f"Generated streaming report: {report_path}")
+        return report_path
+    
+    def write_report(self, f: TextIO, energy_data: pd.DataFrame, cycle_arrays: Dict[str, np.ndarray],
+                     quality_result: Optional[QualityResult] = None,
+                     max_listed_anomalies: int = 100, ids_per_line: int = 10) -> None:
+        """
+        Write the text report section by section to an open file handle.
+        
+        Args:
+            f: Text file handle to write to
+            energy_data: Processed energy data
+            cycle_arrays: Cycle arrays as from ``QualityAnalyzer.get_cycle_arrays``
+            quality_result: Optional columnar QualityResult of the cycles
+            max_listed_anomalies: Maximum number of anomalous cycle IDs listed
+            ids_per_line: Number of cycle IDs per line in the anomaly list
+        """
+        self._write_sections(f, self.summarize(energy_data, cycle_arrays, quality_result),
+                             max_listed_anomalies, ids_per_line)
+    
+    def _write_sections(self, f: TextIO, summary: ReportSummary, max_listed_anomalies: Optional[int] = None,
+                        ids_per_line: int = 10) -> None:
+        """Write the text report sections from a summary; without a limit every anomalous ID gets its own line."""
+        statistics = summary.statistics
+        production = statistics['production']
+        quality_summary = statistics['quality']
+        total_cycles = production['total_cycles']
+        anomalous_count = summary.anomalous_count
+        avg_quality = quality_summary.get('average_quality_score', 0)
+        
+        def section(title: str) -> None:
+            f.write(f"{title}\n{'-' * 20}\n")
+        
+        f.write(f"{'=' * 50}\nMACHINE ENERGY ANALYSIS REPORT\n{'=' * 50}\n")
+        f.write(f"Generated on: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n\n")
+        
+        section("EXECUTIVE SUMMARY")
+        f.write(f"Total Production Cycles: {total_cycles}\n")
+        f.write(f"Anomalous Units: {anomalous_count}\n")
+        f.write(f"Average Quality Score: {avg_quality:.2f}\n\n")
+        
+        section("PRODUCTION ANALYSIS")
+        if total_cycles:
+            f.write(f"Average Cycle Duration: {production['average_duration']:.1f} seconds\n")
+            f.write(f"Average Energy per Cycle: {production['average_cycle_energy']:.1f}\n")
+            f.write(f"Total Energy Consumed: {production['total_cycle_energy']:.1f}\n\n")
+        
+        section("QUALITY ASSESSMENT")
+        if quality_summary:
+            f.write("Quality Grade Distribution:\n")
+            for grade, count in quality_summary['quality_grade_distribution'].items():
+                f.write(f"  Grade {grade}: {count} cycles\n")
+            f.write("\n")
         
-        if anomalous_units:
-            anomalous_rate = len(anomalous_units) / len(production_cycles) if production_cycles else 0
+        if anomalous_count:
+            section("ANOMALOUS UNITS")
+            f.write(f"Found {anomalous_count} anomalous units:\n")
+            if max_listed_anomalies is None:
+                for unit_id in summary.anomalous_units:
+                    f.write(f"  Cycle ID: {unit_id}\n")
+            else:
+                listed = summary.anomalous_units[:max_listed_anomalies]
+                for start in range(0, len(listed), ids_per_line):
+                    f.write("  Cycle IDs: " + ", ".join(str(unit_id) for unit_id in listed[start:start + ids_per_line]))
+                    f.write("\n")
+                if anomalous_count > len(listed):
+                    f.write(f"  ... and {anomalous_count - len(listed)} more (see the CSV report)\n")
+            f.write("\n")
+        
+        section("ENERGY STATISTICS")
+        energy = statistics['energy_statistics']
+        if energy is not None:
+            f.write(f"Total Energy: {energy['total_energy']:.1f}\n")
+            f.write(f"Average Energy: {energy['average_energy']:.1f}\n")
+            f.write(f"Peak Energy: {energy['peak_energy']:.1f}\n")
+            f.write(f"Minimum Energy: {energy['minimum_energy']:.1f}\n\n")
+        
+        section("RECOMMENDATIONS")
+        recommendations = []
+        if anomalous_count:
+            anomalous_rate = anomalous_count / total_cycles if total_cycles else 0
             if anomalous_rate > 0.1:
                 recommendations.append("High anomalous unit rate detected. Investigate root causes.")
             else:
                 recommendations.append("Some anomalous units detected. Monitor production process.")
-        
-        if quality_metrics:
-            avg_quality = np.mean([metric.quality_score for metric in quality_metrics])
-            if avg_quality < 0.7:
-                recommendations.append("Low average quality score. Review production process.")
-        
+        if quality_summary and avg_quality < 0.7:
+            recommendations.append("Low average quality score. Review production process.")
         if not recommendations:
             recommendations.append("No significant issues detected. Continue monitoring.")
-        
         for i, rec in enumerate(recommendations, 1):
-            report_lines.append(f"{i}. {rec}")
+            f.write(f"{i}. {rec}\n")
         
-        report_lines.append("")
-        report_lines.append("=" * 50)
-        report_lines.append("END OF REPORT")
-        report_lines.append("=" * 50)
-        
-        return "\n".join(report_lines)
+        f.write(f"\n{'=' * 50}\nEND OF REPORT\n{'=' * 50}")
     
-    def generate_csv_report(self, production_cycles: List, quality_metrics: List) -> str:
+    def generate_csv_report(self, production_cycles: List, quality_metrics: Union[List, QualityResult],
+                            summary: Optional[ReportSummary] = None) -> str:
         """
         Generate CSV report with cycle and quality data.
         
         Args:
-            production_cycles: List of production cycles
-            quality_metrics: List of quality metrics
+            production_cycles: List of production cycles or cycle arrays
+            quality_metrics: List of quality metrics or a QualityResult
+            summary: Optional ReportSummary of these inputs from ``summarize``
             
         Returns:
             Path to generated CSV report
         """
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        csv_filename = f"cycle_quality_report_{timestamp}.csv"
-        csv_path = os.path.join(self.output_dir, csv_filename)
+        csv_path = self._reserve_path("cycle_quality_report", "csv")
         
-        # Combine cycle data with quality metrics
-        report_data = []
-        for i, cycle in enumerate(production_cycles):
-            quality_metric = quality_metrics[i] if i < len(quality_metrics) else None
-            
-            cycle_data = {
-                'cycle_id': cycle.cycle_id,
-                'start_time': cycle.start_time,
-                'end_time': cycle.end_time,
-                'duration_seconds': cycle.duration.total_seconds(),
-                'energy_consumption': cycle.energy_consumption
-            }
+        # Combine cycle data with quality metrics by position
+        if summary is None:
+            summary = ReportSummary(pd.DataFrame(), production_cycles, quality_metrics)
+        report_df = summary.cycle_frame()
+        quality_df = summary.quality_frame()
+        if len(quality_df):
+            report_df = pd.concat([report_df, quality_df.iloc[:len(report_df)]], axis=1)
+        report_df.to_csv(csv_path, index=False)
+        
+        logger.info(f"Generated CSV report: {csv_path}")
+        return csv_path
+    
+    def generate_html_report(self, energy_data: pd.DataFrame, production_cycles: Union[List, Dict[str, np.ndarray]],
+                             quality_metrics: Optional[Union[List, QualityResult]] = None,
+                             anomalous_units: Optional[List[int]] = None, width: int = 1200, height: int = 320,
+                             max_points: Optional[int] = None, downsample: str = "lttb",
+                             summary: Optional[ReportSummary] = None) -> str:
+        """
+        Generate an HTML report with an inline SVG chart of the energy series.
+        
+        The series is downsampled before drawing, and the machine states
+        (from a "machine_state" column) and the cycles (anomalous ones in
+        red) are drawn per pixel column, so the file size and rendering time
+        depend on the chart size rather than on the length of the data.
+        
+        Args:
+            energy_data: Processed energy data; the first column is drawn
+            production_cycles: List of production cycles or cycle arrays
+            quality_metrics: List of quality metrics or a QualityResult
+            anomalous_units: List of anomalous unit IDs
+            width: Chart width in pixels
+            height: Chart height in pixels
+            max_points: Maximum number of drawn points, by default two per pixel column
+            downsample: "lttb" (Largest-Triangle-Three-Buckets) or "minmax"
+                (minimum and maximum per pixel column)
+            summary: Optional ReportSummary of these inputs from ``summarize``
             
-            if quality_metric:
-                cycle_data.update({
-                    'quality_score': quality_metric.quality_score,
-                    'quality_grade': quality_metric.quality_grade,
-                    'is_anomalous': quality_metric.is_anomalous,
-                    'issues': '; '.join(quality_metric.issues)
-                })
+        Returns:
+            Path to generated HTML report
+        """
+        if downsample not in ("lttb", "minmax"):
+            raise ValueError(f"Unknown downsampling method: {downsample}")
+        if width < 1 or height < 1:
+            raise ValueError("width and height must be positive")
+        if summary is None:
+            summary = self.summarize(energy_data, production_cycles, quality_metrics, anomalous_units)
+        chart = self._energy_chart(energy_data, summary, width, height, max_points or 2 * width, downsample)
+        
+        statistics = summary.statistics
+        rows = [("Total Production Cycles", statistics['production']['total_cycles']),
+                ("Anomalous Units", summary.anomalous_count),
+                ("Average Quality Score", f"{statistics['quality'].get('average_quality_score', 0):.2f}")]
+        if statistics['energy_statistics'] is not None:
+            rows += [(name.replace('_', ' ').title(), f"{value:.1f}")
+                     for name, value in statistics['energy_statistics'].items()]
+        rows += [(f"Grade {grade}", f"{count} cycles")
+                 for grade, count in statistics['quality'].get('quality_grade_distribution', {}).items()]
+        table = "\n".join(f"<tr><th>{html.escape(str(name))}</th><td>{html.escape(str(value))}</td></tr>"
+                           for name, value in rows)
+        legend = " ".join(f'<span style="background:{color}">&nbsp;{name}&nbsp;</span>'
+                          for name, color in [*STATE_COLORS.items(), ("cycle", CYCLE_COLORS[1]),
+                                              ("anomalous cycle", CYCLE_COLORS[2])])
+        
+        report_path = self._reserve_path("machine_analysis_report", "html")
+        with open(report_path, 'w', encoding='utf-8') as f:
+            f.write("<!DOCTYPE html>\n<html>\n<head>\n<meta charset=\"utf-8\">\n"
+                    "<title>Machine Energy Analysis Report</title>\n"
+                    "<style>body{font-family:sans-serif} th{text-align:left;padding-right:2em}</style>\n"
+                    "</head>\n<body>\n<h1>Machine Energy Analysis Report</h1>\n")
+            f.write(f"<p>Generated on: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}</p>\n")
+            f.write(f"<h2>Summary</h2>\n<table>\n{table}\n</table>\n")
+            f.write(f"<h2>Energy</h2>\n<p>{legend}</p>\n{chart}\n</body>\n</html>\n")
+        
+        logger.info(f"Generated HTML report: {report_path}")
+        return report_path
+    
+    def _energy_chart(self, energy_data: pd.DataFrame, summary: ReportSummary, width: int, height: int,
+                      max_points: int, downsample: str) -> str:
+        """Render the downsampled energy series with state and cycle overlays as SVG."""
+        if energy_data.empty:
+            return "<p>No energy data.</p>"
+        if not energy_data.index.is_monotonic_increasing:
+            energy_data = energy_data.sort_index()
+        times = pd.DatetimeIndex(energy_data.index).to_numpy().astype('datetime64[ns]').view(np.int64)
+        t0, t1 = times[0], times[-1]
+        scale = width / max(t1 - t0, 1)
+        offsets = (times - t0).astype(np.float64)
+        values = energy_data.iloc[:, 0].to_numpy(dtype=np.float64)
+        band, margin_left, margin_bottom = 12, 60, 24
+        plot_height = height - band - 4
+        parts = [f'<svg xmlns="http://www.w3.org/2000/svg" width="{width + margin_left + 10}" '
+                 f'height="{height + margin_bottom}" font-size="11" font-family="sans-serif">',
+                 f'<g transform="translate({margin_left},0)">']
+        
+        # Machine state of each pixel column: the most frequent state of its samples
+        if "machine_state" in energy_data.columns:
+            codes = pd.Categorical(energy_data["machine_state"], categories=list(STATE_COLORS)).codes
+            known = codes >= 0
+            pixels = np.minimum((offsets[known] * scale).astype(np.int64), width - 1)
+            counts = np.bincount(pixels * len(STATE_COLORS) + codes[known],
+                                 minlength=width * len(STATE_COLORS)).reshape(width, len(STATE_COLORS))
+            column_states = np.where(counts.any(axis=1), counts.argmax(axis=1), -1)
+            colors = list(STATE_COLORS.values())
+            for start, end, code in zip(*self._pixel_runs(column_states)):
+                if code < 0:
+                    continue
+                parts.append(f'<rect x="{start}" y="{band + 4}" width="{end - start}" height="{plot_height}" '
+                             f'fill="{colors[code]}"/>')
+        
+        # Cycle band: 1 for pixel columns covered by a cycle, 2 when covered by an anomalous one
+        cycles = summary.cycle_frame()
+        if len(cycles):
+            starts = cycles['start_time'].to_numpy().astype('datetime64[ns]').view(np.int64)
+            ends = cycles['end_time'].to_numpy().astype('datetime64[ns]').view(np.int64)
+            first = np.clip(np.floor((starts - t0) * scale), 0, width).astype(np.int64)
+            last = np.clip(np.maximum(np.ceil((ends - t0) * scale), first + 1), 0, width).astype(np.int64)
+            anomalous = np.isin(cycles['cycle_id'].to_numpy(), summary.anomalous_units)
+            column_cycles = np.zeros(width, dtype=np.int64)
+            for level, selection in ((1, slice(None)), (2, anomalous)):
+                coverage = np.cumsum(np.bincount(first[selection], minlength=width + 1)
+                                     - np.bincount(last[selection], minlength=width + 1))[:width]
+                column_cycles[coverage > 0] = level
+            for start, end, level in zip(*self._pixel_runs(column_cycles)):
+                if level:
+                    parts.append(f'<rect x="{start}" y="0" width="{end - start}" height="{band}" '
+                                 f'fill="{CYCLE_COLORS[level]}"/>')
+        
+        valid = ~np.isnan(values)
+        x, y = offsets[valid], values[valid]
+        if len(x):
+            if downsample == "lttb":
+                selected = lttb_indices(x, y, max(max_points, 3))
+            else:
+                selected = minmax_indices(x, y, max(max_points // 2, 1))
+            low, high = float(y.min()), float(y.max())
+            y_scale = plot_height / (high - low) if high > low else 0.0
+            px = x[selected] * scale
+            py = band + 4 + plot_height - (y[selected] - low) * y_scale
+            points = " ".join(f"{a:.1f},{b:.1f}" for a, b in zip(px.tolist(), py.tolist()))
+            parts.append(f'<polyline points="{points}" fill="none" stroke="#1f1f1f" stroke-width="1"/>')
+            parts.append(f'<text x="-4" y="{band + 14}" text-anchor="end">{high:.1f}</text>')
+            parts.append(f'<text x="-4" y="{height}" text-anchor="end">{low:.1f}</text>')
+        
+        parts.append(f'<rect x="0" y="{band + 4}" width="{width}" height="{plot_height}" fill="none" stroke="#808080"/>')
+        for fraction in np.linspace(0, 1, 5):
+            label = pd.Timestamp(np.datetime64(int(t0 + fraction * (t1 - t0)), 'ns')).strftime('%Y-%m-%d %H:%M')
+            anchor = "start" if fraction == 0 else "end" if fraction == 1 else "middle"
+            parts.append(f'<text x="{fraction * width:.1f}" y="{height + 16}" text-anchor="{anchor}">{label}</text>')
+        parts.append("</g>\n</svg>")
+        return "\n".join(parts)
+    
+    @staticmethod
+    def _pixel_runs(columns: np.ndarray):
+        """Split per-pixel values into runs of equal values: (starts, ends, values)."""
+        boundaries = np.flatnonzero(columns[1:] != columns[:-1]) + 1
+        starts = np.r_[0, boundaries]
+        ends = np.r_[boundaries, len(columns)]
+        return starts.tolist(), ends.tolist(), columns[starts].tolist()
+    
+    def generate_columnar_report(self, cycle_arrays: Dict[str, np.ndarray],
+                                 quality_result: Optional[QualityResult] = None, format: str = "parquet",
+                                 compression: str = "zstd", partition_by: Optional[List[str]] = None,
+                                 machine: Optional[str] = None) -> str:
+        """
+        Write cycle and quality data as a Parquet or Arrow IPC file.
+        
+        The table is built from the arrays directly: timestamps are stored as
+        nanosecond timestamps, grades and machine names as dictionary
+        (categorical) columns and issues as bit flags. Requires pyarrow.
+        
+        Args:
+            cycle_arrays: Cycle arrays as from ``QualityAnalyzer.get_cycle_arrays``
+            quality_result: Optional columnar QualityResult of the cycles
+            format: "parquet" or "arrow" (Arrow IPC file)
+            compression: Compression codec, e.g. "zstd", "snappy" (Parquet only),
+                "lz4" or None
+            partition_by: Optional partition columns, "day" and/or "machine".
+                A partitioned report is written as a directory of files.
+            machine: Optional machine name stored in a "machine" column
             
-            report_data.append(cycle_data)
+        Returns:
+            Path to the generated file or partitioned directory
+        """
+        pa = _import_pyarrow()
+        if format not in ("parquet", "arrow"):
+            raise ValueError(f"Unknown columnar report format: {format}")
+        partition_by = list(partition_by or [])
+        unknown = set(partition_by) - {"day", "machine"}
+        if unknown:
+            raise ValueError(f"Unknown partition columns: {sorted(unknown)}")
+        if "machine" in partition_by and machine is None:
+            raise ValueError("machine is required to partition by machine")
         
-        # Create DataFrame and save
-        report_df = pd.DataFrame(report_data)
-        report_df.to_csv(csv_path, index=False)
+        table = self._cycle_table(cycle_arrays, quality_result, machine, with_day="day" in partition_by)
+        extension = "parquet" if format == "parquet" else "arrow"
         
-        logger.info(f"Generated CSV report: {csv_path}")
+        if partition_by:
+            import pyarrow.dataset as ds
+            if format == "parquet":
+                file_format = ds.ParquetFileFormat()
+                options = file_format.make_write_options(compression=compression)
+            else:
+                file_format = ds.IpcFileFormat()
+                options = file_format.make_write_options(
+                    compression=pa.Codec(compression) if compression else None)
+            report_path = self._reserve_path("cycle_quality_report", directory=True)
+            ds.write_dataset(table, report_path, format=file_format, file_options=options,
+                             partitioning=partition_by, partitioning_flavor="hive",
+                             existing_data_behavior="overwrite_or_ignore")
+        elif format == "parquet":
+            report_path = self._reserve_path("cycle_quality_report", extension)
+            import pyarrow.parquet as pq
+            pq.write_table(table, report_path, compression=compression)
+        else:
+            report_path = self._reserve_path("cycle_quality_report", extension)
+            options = pa.ipc.IpcWriteOptions(compression=compression)
+            with pa.OSFile(report_path, "wb") as sink, pa.ipc.new_file(sink, table.schema, options=options) as writer:
+                writer.write_table(table)
+        
+        logger.info(f"Generated {format} report: {report_path}")
+        return report_path
+    
+    def _cycle_table(self, cycle_arrays: Dict[str, np.ndarray], quality_result: Optional[QualityResult],
+                     machine: Optional[str], with_day: bool):
+        """Build a pyarrow Table from cycle and quality arrays."""
+        pa = _import_pyarrow()
+        start_times = np.asarray(cycle_arrays['start_time']).astype('datetime64[ns]')
+        durations = np.asarray(cycle_arrays['duration'], dtype=np.float64)
+        end_times = start_times + np.round(durations * 1e9).astype('timedelta64[ns]')
+        columns = {
+            'cycle_id': pa.array(np.asarray(cycle_arrays['cycle_id'], dtype=np.int64)),
+            'start_time': pa.array(start_times, type=pa.timestamp('ns')),
+            'end_time': pa.array(end_times, type=pa.timestamp('ns')),
+            'duration_seconds': pa.array(durations),
+            'energy_consumption': pa.array(np.asarray(cycle_arrays['energy'], dtype=np.float64)),
+        }
+        if quality_result is not None:
+            if len(quality_result) != len(durations):
+                raise ValueError(f"Expected {len(durations)} quality results, got {len(quality_result)}")
+            columns.update({
+                'quality_score': pa.array(quality_result.quality_scores, type=pa.float32()),
+                'quality_grade': pa.DictionaryArray.from_arrays(
+                    pa.array(quality_result.grade_codes, type=pa.int8()), pa.array(QUALITY_GRADES.tolist())),
+                'is_anomalous': pa.array(quality_result.is_anomalous),
+                'issue_flags': pa.array(quality_result.issue_flags, type=pa.uint8()),
+            })
+        if machine is not None:
+            columns['machine'] = pa.DictionaryArray.from_arrays(
+                pa.array(np.zeros(len(durations), dtype=np.int8)), pa.array([machine]))
+        if with_day:
+            columns['day'] = pa.array(start_times.astype('datetime64[D]'), type=pa.date32())
+        return pa.table(columns)
+    
+    @property
+    def rollup_store(self) -> RollupStore:
+        """The rollup store, opened on first use."""
+        if self._rollup_store is None:
+            self._rollup_store = RollupStore(self.rollup_path)
+        return self._rollup_store
+    
+    def update_rollups(self, energy_data: pd.DataFrame, cycle_arrays: Dict[str, np.ndarray],
+                       quality_result: Optional[QualityResult] = None, machine: str = "",
+                       replace: bool = False) -> int:
+        """
+        Add the hourly, per-shift and daily aggregates of a run to the rollup store.
+        
+        Args:
+            energy_data: Processed energy data of the run
+            cycle_arrays: Cycle arrays as from ``QualityAnalyzer.get_cycle_arrays``
+            quality_result: Optional columnar QualityResult of the cycles
+            machine: Machine name
+            replace: Whether the run is a re-run that replaces the data it
+                covers, see ``RollupStore.add``
+            
+        Returns:
+            Number of rollup rows written
+        """
+        return self.rollup_store.add(energy_data, cycle_arrays, quality_result, machine, replace)
+    
+    def generate_rollup_report(self, freq: str = "MS", start: Optional[pd.Timestamp] = None,
+                               end: Optional[pd.Timestamp] = None, machine: Optional[str] = None) -> str:
+        """
+        Generate a CSV report of monthly, yearly or other period aggregates from the rollup store.
+        
+        Args:
+            freq: Pandas frequency of the report periods, e.g. "MS" or "YS"
+            start: Optional start of the range (inclusive)
+            end: Optional end of the range (exclusive)
+            machine: Optional machine name; all machines summed when None
+            
+        Returns:
+            Path to generated CSV report
+        """
+        csv_path = self._reserve_path(f"rollup_report_{freq}", "csv")
+        self.rollup_store.rollup(freq, start, end, machine).to_csv(csv_path, index_label="period_start")
+        logger.info(f"Generated rollup report: {csv_path}")
         return csv_path
     
+    def generate_fleet_report(self, machine_results: Sequence[MachineResult], n_workers: Optional[int] = None,
+                              top_n: int = 10) -> str:
+        """
+        Generate one text report for a fleet of machines.
+        
+        The machines are aggregated in a process pool and merged into fleet
+        totals (see FleetSummary). The report ranks the machines with the
+        worst anomaly rates and the highest energy per cycle, followed by a
+        short section per machine.
+        
+        Args:
+            machine_results: Analysis results, one per machine
+            n_workers: Number of worker processes (None uses all available cores)
+            top_n: Number of machines in each ranking
+            
+        Returns:
+            Path to generated report
+        """
+        fleet = FleetSummary(machine_results, n_workers)
+        report_path = self._reserve_path("fleet_report", "txt")
+        with open(report_path, 'w', encoding='utf-8') as f:
+            self.write_fleet_report(f, fleet, top_n)
+        logger.info(f"Generated fleet report: {report_path}")
+        return report_path
+    
+    def write_fleet_report(self, f: TextIO, fleet: FleetSummary, top_n: int = 10) -> None:
+        """
+        Write the fleet report to an open file handle.
+        
+        Args:
+            f: Text file handle to write to
+            fleet: Aggregates of the fleet
+            top_n: Number of machines in each ranking
+        """
+        def section(title: str) -> None:
+            f.write(f"{title}\n{'-' * 20}\n")
+        
+        def write_aggregate(aggregate) -> None:
+            if aggregate.start_time is not None:
+                f.write(f"Data Period: {aggregate.start_time} to {aggregate.end_time}\n")
+            f.write(f"Total Production Cycles: {aggregate.total_cycles}\n")
+            f.write(f"Anomalous Units: {aggregate.anomalous_cycles} ({aggregate.anomaly_rate:.1%})\n")
+            if aggregate.scores.count:
+                f.write(f"Average Quality Score: {aggregate.scores.mean:.2f}\n")
+            if aggregate.total_cycles:
+                duration = aggregate.cycles.stats["duration"]
+                f.write(f"Average Cycle Duration: {duration.mean:.1f} seconds "
+                        f"(median {aggregate.cycles.sketches['duration'].median():.1f})\n")
+                f.write(f"Average Energy per Cycle: {aggregate.energy_per_cycle:.1f}\n")
+            if aggregate.energy.count:
+                f.write(f"Total Energy: {aggregate.energy.total:.1f}\n")
+                f.write(f"Peak Energy: {aggregate.energy.max:.1f}\n")
+            if aggregate.grade_counts.any():
+                f.write("Quality Grades: " + ", ".join(f"{grade}: {count}" for grade, count in
+                                                       zip(QUALITY_GRADES, aggregate.grade_counts.tolist())) + "\n")
+            issues = [f"{message}: {count}" for message, count in
+                      zip(ISSUE_MESSAGES.values(), aggregate.issue_counts.tolist()) if count]
+            if issues:
+                f.write("Issues: " + "; ".join(issues) + "\n")
+            f.write("\n")
+        
+        f.write(f"{'=' * 50}\nFLEET ENERGY ANALYSIS REPORT\n{'=' * 50}\n")
+        f.write(f"Generated on: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n")
+        f.write(f"Machines: {len(fleet.machines)}\n\n")
+        
+        section("FLEET SUMMARY")
+        write_aggregate(fleet.total)
+        
+        section("WORST ANOMALY RATES")
+        for rank, (machine, rate) in enumerate(fleet.ranking("anomaly_rate", top_n), 1):
+            f.write(f"{rank}. {machine}: {rate:.1%}\n")
+        f.write("\n")
+        
+        section("HIGHEST ENERGY PER CYCLE")
+        for rank, (machine, energy) in enumerate(fleet.ranking("energy_per_cycle", top_n), 1):
+            f.write(f"{rank}. {machine}: {energy:.1f}\n")
+        f.write("\n")
+        
+        for aggregate in fleet.machines:
+            section(f"MACHINE {aggregate.machine}")
+            write_aggregate(aggregate)
+        
+        f.write(f"{'=' * 50}\nEND OF REPORT\n{'=' * 50}")
+    
     def generate_summary_statistics(self, energy_data: pd.DataFrame, 
-                                  production_cycles: List, quality_metrics: List,
-                                  anomalous_units: List[int]) -> Dict:
+                                  production_cycles: List, quality_metrics: Union[List, QualityResult],
+                                  anomalous_units: List[int],
+                                  summary: Optional[ReportSummary] = None) -> Dict:
         """
         Generate summary statistics for the analysis.
         
         Args:
             energy_data: Processed energy data
-            production_cycles: List of production cycles
-            quality_metrics: List of quality metrics
+            production_cycles: List of production cycles or cycle arrays
+            quality_metrics: List of quality metrics or a QualityResult
             anomalous_units: List of anomalous unit IDs
+            summary: Optional ReportSummary of these inputs from ``summarize``
             
         Returns:
             Dictionary with summary statistics
         """
+        report_summary = summary or self.summarize(energy_data, production_cycles, quality_metrics,
+                                                   anomalous_units)
+        statistics = report_summary.statistics
+        energy = statistics['energy_statistics'] or {}
         summary = {
             "analysis_timestamp": datetime.now().isoformat(),
-            "data_period": {
-                "start": energy_data.index.min() if not energy_data.empty else None,
-                "end": energy_data.index.max() if not energy_data.empty else None,
-                "duration_hours": (energy_data.index.max() - energy_data.index.min()).total_seconds() / 3600 if not energy_data.empty else 0
-            },
+            "data_period": dict(statistics['data_period']),
             "energy_statistics": {
-                "total_energy": energy_data.iloc[:, 0].sum() if not energy_data.empty else 0,
-                "average_energy": energy_data.iloc[:, 0].mean() if not energy_data.empty else 0,
-                "peak_energy": energy_data.iloc[:, 0].max() if not energy_data.empty else 0
+                "total_energy": energy.get('total_energy', 0),
+                "average_energy": energy.get('average_energy', 0),
+                "peak_energy": energy.get('peak_energy', 0)
             },
             "production_summary": {
-                "total_cycles": len(production_cycles),
-                "anomalous_units": len(anomalous_units),
-                "average_quality_score": np.mean([metric.quality_score for metric in quality_metrics]) if quality_metrics else 0
+                "total_cycles": statistics['production']['total_cycles'],
+                "anomalous_units": report_summary.anomalous_count,
+                "average_quality_score": statistics['quality'].get('average_quality_score', 0)
             }
         }
         
-        return summary 
\ No newline at end of file
+        return summary
\ No newline at end of file
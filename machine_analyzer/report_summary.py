@@ -0,0 +1,201 @@
+"""
+Report Summary - Single-pass aggregates shared by all report outputs.
+"""
+
+import pandas as pd
+import numpy as np
+from typing import Dict, List, Optional, Union
+import logging
+from machine_analyzer.quality_analyzer import ISSUE_MESSAGES, QUALITY_GRADES, QualityResult
+
+logger = logging.getLogger(__name__)
+
+
+def summarize_quality_metrics(quality_metrics: Optional[Union[List, QualityResult]]) -> Dict:
+    """
+    Aggregate quality metrics in one pass.
+
+    Args:
+        quality_metrics: List of quality metrics or a QualityResult
+
+    Returns:
+        Dictionary with at least average_quality_score and
+        quality_grade_distribution, empty when there are no metrics
+    """
+    if quality_metrics is None or len(quality_metrics) == 0:
+        return {}
+    if isinstance(quality_metrics, QualityResult):
+        return quality_metrics.summary()
+
+    grade_counts = {}
+    scores = np.empty(len(quality_metrics))
+    for i, metric in enumerate(quality_metrics):
+        scores[i] = metric.quality_score
+        grade_counts[metric.quality_grade] = grade_counts.get(metric.quality_grade, 0) + 1
+    return {
+        'average_quality_score': float(scores.mean()),
+        'quality_grade_distribution': grade_counts,
+    }
+
+
+class ReportSummary:
+    """
+    Aggregates of one analysis, computed once and shared by every report format.
+
+    Cycles are given as ProductionCycle objects or as cycle arrays (from
+    ``QualityAnalyzer.get_cycle_arrays``), and quality as QualityMetrics
+    objects or a columnar QualityResult. Each input is read once; the
+    aggregates and the per-cycle tables are cached on first use, so the
+    inputs must not change while the summary is in use.
+    """
+
+    def __init__(self, energy_data: pd.DataFrame, production_cycles: Union[List, Dict[str, np.ndarray]],
+                 quality_metrics: Optional[Union[List, QualityResult]] = None,
+                 anomalous_units: Optional[List[int]] = None):
+        """
+        Initialize the summary.
+
+        Args:
+            energy_data: Processed energy data
+            production_cycles: List of production cycles or cycle arrays
+            quality_metrics: List of quality metrics or a QualityResult
+            anomalous_units: List of anomalous unit IDs, taken from the
+                QualityResult when not given
+        """
+        self.energy_data = energy_data
+        self.production_cycles = production_cycles
+        self.quality_metrics = quality_metrics
+        self._anomalous_units = anomalous_units
+        self._statistics = None
+        self._cycle_frame = None
+        self._quality_frame = None
+
+    @property
+    def anomalous_units(self) -> np.ndarray:
+        """IDs of the anomalous cycles."""
+        if self._anomalous_units is not None:
+            return np.asarray(self._anomalous_units, dtype=np.int64)
+        if isinstance(self.quality_metrics, QualityResult):
+            return self.quality_metrics.cycle_ids[self.quality_metrics.is_anomalous]
+        return np.empty(0, dtype=np.int64)
+
+    @property
+    def anomalous_count(self) -> int:
+        """Number of anomalous cycles."""
+        if self._anomalous_units is None and isinstance(self.quality_metrics, QualityResult):
+            return self.quality_metrics.summary()['anomalous_cycles']
+        return len(self.anomalous_units)
+
+    @property
+    def statistics(self) -> Dict:
+        """
+        All report aggregates, computed on first access.
+
+        Returns:
+            Dictionary with data_period, energy_statistics, production and
+            quality sections
+        """
+        if self._statistics is None:
+            self._statistics = self._compute()
+        return self._statistics
+
+    def _compute(self) -> Dict:
+        """Compute every aggregate with a single pass over each input."""
+        data_period = {"start": None, "end": None, "duration_hours": 0}
+        energy_statistics = None
+        if not self.energy_data.empty:
+            index = self.energy_data.index
+            start, end = index.min(), index.max()
+            data_period = {"start": start, "end": end, "duration_hours": (end - start).total_seconds() / 3600}
+            values = self.energy_data.iloc[:, 0].to_numpy()
+            energy_statistics = {
+                "total_energy": float(np.nansum(values)),
+                "average_energy": float(np.nanmean(values)),
+                "peak_energy": float(np.nanmax(values)),
+                "minimum_energy": float(np.nanmin(values)),
+            }
+
+        # Cycle arrays are aggregated in place; cycle objects are read once into the cycle table
+        if isinstance(self.production_cycles, dict):
+            durations = np.asarray(self.production_cycles['duration'], dtype=np.float64)
+            energies = np.asarray(self.production_cycles['energy'], dtype=np.float64)
+        else:
+            cycles = self.cycle_frame()
+            durations, energies = cycles['duration_seconds'].to_numpy(), cycles['energy_consumption'].to_numpy()
+        total_cycles = len(durations)
+        total_cycle_energy = float(energies.sum()) if total_cycles else 0.0
+        production = {
+            "total_cycles": total_cycles,
+            "average_duration": float(durations.mean()) if total_cycles else 0.0,
+            "average_cycle_energy": total_cycle_energy / total_cycles if total_cycles else 0.0,
+            "total_cycle_energy": total_cycle_energy,
+        }
+        return {
+            "data_period": data_period,
+            "energy_statistics": energy_statistics,
+            "production": production,
+            "quality": summarize_quality_metrics(self.quality_metrics),
+        }
+
+    def cycle_frame(self) -> pd.DataFrame:
+        """
+        Per-cycle table with cycle_id, start_time, end_time, duration_seconds and energy_consumption.
+
+        Returns:
+            Cached DataFrame with one row per cycle
+        """
+        if self._cycle_frame is None:
+            cycles = self.production_cycles
+            if isinstance(cycles, dict):
+                start_times = pd.DatetimeIndex(cycles['start_time'])
+                durations = np.asarray(cycles['duration'], dtype=np.float64)
+                self._cycle_frame = pd.DataFrame({
+                    'cycle_id': np.asarray(cycles['cycle_id'], dtype=np.int64),
+                    'start_time': start_times,
+                    'end_time': start_times + pd.to_timedelta(durations, unit='s'),
+                    'duration_seconds': durations,
+                    'energy_consumption': np.asarray(cycles['energy'], dtype=np.float64),
+                })
+            else:
+                n_cycles = len(cycles)
+                self._cycle_frame = pd.DataFrame({
+                    'cycle_id': np.fromiter((cycle.cycle_id for cycle in cycles), dtype=np.int64, count=n_cycles),
+                    'start_time': pd.DatetimeIndex([cycle.start_time for cycle in cycles]),
+                    'end_time': pd.DatetimeIndex([cycle.end_time for cycle in cycles]),
+                    'duration_seconds': np.fromiter((cycle.duration.total_seconds() for cycle in cycles),
+                                                    dtype=np.float64, count=n_cycles),
+                    'energy_consumption': np.fromiter((cycle.energy_consumption for cycle in cycles),
+                                                      dtype=np.float64, count=n_cycles),
+                })
+        return self._cycle_frame
+
+    def quality_frame(self) -> pd.DataFrame:
+        """
+        Per-cycle quality table with quality_score, quality_grade, is_anomalous and issues.
+
+        Returns:
+            Cached DataFrame with one row per quality metric
+        """
+        if self._quality_frame is None:
+            metrics = self.quality_metrics
+            if metrics is None:
+                metrics = []
+            if isinstance(metrics, QualityResult):
+                # Issue strings are built once per distinct flag combination
+                flags, inverse = np.unique(metrics.issue_flags, return_inverse=True)
+                messages = np.array(['; '.join(message for issue, message in ISSUE_MESSAGES.items() if flag & issue)
+                                     for flag in flags.tolist()], dtype=object)
+                self._quality_frame = pd.DataFrame({
+                    'quality_score': metrics.quality_scores,
+                    'quality_grade': QUALITY_GRADES[metrics.grade_codes],
+                    'is_anomalous': metrics.is_anomalous,
+                    'issues': messages[inverse.ravel()] if len(flags) else np.empty(0, dtype=object),
+                })
+            else:
+                self._quality_frame = pd.DataFrame({
+                    'quality_score': [metric.quality_score for metric in metrics],
+                    'quality_grade': [metric.quality_grade for metric in metrics],
+                    'is_anomalous': [metric.is_anomalous for metric in metrics],
+                    'issues': ['; '.join(metric.issues) for metric in metrics],
+                })
+        return self._quality_frame
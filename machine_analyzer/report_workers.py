@@ -0,0 +1,122 @@
+"""
+Report Workers - Background report generation with a thread or process pool.
+"""
+
+import asyncio
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
+import threading
+from typing import Any, Dict
+import logging
+from machine_analyzer.report_generator import ReportGenerator
+
+logger = logging.getLogger(__name__)
+
+# Report types and the ReportGenerator methods that produce them
+REPORT_METHODS = {
+    "simple": "generate_simple_report",
+    "streaming": "generate_streaming_report",
+    "csv": "generate_csv_report",
+    "html": "generate_html_report",
+    "columnar": "generate_columnar_report",
+    "rollup": "generate_rollup_report",
+    "fleet": "generate_fleet_report",
+    "summary": "generate_summary_statistics",
+}
+
+
+def _run_report(generator: ReportGenerator, method: str, args: tuple, kwargs: Dict[str, Any]) -> Any:
+    """Run one report job; module level so that it can be sent to worker processes."""
+    return getattr(generator, method)(*args, **kwargs)
+
+
+class ReportWorkerPool:
+    """
+    Writes reports in the background and returns futures.
+
+    Jobs run on a thread pool, or on a process pool for CPU-heavy formatting.
+    At most ``max_writers`` reports are written at the same time; further
+    jobs wait in the pool's queue. The inputs of a job must not be modified
+    until its future is done. Report file names are reserved exclusively by
+    ReportGenerator, so concurrent jobs never overwrite each other's files.
+    Each job summarizes its own inputs, so no state is shared between jobs.
+    """
+
+    def __init__(self, generator: ReportGenerator, max_writers: int = 2, use_processes: bool = False):
+        """
+        Initialize the worker pool.
+
+        Args:
+            generator: ReportGenerator that writes the reports
+            max_writers: Maximum number of reports written concurrently
+            use_processes: Whether to use worker processes instead of threads
+        """
+        if max_writers < 1:
+            raise ValueError("max_writers must be at least 1")
+        self.generator = generator
+        self.max_writers = max_writers
+        self.use_processes = use_processes
+        executor = ProcessPoolExecutor if use_processes else ThreadPoolExecutor
+        self._executor = executor(max_workers=max_writers)
+        self._pending = 0
+        self._lock = threading.Lock()
+
+    def __enter__(self) -> "ReportWorkerPool":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.shutdown()
+
+    @property
+    def pending(self) -> int:
+        """Number of submitted jobs that are not done yet."""
+        return self._pending
+
+    def submit(self, report: str, *args, **kwargs) -> Future:
+        """
+        Submit a report job.
+
+        Args:
+            report: Report type: "simple", "streaming", "csv", "html", "columnar",
+                "rollup", "fleet" or "summary"
+            *args: Arguments for the ReportGenerator method
+            **kwargs: Keyword arguments for the ReportGenerator method
+
+        Returns:
+            Future with the method's result, e.g. the report path
+        """
+        if report not in REPORT_METHODS:
+            raise ValueError(f"Unknown report type: {report}")
+        with self._lock:
+            self._pending += 1
+        future = self._executor.submit(_run_report, self.generator, REPORT_METHODS[report], args, kwargs)
+        future.add_done_callback(lambda done: self._finish(report, done))
+        return future
+
+    async def generate(self, report: str, *args, **kwargs) -> Any:
+        """
+        Write a report in the pool and await its result from asyncio code.
+
+        Args:
+            report: Report type, as for ``submit``
+            *args: Arguments for the ReportGenerator method
+            **kwargs: Keyword arguments for the ReportGenerator method
+
+        Returns:
+            The method's result, e.g. the report path
+        """
+        return await asyncio.wrap_future(self.submit(report, *args, **kwargs))
+
+    def shutdown(self, wait: bool = True) -> None:
+        """
+        Stop accepting jobs.
+
+        Args:
+            wait: Whether to wait until all submitted reports are written
+        """
+        self._executor.shutdown(wait=wait)
+
+    def _finish(self, report: str, future: Future) -> None:
+        with self._lock:
+            self._pending -= 1
+        if not future.cancelled() and future.exception() is not None:
+            logger.error(f"Background {report} report failed: {future.exception()}")
@@ -0,0 +1,196 @@
+"""
+Rolling Baseline - Drift-aware baselines for quality thresholds.
+"""
+
+import pandas as pd
+import numpy as np
+from collections import deque
+from typing import Optional, Tuple, Union
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class RollingBaseline:
+    """
+    Causal rolling or exponentially weighted mean and standard deviation.
+
+    The baseline of each cycle is computed from the cycles before it only, so
+    it follows slow drift such as tool wear. Windows and half-lives are given
+    in cycles (numbers) or in time (strings such as "2h"). ``compute`` does a
+    single vectorized pass over time-ordered arrays; ``update`` gives the same
+    baseline one cycle at a time in O(1) amortized.
+    """
+
+    def __init__(self, method: str = "rolling", window: Optional[Union[int, str]] = 100,
+                 halflife: Optional[Union[float, str]] = None, min_periods: int = 10):
+        """
+        Initialize the baseline.
+
+        Args:
+            method: "rolling" for a sliding window or "ewm" for exponential weighting
+            window: Sliding window in cycles (int) or time (str), for "rolling"
+            halflife: Half-life in cycles (float) or time (str), for "ewm"
+            min_periods: Number of previous cycles required before the baseline is defined
+        """
+        if method not in ("rolling", "ewm"):
+            raise ValueError(f"Unknown baseline method: {method}")
+        if method == "rolling" and window is None:
+            raise ValueError("window is required for a rolling baseline")
+        if method == "ewm" and halflife is None:
+            raise ValueError("halflife is required for an exponentially weighted baseline")
+
+        self.method = method
+        self.window = window
+        self.halflife = halflife
+        self.min_periods = max(1, int(min_periods))
+        self.time_based = isinstance(window if method == "rolling" else halflife, str)
+        if method == "rolling" and not self.time_based and self.min_periods > int(window):
+            raise ValueError("min_periods cannot exceed a window given in cycles")
+        self._span = pd.Timedelta(window if method == "rolling" else halflife) if self.time_based else None
+        self.reset()
+
+    def reset(self) -> None:
+        """Forget all streamed values."""
+        self._values = deque()
+        self._times = deque()
+        self._count = 0
+        self._weight = 0.0
+        self._sum = None
+        self._sum_sq = None
+        self._reference = None
+        self._last_time = None
+
+    def compute(self, values: np.ndarray, times: Optional[np.ndarray] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Compute the baseline of every cycle from the cycles before it.
+
+        Args:
+            values: Array of shape (n_cycles,) or (n_cycles, n_features), in time order
+            times: Cycle timestamps, required for time-based windows
+
+        Returns:
+            Tuple of (means, standard deviations) shaped like ``values``, NaN
+            where fewer than ``min_periods`` previous cycles exist
+        """
+        values = np.asarray(values, dtype=np.float64)
+        flat = values.reshape(len(values), -1)
+        # Work relative to the first cycle so that E[x^2] - E[x]^2 keeps its precision
+        reference = flat[0] if len(flat) else np.zeros(flat.shape[1])
+        frame = pd.DataFrame(flat - reference)
+        if self.time_based:
+            if times is None:
+                raise ValueError("times are required for a time-based baseline")
+            times = pd.DatetimeIndex(times)
+            if not times.is_monotonic_increasing:
+                raise ValueError("Cycles must be in time order")
+
+        previous_count = pd.Series(np.arange(len(values)))
+        if self.method == "rolling":
+            if self.time_based:
+                frame.index = times
+                rolling = frame.rolling(self._span, closed="left", min_periods=self.min_periods)
+                means, variances = rolling.mean(), rolling.var(ddof=0)
+                previous_count = pd.Series(np.ones(len(values)), index=times).rolling(
+                    self._span, closed="left").sum().fillna(0)
+            else:
+                rolling = frame.rolling(int(self.window), min_periods=self.min_periods)
+                means, variances = rolling.mean().shift(1), rolling.var(ddof=0).shift(1)
+        else:
+            # Weighted moments of x and x^2; the shift makes the baseline causal
+            if self.time_based:
+                options = {'halflife': self._span, 'times': times}
+            else:
+                options = {'halflife': float(self.halflife)}
+            means = frame.ewm(**options).mean().shift(1)
+            variances = ((frame * frame).ewm(**options).mean().shift(1) - means * means).clip(lower=0)
+
+        enough = (previous_count.to_numpy() >= self.min_periods)[:, None]
+        means = np.where(enough, means.to_numpy() + reference, np.nan)
+        stds = np.where(enough, np.sqrt(variances.to_numpy()), np.nan)
+        return means.reshape(values.shape), stds.reshape(values.shape)
+
+    def baseline(self, time: Optional[pd.Timestamp] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Get the current baseline, as it applies to a cycle at ``time``.
+
+        Args:
+            time: Timestamp of the cycle to score, required for time-based windows
+
+        Returns:
+            Tuple of (mean, standard deviation), NaN before ``min_periods`` cycles
+        """
+        if self.time_based:
+            if time is None:
+                raise ValueError("time is required for a time-based baseline")
+            if self.method == "rolling":
+                self._expire(pd.Timestamp(time))
+
+        if self._count < self.min_periods or self._weight <= 0:
+            nan = np.full(np.shape(self._sum) if self._sum is not None else (), np.nan)
+            return nan, nan.copy()
+
+        # Sums are kept relative to the first value for numerical stability
+        mean = self._sum / self._weight
+        variance = np.maximum(self._sum_sq / self._weight - mean * mean, 0.0)
+        return mean + self._reference, np.sqrt(variance)
+
+    def update(self, value: Union[float, np.ndarray],
+               time: Optional[pd.Timestamp] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Return the baseline for a new cycle, then add the cycle to it.
+
+        Args:
+            value: Feature value or vector of the new cycle
+            time: Timestamp of the cycle, required for time-based windows
+
+        Returns:
+            Tuple of (mean, standard deviation) before the cycle was added
+        """
+        value = np.asarray(value, dtype=np.float64)
+        if self._sum is None:
+            self._reference = value.copy()
+            self._sum = np.zeros_like(value)
+            self._sum_sq = np.zeros_like(value)
+        prior = self.baseline(time)
+        centered = value - self._reference
+
+        if self.method == "rolling":
+            self._values.append(centered)
+            if self.time_based:
+                self._times.append(pd.Timestamp(time))
+            self._sum = self._sum + centered
+            self._sum_sq = self._sum_sq + centered * centered
+            self._weight += 1.0
+            if not self.time_based and len(self._values) > int(self.window):
+                self._remove(self._values.popleft())
+            self._count = len(self._values)
+        else:
+            decay = self._decay(time)
+            self._sum = self._sum * decay + centered
+            self._sum_sq = self._sum_sq * decay + centered * centered
+            self._weight = self._weight * decay + 1.0
+            self._count += 1
+        return prior
+
+    def _decay(self, time: Optional[pd.Timestamp]) -> float:
+        """Weight decay between the previous and the new cycle."""
+        if not self.time_based:
+            return 0.5 ** (1.0 / float(self.halflife))
+        time = pd.Timestamp(time)
+        elapsed = 0.0 if self._last_time is None else (time - self._last_time) / self._span
+        self._last_time = time
+        return 0.5 ** elapsed
+
+    def _expire(self, time: pd.Timestamp) -> None:
+        """Drop values that fall out of the time window ending at ``time``."""
+        start = time - self._span
+        while self._times and self._times[0] < start:
+            self._times.popleft()
+            self._remove(self._values.popleft())
+        self._count = len(self._values)
+
+    def _remove(self, centered: np.ndarray) -> None:
+        self._sum = self._sum - centered
+        self._sum_sq = self._sum_sq - centered * centered
+        self._weight -= 1.0
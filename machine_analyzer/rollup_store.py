@@ -0,0 +1,264 @@
+"""
+Rollup Store - Append-only per-hour, per-shift and per-day aggregates in SQLite.
+"""
+
+import pandas as pd
+import numpy as np
+import sqlite3
+import threading
+from typing import Dict, List, Optional, Sequence
+import logging
+from machine_analyzer.quality_analyzer import QUALITY_GRADES, QualityResult
+
+logger = logging.getLogger(__name__)
+
+PERIODS = ("hour", "shift", "day")
+GRADE_COLUMNS = tuple(f"grade_{grade.lower()}" for grade in QUALITY_GRADES)
+SUM_COLUMNS = ("energy_total", "energy_samples", "cycle_count", "cycle_energy", "cycle_duration",
+               "anomaly_count") + GRADE_COLUMNS
+REAL_COLUMNS = ("energy_total", "cycle_energy", "cycle_duration")
+TIME_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+
+class RollupStore:
+    """
+    Aggregates of analysis runs stored per hour, shift and day in SQLite.
+
+    Each run adds rows for the buckets its data covers: energy totals, sample
+    counts and peaks, cycle counts, energy and duration, anomaly counts and
+    grade histograms. All columns except the peak are sums, so rollups of any
+    longer period are assembled from the stored rows without the raw data.
+    Cycles are assigned to the bucket of their start time. Runs are added to
+    the stored buckets, so each day's run adds its own rows; a day is re-run
+    without double counting with ``add(..., replace=True)``.
+    """
+
+    def __init__(self, path: str = ":memory:", shift_starts: Sequence[int] = (6, 14, 22)):
+        """
+        Open or create a rollup store.
+
+        Args:
+            path: SQLite database file, or ":memory:"
+            shift_starts: Hours of the day at which shifts start
+        """
+        shift_starts = sorted(int(hour) for hour in shift_starts)
+        if not shift_starts or shift_starts[0] < 0 or shift_starts[-1] > 23:
+            raise ValueError("shift_starts must be hours between 0 and 23")
+        self.path = path
+        self.shift_starts = np.array(shift_starts)
+        # The connection may be used from report worker threads, one at a time
+        self.connection = sqlite3.connect(path, check_same_thread=False)
+        self._lock = threading.RLock()
+        columns = ", ".join(f"{column} {'REAL' if column in REAL_COLUMNS else 'INTEGER'} NOT NULL"
+                            for column in SUM_COLUMNS)
+        with self.connection:
+            self.connection.execute(
+                f"CREATE TABLE IF NOT EXISTS rollups (period TEXT NOT NULL, bucket_start TEXT NOT NULL, "
+                f"machine TEXT NOT NULL, {columns}, energy_peak REAL, "
+                f"PRIMARY KEY (period, machine, bucket_start))")
+
+    def close(self) -> None:
+        """Close the database connection."""
+        self.connection.close()
+
+    def add(self, energy_data: pd.DataFrame, cycle_arrays: Dict[str, np.ndarray],
+            quality_result: Optional[QualityResult] = None, machine: str = "", replace: bool = False) -> int:
+        """
+        Add the aggregates of one analysis run.
+
+        By default the run's aggregates are added to the stored buckets, so
+        consecutive runs accumulate in buckets that span both, e.g. a night
+        shift crossing midnight. With ``replace`` the run is treated as a
+        re-run: hours it fully covers are replaced, partially covered hours
+        are added to, and the shifts and days it touches are rebuilt from the
+        stored hours.
+
+        Args:
+            energy_data: Processed energy data of the run
+            cycle_arrays: Cycle arrays as from ``QualityAnalyzer.get_cycle_arrays``
+            quality_result: Optional columnar QualityResult of the cycles
+            machine: Machine name
+            replace: Whether the run replaces the data it covers (re-run)
+                instead of adding to it
+
+        Returns:
+            Number of rows written
+        """
+        hourly = self._hourly(energy_data, cycle_arrays, quality_result)
+        if hourly.empty:
+            return 0
+
+        with self._lock, self.connection:
+            if not replace:
+                rows = [row for period in PERIODS
+                        for row in self._rows(period, self._aggregate(hourly, period), machine)]
+                self.connection.executemany(self._statement(accumulate=True), rows)
+                n_rows = len(rows)
+            else:
+                covered = self._covered_hours(hourly.index, energy_data, cycle_arrays)
+                self.connection.executemany(self._statement(accumulate=False),
+                                            self._rows("hour", hourly[covered], machine))
+                self.connection.executemany(self._statement(accumulate=True),
+                                            self._rows("hour", hourly[~covered], machine))
+                n_rows = len(hourly)
+                for period in PERIODS[1:]:
+                    rows = self._rebuild(period, hourly.index, machine)
+                    self.connection.executemany(self._statement(accumulate=False), rows)
+                    n_rows += len(rows)
+        logger.info(f"Added {n_rows} rollup rows for machine '{machine}'")
+        return n_rows
+
+    def _aggregate(self, hourly: pd.DataFrame, period: str) -> pd.DataFrame:
+        """Sum hour rows into the buckets of a period; the peak is the maximum."""
+        grouped = hourly.groupby(self._bucket_starts(pd.DatetimeIndex(hourly.index), period))
+        frame = grouped[list(SUM_COLUMNS)].sum()
+        frame['energy_peak'] = grouped['energy_peak'].max()
+        return frame
+
+    def _rows(self, period: str, frame: pd.DataFrame, machine: str) -> List[tuple]:
+        """Convert aggregated buckets to plain Python rows for sqlite3."""
+        values = [frame[column].astype(float if column in REAL_COLUMNS else np.int64).tolist()
+                  for column in SUM_COLUMNS]
+        # NULL for buckets without energy samples
+        peaks = frame['energy_peak'].astype(object).where(frame['energy_peak'].notna(), None).tolist()
+        return list(zip([period] * len(frame), pd.DatetimeIndex(frame.index).strftime(TIME_FORMAT),
+                        [machine] * len(frame), *values, peaks))
+
+    def _statement(self, accumulate: bool) -> str:
+        """INSERT statement that adds to or replaces existing buckets."""
+        columns = f"period, bucket_start, machine, {', '.join(SUM_COLUMNS)}, energy_peak"
+        placeholders = ", ".join("?" * (len(SUM_COLUMNS) + 4))
+        if not accumulate:
+            return f"INSERT OR REPLACE INTO rollups ({columns}) VALUES ({placeholders})"
+        updates = ", ".join(f"{column} = {column} + excluded.{column}" for column in SUM_COLUMNS)
+        return (f"INSERT INTO rollups ({columns}) VALUES ({placeholders}) "
+                f"ON CONFLICT (period, machine, bucket_start) DO UPDATE SET {updates}, "
+                f"energy_peak = MAX(COALESCE(energy_peak, excluded.energy_peak), "
+                f"COALESCE(excluded.energy_peak, energy_peak))")
+
+    def _covered_hours(self, hours: pd.DatetimeIndex, energy_data: pd.DataFrame,
+                       cycle_arrays: Dict[str, np.ndarray]) -> np.ndarray:
+        """Mask of the hours that lie entirely inside the time range of the run."""
+        times = pd.DatetimeIndex(energy_data.index if not energy_data.empty else
+                                 cycle_arrays.get('start_time', np.empty(0, dtype='datetime64[ns]'))).sort_values()
+        # The last sample stands for the interval up to the next one
+        step = (times[1:] - times[:-1]).min() if len(times) > 1 else pd.Timedelta(0)
+        return np.asarray((hours >= times[0]) & (hours + pd.Timedelta(hours=1) <= times[-1] + step))
+
+    def _rebuild(self, period: str, hours: pd.DatetimeIndex, machine: str) -> List[tuple]:
+        """Recompute the buckets of a period that contain the given hours from the stored hour rows."""
+        touched = self._bucket_starts(hours, period).unique()
+        # Shifts and days are at most a day long
+        stored = self.query("hour", touched.min(), touched.max() + pd.Timedelta(days=1), machine)
+        frame = self._aggregate(stored.drop(columns='machine'), period)
+        return self._rows(period, frame[frame.index.isin(touched)], machine)
+
+    def query(self, period: str = "day", start: Optional[pd.Timestamp] = None,
+              end: Optional[pd.Timestamp] = None, machine: Optional[str] = None) -> pd.DataFrame:
+        """
+        Read stored rollup rows.
+
+        Args:
+            period: "hour", "shift" or "day"
+            start: Optional first bucket start (inclusive)
+            end: Optional end of the range (exclusive)
+            machine: Optional machine name; all machines when None
+
+        Returns:
+            DataFrame indexed by bucket_start with a machine column and the aggregates
+        """
+        if period not in PERIODS:
+            raise ValueError(f"Unknown rollup period: {period}")
+        conditions, parameters = ["period = ?"], [period]
+        if start is not None:
+            conditions.append("bucket_start >= ?")
+            parameters.append(pd.Timestamp(start).strftime(TIME_FORMAT))
+        if end is not None:
+            conditions.append("bucket_start < ?")
+            parameters.append(pd.Timestamp(end).strftime(TIME_FORMAT))
+        if machine is not None:
+            conditions.append("machine = ?")
+            parameters.append(machine)
+        with self._lock:
+            frame = pd.read_sql_query(
+                f"SELECT bucket_start, machine, {', '.join(SUM_COLUMNS)}, energy_peak FROM rollups "
+                f"WHERE {' AND '.join(conditions)} ORDER BY bucket_start, machine", self.connection,
+                params=parameters)
+        frame['bucket_start'] = pd.to_datetime(frame['bucket_start'], format=TIME_FORMAT)
+        return frame.set_index('bucket_start')
+
+    def rollup(self, freq: str = "MS", start: Optional[pd.Timestamp] = None, end: Optional[pd.Timestamp] = None,
+               machine: Optional[str] = None) -> pd.DataFrame:
+        """
+        Assemble longer-period aggregates, e.g. months or years, from the daily rows.
+
+        Args:
+            freq: Pandas frequency of the output periods, e.g. "MS", "W" or "YS"
+            start: Optional start of the range (inclusive)
+            end: Optional end of the range (exclusive)
+            machine: Optional machine name; all machines summed when None
+
+        Returns:
+            DataFrame per period with the summed aggregates, the peak energy,
+            average_energy, anomaly_rate and average cycle duration and energy
+        """
+        daily = self.query("day", start, end, machine)
+        grouped = daily.resample(freq)
+        frame = grouped[list(SUM_COLUMNS)].sum()
+        frame['energy_peak'] = grouped['energy_peak'].max()
+        frame = frame[frame['energy_samples'] + frame['cycle_count'] > 0]
+
+        cycles = frame['cycle_count'].where(frame['cycle_count'] > 0)
+        frame['average_energy'] = frame['energy_total'] / frame['energy_samples'].where(frame['energy_samples'] > 0)
+        frame['anomaly_rate'] = (frame['anomaly_count'] / cycles).fillna(0.0)
+        frame['average_cycle_duration'] = frame['cycle_duration'] / cycles
+        frame['average_cycle_energy'] = frame['cycle_energy'] / cycles
+        return frame
+
+    def _hourly(self, energy_data: pd.DataFrame, cycle_arrays: Dict[str, np.ndarray],
+                quality_result: Optional[QualityResult]) -> pd.DataFrame:
+        """Aggregate energy samples and cycles per hour."""
+        parts = []
+        if not energy_data.empty:
+            values = energy_data.iloc[:, 0]
+            grouped = values.groupby(pd.DatetimeIndex(energy_data.index).floor("h"))
+            parts.append(pd.DataFrame({'energy_total': grouped.sum(), 'energy_samples': grouped.count(),
+                                       'energy_peak': grouped.max()}))
+
+        start_times = pd.DatetimeIndex(cycle_arrays.get('start_time', np.empty(0, dtype='datetime64[ns]')))
+        if len(start_times):
+            cycles = pd.DataFrame({
+                'cycle_count': np.ones(len(start_times), dtype=np.int64),
+                'cycle_energy': np.asarray(cycle_arrays['energy'], dtype=np.float64),
+                'cycle_duration': np.asarray(cycle_arrays['duration'], dtype=np.float64),
+            }, index=start_times.floor("h"))
+            if quality_result is not None:
+                cycles['anomaly_count'] = quality_result.is_anomalous.astype(np.int64)
+                one_hot = np.eye(len(QUALITY_GRADES), dtype=np.int64)[quality_result.grade_codes]
+                for i, column in enumerate(GRADE_COLUMNS):
+                    cycles[column] = one_hot[:, i]
+            parts.append(cycles.groupby(level=0).sum())
+
+        if not parts:
+            return pd.DataFrame()
+        hourly = pd.concat(parts, axis=1)
+        for column in SUM_COLUMNS:
+            if column not in hourly:
+                hourly[column] = 0
+        hourly[list(SUM_COLUMNS)] = hourly[list(SUM_COLUMNS)].fillna(0)
+        if 'energy_peak' not in hourly:
+            hourly['energy_peak'] = np.nan
+        return hourly.sort_index()
+
+    def _bucket_starts(self, hours: pd.DatetimeIndex, period: str) -> pd.DatetimeIndex:
+        """Map hour starts to the start of their hour, shift or day."""
+        if period == "hour":
+            return hours
+        days = hours.floor("D")
+        if period == "day":
+            return days
+        # A shift starts at the last shift start at or before the hour, possibly on the previous day
+        shift = np.searchsorted(self.shift_starts, hours.hour, side="right") - 1
+        previous_day = shift < 0
+        start_hours = self.shift_starts[np.where(previous_day, len(self.shift_starts) - 1, shift)]
+        return days - pd.to_timedelta(previous_day.astype(np.int64), unit="D") + pd.to_timedelta(start_hours, unit="h")
@@ -0,0 +1,349 @@
+"""
+Running Statistics - Mergeable accumulators for cycle statistics.
+"""
+
+import numpy as np
+from typing import Dict, Iterable, List
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class RunningStats:
+    """
+    Count, mean, standard deviation, min, max and sum of a stream of values.
+
+    Batches are folded in with Welford/Chan updates, so two accumulators built
+    on different parts of the data can be merged into the statistics of the
+    whole.
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.min = np.inf
+        self.max = -np.inf
+        self.total = 0.0
+
+    def update(self, values: Iterable[float]) -> "RunningStats":
+        """
+        Add a batch of values.
+
+        Args:
+            values: Values to add
+
+        Returns:
+            The updated accumulator
+        """
+        values = np.asarray(values, dtype=np.float64).ravel()
+        if len(values) == 0:
+            return self
+        batch = RunningStats()
+        batch.count = len(values)
+        batch.mean = float(values.mean())
+        batch.m2 = float(((values - batch.mean) ** 2).sum())
+        batch.min = float(values.min())
+        batch.max = float(values.max())
+        batch.total = float(values.sum())
+        return self.merge(batch)
+
+    def push(self, value: float) -> "RunningStats":
+        """Add a single value in O(1) with Welford's update."""
+        value = float(value)
+        self.count += 1
+        delta = value - self.mean
+        self.mean += delta / self.count
+        self.m2 += delta * (value - self.mean)
+        self.min = min(self.min, value)
+        self.max = max(self.max, value)
+        self.total += value
+        return self
+
+    def merge(self, other: "RunningStats") -> "RunningStats":
+        """
+        Merge another accumulator into this one (Chan et al.).
+
+        Args:
+            other: Accumulator to merge
+
+        Returns:
+            The updated accumulator
+        """
+        if other.count == 0:
+            return self
+        if self.count == 0:
+            self.count, self.mean, self.m2 = other.count, other.mean, other.m2
+            self.min, self.max, self.total = other.min, other.max, other.total
+            return self
+        count = self.count + other.count
+        delta = other.mean - self.mean
+        self.mean += delta * other.count / count
+        self.m2 += other.m2 + delta * delta * self.count * other.count / count
+        self.count = count
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        self.total += other.total
+        return self
+
+    @property
+    def variance(self) -> float:
+        """Population variance, as ``np.var``."""
+        return self.m2 / self.count if self.count else float("nan")
+
+    @property
+    def std(self) -> float:
+        """Population standard deviation, as ``np.std``."""
+        return float(np.sqrt(self.variance)) if self.count else float("nan")
+
+    def get_state(self) -> np.ndarray:
+        """Serialize the accumulator to a float array."""
+        return np.array([self.count, self.mean, self.m2, self.min, self.max, self.total], dtype=np.float64)
+
+    @classmethod
+    def from_state(cls, state: np.ndarray) -> "RunningStats":
+        """Restore an accumulator from ``get_state`` output."""
+        stats = cls()
+        stats.count = int(state[0])
+        stats.mean, stats.m2, stats.min, stats.max, stats.total = (float(value) for value in state[1:6])
+        return stats
+
+
+class QuantileSketch:
+    """
+    Mergeable quantile sketch with compactors (KLL style).
+
+    Values are kept exactly until ``capacity`` is exceeded. Beyond that, each
+    full level is sorted and every other item is promoted to the next level
+    with doubled weight. The rank error grows roughly as 1 / capacity.
+    """
+
+    def __init__(self, capacity: int = 4096):
+        """
+        Initialize the sketch.
+
+        Args:
+            capacity: Number of items kept per level
+        """
+        if capacity < 2:
+            raise ValueError("capacity must be at least 2")
+        self.capacity = capacity
+        self.count = 0
+        self.levels: List[np.ndarray] = [np.empty(0, dtype=np.float64)]
+        self._compactions = 0
+
+    @property
+    def is_exact(self) -> bool:
+        """Whether every value added is still stored."""
+        return len(self.levels) == 1
+
+    def update(self, values: Iterable[float]) -> "QuantileSketch":
+        """Add a batch of values."""
+        values = np.asarray(values, dtype=np.float64).ravel()
+        self.count += len(values)
+        self.levels[0] = np.concatenate((self.levels[0], values))
+        self._compress()
+        return self
+
+    def merge(self, other: "QuantileSketch") -> "QuantileSketch":
+        """Merge another sketch into this one."""
+        for level, items in enumerate(other.levels):
+            if level >= len(self.levels):
+                self.levels.append(np.empty(0, dtype=np.float64))
+            self.levels[level] = np.concatenate((self.levels[level], items))
+        self.count += other.count
+        self._compress()
+        return self
+
+    def quantile(self, q: float) -> float:
+        """
+        Estimate the q-quantile. Exact, and equal to ``np.quantile``, while no compaction happened.
+
+        Args:
+            q: Quantile in [0, 1]
+
+        Returns:
+            Estimated quantile
+        """
+        if self.count == 0:
+            return float("nan")
+        if self.is_exact:
+            return float(np.quantile(self.levels[0], q))
+
+        values = np.concatenate(self.levels)
+        weights = np.concatenate([np.full(len(items), 2.0 ** level) for level, items in enumerate(self.levels)])
+        order = np.argsort(values, kind="stable")
+        cumulative = np.cumsum(weights[order])
+        position = np.searchsorted(cumulative, q * cumulative[-1], side="left")
+        return float(values[order][min(position, len(values) - 1)])
+
+    def median(self) -> float:
+        """Estimate the median."""
+        return self.quantile(0.5)
+
+    def _compress(self) -> None:
+        """Compact every level that holds more than ``capacity`` items."""
+        level = 0
+        while level < len(self.levels):
+            items = self.levels[level]
+            if len(items) > self.capacity:
+                items = np.sort(items)
+                # Keep an unpaired item at this level so that weight is preserved
+                carry = items[-1:] if len(items) % 2 else items[:0]
+                paired = items[:len(items) - len(carry)]
+                offset = self._compactions % 2
+                self._compactions += 1
+                if level + 1 == len(self.levels):
+                    self.levels.append(np.empty(0, dtype=np.float64))
+                self.levels[level + 1] = np.concatenate((self.levels[level + 1], paired[offset::2]))
+                self.levels[level] = carry
+            level += 1
+
+    def get_state(self) -> Dict[str, np.ndarray]:
+        """Serialize the sketch to arrays."""
+        state = {f"level_{level}": items for level, items in enumerate(self.levels)}
+        state["meta"] = np.array([self.capacity, self.count, self._compactions, len(self.levels)], dtype=np.int64)
+        return state
+
+    @classmethod
+    def from_state(cls, state: Dict[str, np.ndarray]) -> "QuantileSketch":
+        """Restore a sketch from ``get_state`` output."""
+        capacity, count, compactions, n_levels = (int(value) for value in state["meta"])
+        sketch = cls(capacity)
+        sketch.count = count
+        sketch._compactions = compactions
+        sketch.levels = [np.asarray(state[f"level_{level}"], dtype=np.float64) for level in range(n_levels)]
+        return sketch
+
+
+class CycleStatisticsAccumulator:
+    """
+    Mergeable accumulator producing the ``cycle_statistics`` dictionary.
+
+    Keeps running statistics of durations, energy consumption, peak energy
+    and variation, plus quantile sketches for the duration and variation
+    medians. Accumulators from different shards, days or machines can be
+    merged.
+    """
+
+    FEATURES = ("duration", "energy", "peak", "variation")
+
+    def __init__(self, sketch_capacity: int = 4096):
+        """
+        Initialize the accumulator.
+
+        Args:
+            sketch_capacity: Capacity of the median sketches
+        """
+        self.sketch_capacity = sketch_capacity
+        self.stats = {feature: RunningStats() for feature in self.FEATURES}
+        self.sketches = {
+            "duration": QuantileSketch(sketch_capacity),
+            "variation": QuantileSketch(sketch_capacity),
+        }
+
+    @property
+    def count(self) -> int:
+        return self.stats["duration"].count
+
+    def update(self, durations: np.ndarray, energies: np.ndarray, peaks: np.ndarray,
+               variations: np.ndarray) -> "CycleStatisticsAccumulator":
+        """
+        Add a batch of cycles given as arrays.
+
+        Args:
+            durations: Cycle durations in seconds
+            energies: Cycle energy consumptions
+            peaks: Cycle peak energies
+            variations: Cycle variations
+
+        Returns:
+            The updated accumulator
+        """
+        for feature, values in zip(self.FEATURES, (durations, energies, peaks, variations)):
+            self.stats[feature].update(values)
+        self.sketches["duration"].update(durations)
+        self.sketches["variation"].update(variations)
+        return self
+
+    def add_cycles(self, cycles: List) -> "CycleStatisticsAccumulator":
+        """
+        Add ProductionCycle objects.
+
+        Args:
+            cycles: List of ProductionCycle objects
+
+        Returns:
+            The updated accumulator
+        """
+        return self.update(
+            np.array([cycle.duration.total_seconds() for cycle in cycles], dtype=np.float64),
+            np.array([cycle.energy_consumption for cycle in cycles], dtype=np.float64),
+            np.array([cycle.peak_energy for cycle in cycles], dtype=np.float64),
+            np.array([cycle.variation for cycle in cycles], dtype=np.float64),
+        )
+
+    def merge(self, other: "CycleStatisticsAccumulator") -> "CycleStatisticsAccumulator":
+        """Merge another accumulator into this one."""
+        for feature in self.FEATURES:
+            self.stats[feature].merge(other.stats[feature])
+        for name, sketch in self.sketches.items():
+            sketch.merge(other.sketches[name])
+        return self
+
+    def to_dict(self) -> Dict:
+        """
+        Build the ``cycle_statistics`` dictionary used by CycleSegmenter and QualityAnalyzer.
+
+        Returns:
+            Dictionary with cycle statistics, empty when no cycles were added
+        """
+        if self.count == 0:
+            return {}
+        duration, energy = self.stats["duration"], self.stats["energy"]
+        peak, variation = self.stats["peak"], self.stats["variation"]
+        return {
+            'total_cycles': duration.count,
+            'duration_stats': {
+                'mean': duration.mean,
+                'std': duration.std,
+                'min': duration.min,
+                'max': duration.max,
+                'median': self.sketches["duration"].median()
+            },
+            'energy_stats': {
+                'mean': energy.mean,
+                'std': energy.std,
+                'mean_peak': peak.mean,
+                'std_peak': peak.std,
+                'total_energy': energy.total
+            },
+            'variation_stats': {
+                'mean': variation.mean,
+                'std': variation.std,
+                'min': variation.min,
+                'max': variation.max,
+                'median': self.sketches["variation"].median()
+            }
+        }
+
+    def get_state(self) -> Dict[str, np.ndarray]:
+        """Serialize the accumulator to arrays."""
+        state = {f"stats_{feature}": stats.get_state() for feature, stats in self.stats.items()}
+        state["sketch_capacity"] = np.array(self.sketch_capacity, dtype=np.int64)
+        for name, sketch in self.sketches.items():
+            state.update({f"sketch_{name}_{key}": value for key, value in sketch.get_state().items()})
+        return state
+
+    @classmethod
+    def from_state(cls, state: Dict[str, np.ndarray]) -> "CycleStatisticsAccumulator":
+        """Restore an accumulator from ``get_state`` output."""
+        # States saved before the capacity was stored keep it in the sketch metadata
+        capacity = state.get("sketch_capacity", state["sketch_duration_meta"][0])
+        accumulator = cls(int(capacity))
+        accumulator.stats = {feature: RunningStats.from_state(state[f"stats_{feature}"]) for feature in cls.FEATURES}
+        for name in accumulator.sketches:
+            prefix = f"sketch_{name}_"
+            accumulator.sketches[name] = QuantileSketch.from_state(
+                {key[len(prefix):]: value for key, value in state.items() if key.startswith(prefix)})
+        return accumulator
@@ -0,0 +1,95 @@
+"""
+Sharding - Helpers for splitting a time axis into shards and processing them in parallel.
+"""
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, List, Optional, Sequence, Tuple
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+def resolve_workers(n_workers: Optional[int] = None) -> int:
+    """
+    Resolve the number of worker processes to use.
+
+    Args:
+        n_workers: Requested number of workers (None uses all available cores)
+
+    Returns:
+        Number of workers, at least 1
+    """
+    if n_workers is None:
+        n_workers = os.cpu_count() or 1
+    return max(1, int(n_workers))
+
+
+def shard_bounds(n_samples: int, shard_size: int, overlap: int = 0) -> List[Tuple[int, int, int, int]]:
+    """
+    Split a time axis of ``n_samples`` rows into contiguous shards.
+
+    Each shard owns the half-open core range ``[core_start, core_end)``. The
+    loaded range ``[start, end)`` extends the core by ``overlap`` rows on each
+    side (clipped to the data) so that windowed computations are exact inside
+    the core.
+
+    Args:
+        n_samples: Total number of rows
+        shard_size: Number of core rows per shard
+        overlap: Number of extra rows loaded on each side of the core
+
+    Returns:
+        List of (start, end, core_start, core_end) tuples
+    """
+    if shard_size <= 0:
+        raise ValueError("shard_size must be a positive integer")
+    if overlap < 0:
+        raise ValueError("overlap must be non-negative")
+
+    bounds = []
+    for core_start in range(0, n_samples, shard_size):
+        core_end = min(core_start + shard_size, n_samples)
+        start = max(0, core_start - overlap)
+        end = min(n_samples, core_end + overlap)
+        bounds.append((start, end, core_start, core_end))
+    return bounds
+
+
+def default_shard_size(n_samples: int, n_workers: int) -> int:
+    """
+    Choose a shard size giving each worker a single shard.
+
+    Args:
+        n_samples: Total number of rows
+        n_workers: Number of workers
+
+    Returns:
+        Shard size in rows
+    """
+    return max(1, -(-n_samples // max(1, n_workers)))
+
+
+def run_sharded(func: Callable, tasks: Sequence, n_workers: int) -> List:
+    """
+    Apply ``func`` to every task, in a process pool when more than one worker is requested.
+
+    Results are returned in task order. ``func`` must be a module-level
+    function so that it can be pickled.
+
+    Args:
+        func: Function to apply to each task
+        tasks: Sequence of task arguments
+        n_workers: Number of worker processes
+
+    Returns:
+        List of results in task order
+    """
+    if n_workers <= 1 or len(tasks) <= 1:
+        return [func(task) for task in tasks]
+
+    with ProcessPoolExecutor(max_workers=min(n_workers, len(tasks))) as executor:
+        results = list(executor.map(func, tasks))
+
+    logger.debug(f"Processed {len(tasks)} shards with {n_workers} workers")
+    return results
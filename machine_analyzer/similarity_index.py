@@ -0,0 +1,388 @@
+"""
+Similarity Index - Nearest-neighbour search over production cycles.
+"""
+
+import numpy as np
+from typing import Dict, List, Optional, Tuple
+import logging
+from machine_analyzer.cycle_segmenter import CycleSegmenter
+
+logger = logging.getLogger(__name__)
+
+
+def _distances(vectors: np.ndarray, vector: np.ndarray) -> np.ndarray:
+    """Euclidean distances of the rows of ``vectors`` to ``vector``."""
+    differences = vectors - vector
+    return np.sqrt(np.einsum("ij,ij->i", differences, differences))
+
+
+class CycleSimilarityIndex:
+    """
+    Approximate k-nearest-neighbour index over cycle feature vectors.
+
+    Features are standardized and reduced with PCA, then hashed into several
+    random-projection LSH tables (p-stable hashing for Euclidean distance).
+    A query looks up its bucket in every table and ranks the union of the
+    candidates by exact distance in the reduced space. When the buckets hold
+    fewer than k candidates, as for outliers, the neighbouring buckets are
+    probed (multi-probe LSH), then a window of rows around the query along
+    the first principal component is widened step by step up to
+    ``max_candidates`` rows. The transform is fixed
+    at ``fit`` time, so new cycles can be inserted incrementally with ``add``.
+    Missing feature values are imputed with the feature means seen by ``fit``;
+    infinite values are rejected. The bucket width used for hashing is
+    ``bucket_width_``, which ``fit`` estimates when ``bucket_width`` is None.
+    """
+
+    def __init__(self, n_components: int = 8, n_tables: int = 8, n_bits: int = 6,
+                 bucket_width: Optional[float] = None, target_candidates: int = 128, seed: int = 0,
+                 max_candidates: int = 16384):
+        """
+        Initialize the similarity index.
+
+        Args:
+            n_components: Number of PCA dimensions kept
+            n_tables: Number of LSH hash tables
+            n_bits: Number of hash functions combined per table
+            bucket_width: Width of the hash buckets (None estimates it from the data)
+            target_candidates: Expected bucket size used to estimate the bucket width
+            seed: Seed for the random projections
+            max_candidates: Maximum number of rows ranked for a query whose
+                hash buckets hold fewer than k candidates
+        """
+        self.n_components = n_components
+        self.n_tables = n_tables
+        self.n_bits = n_bits
+        self.bucket_width = bucket_width
+        self.target_candidates = target_candidates
+        self.seed = seed
+        self.max_candidates = max_candidates
+
+        self.is_fitted = False
+        self.bucket_width_ = None
+        self._mean = None
+        self._scale = None
+        self._components = None
+        self._projections = None
+        self._offsets = None
+        self._key_weights = None
+        self._vectors = np.empty((0, 0), dtype=np.float32)
+        self._cycle_ids = np.empty(0, dtype=np.int64)
+        self._size = 0
+        self._buckets: List[Dict[int, List[int]]] = []
+        self._bucket_cache: List[Dict[int, np.ndarray]] = []
+        self._order = None
+        self._sorted_vectors = None
+
+    def __len__(self) -> int:
+        return self._size
+
+    @classmethod
+    def from_segmenter(cls, segmenter: CycleSegmenter, shape_length: int = 32,
+                       **kwargs) -> "CycleSimilarityIndex":
+        """
+        Build an index over the cycles of a segmenter.
+
+        Args:
+            segmenter: CycleSegmenter with segmented cycles
+            shape_length: Number of shape points per cycle
+            **kwargs: Arguments for the index constructor
+
+        Returns:
+            Fitted CycleSimilarityIndex
+        """
+        index = cls(**kwargs)
+        features = segmenter.get_cycle_feature_matrix(shape_length=shape_length)
+        cycle_ids = np.array([cycle.cycle_id for cycle in segmenter.get_cycles()], dtype=np.int64)
+        return index.fit(features, cycle_ids)
+
+    def fit(self, features: np.ndarray, cycle_ids: Optional[np.ndarray] = None) -> "CycleSimilarityIndex":
+        """
+        Fit the feature transform and hash tables, and index the given cycles.
+
+        Args:
+            features: Array of shape (n_cycles, n_features)
+            cycle_ids: Cycle IDs for the rows (defaults to row numbers)
+
+        Returns:
+            The fitted index
+        """
+        features = np.asarray(features, dtype=np.float64)
+        if features.ndim != 2 or len(features) == 0:
+            raise ValueError("features must be a non-empty 2D array")
+        if np.isinf(features).any():
+            raise ValueError("features must not contain infinite values")
+
+        rng = np.random.default_rng(self.seed)
+
+        # Missing values are imputed with the feature mean, i.e. 0 after standardizing
+        missing = np.isnan(features)
+        counts = (~missing).sum(axis=0)
+        sums = np.where(missing, 0.0, features).sum(axis=0)
+        self._mean = np.divide(sums, counts, out=np.zeros(features.shape[1]), where=counts > 0)
+        standardized = np.where(missing, 0.0, features - self._mean)
+        scale = np.sqrt((standardized ** 2).sum(axis=0) / np.maximum(counts, 1))
+        self._scale = np.where(scale > 0, scale, 1.0)
+        standardized /= self._scale
+
+        # PCA on the standardized features via the covariance eigenvectors
+        eigenvalues, eigenvectors = np.linalg.eigh(standardized.T @ standardized)
+        n_components = min(self.n_components, len(eigenvalues))
+        self._components = eigenvectors[:, np.argsort(eigenvalues)[::-1][:n_components]]
+        reduced = standardized @ self._components
+
+        # Offsets are stored as fractions of the bucket width
+        n_hashes = self.n_tables * self.n_bits
+        self._projections = rng.standard_normal((n_components, n_hashes))
+        self._offsets = rng.uniform(0, 1, n_hashes)
+        self._key_weights = rng.integers(1, 2**61, self.n_bits, dtype=np.int64)
+        if self.bucket_width is None:
+            self.bucket_width_ = self._estimate_bucket_width(reduced, rng)
+        else:
+            self.bucket_width_ = float(self.bucket_width)
+
+        self._vectors = np.empty((0, n_components), dtype=np.float32)
+        self._cycle_ids = np.empty(0, dtype=np.int64)
+        self._size = 0
+        self._buckets = [{} for _ in range(self.n_tables)]
+        self._bucket_cache = [{} for _ in range(self.n_tables)]
+        self.is_fitted = True
+
+        self._insert(reduced, cycle_ids)
+        logger.info(f"Built cycle similarity index with {self._size} cycles")
+        return self
+
+    def add(self, features: np.ndarray, cycle_ids: Optional[np.ndarray] = None) -> None:
+        """
+        Insert new cycles using the transform fitted by ``fit``.
+
+        Args:
+            features: Array of shape (n_cycles, n_features)
+            cycle_ids: Cycle IDs for the rows (defaults to continuing row numbers)
+        """
+        if not self.is_fitted:
+            raise ValueError("Index must be fitted before adding cycles")
+        self._insert(self._transform(features), cycle_ids)
+
+    def query(self, features: np.ndarray, k: int = 5) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Find the k most similar indexed cycles.
+
+        When the hash buckets hold fewer than k candidates, the neighbouring
+        buckets are probed, and then rows close to the query along the first
+        principal component are added until the k nearest of them are exact
+        or ``max_candidates`` rows are reached.
+
+        Args:
+            features: Feature vector of one cycle, or array of shape (n_queries, n_features)
+            k: Number of neighbours
+
+        Returns:
+            Tuple of (cycle_ids, distances), each of shape (n_queries, k) or (k,)
+            for a single query. Missing neighbours are -1 with infinite distance.
+        """
+        if not self.is_fitted:
+            raise ValueError("Index must be fitted before querying")
+
+        features = np.asarray(features, dtype=np.float64)
+        single = features.ndim == 1
+        reduced = self._transform(np.atleast_2d(features))
+        positions = self._positions(reduced)
+        codes = np.floor(positions).astype(np.int64)
+        keys = self._keys(codes)
+
+        ids = np.full((len(reduced), k), -1, dtype=np.int64)
+        distances = np.full((len(reduced), k), np.inf)
+        # Distances are computed in the float32 precision of the stored vectors
+        for row, vector in enumerate(reduced.astype(np.float32)):
+            buckets = [self._bucket_array(table, int(keys[row, table])) for table in range(self.n_tables)]
+            candidates = np.sort(np.concatenate(buckets))
+            if len(candidates) > 1:
+                candidates = candidates[np.concatenate(([True], candidates[1:] != candidates[:-1]))]
+            candidate_distances = None
+            if len(candidates) < k:
+                candidates = self._probe_candidates(keys[row], positions[row] - codes[row], candidates, k)
+            if len(candidates) < k:
+                candidates, candidate_distances = self._window_candidates(vector, k)
+            if len(candidates) < k:
+                # Last resort when max_candidates is below k
+                candidates, candidate_distances = np.arange(self._size), None
+
+            if candidate_distances is None:
+                candidate_distances = _distances(self._vectors[candidates], vector)
+            n_found = min(k, len(candidates))
+            nearest = np.argpartition(candidate_distances, n_found - 1)[:n_found] if n_found else candidates[:0]
+            nearest = nearest[np.argsort(candidate_distances[nearest])]
+
+            ids[row, :n_found] = self._cycle_ids[candidates[nearest]]
+            distances[row, :n_found] = candidate_distances[nearest]
+
+        if single:
+            return ids[0], distances[0]
+        return ids, distances
+
+    def _bucket_array(self, table: int, key: int) -> np.ndarray:
+        """Return the rows of a bucket as an array, caching the conversion."""
+        cached = self._bucket_cache[table].get(key)
+        if cached is None:
+            if key not in self._buckets[table]:
+                return np.empty(0, dtype=np.int64)
+            cached = np.array(self._buckets[table][key], dtype=np.int64)
+            self._bucket_cache[table][key] = cached
+        return cached
+
+    def _transform(self, features: np.ndarray) -> np.ndarray:
+        """Standardize, impute and project features into the reduced space."""
+        features = np.atleast_2d(np.asarray(features, dtype=np.float64))
+        if np.isinf(features).any():
+            raise ValueError("features must not contain infinite values")
+        standardized = np.nan_to_num((features - self._mean) / self._scale, nan=0.0)
+        return standardized @ self._components
+
+    def _positions(self, reduced: np.ndarray) -> np.ndarray:
+        """Return the hash positions in units of the bucket width, shaped (n_rows, n_tables, n_bits)."""
+        positions = reduced @ self._projections / self.bucket_width_ + self._offsets
+        return positions.reshape(len(reduced), self.n_tables, self.n_bits)
+
+    def _keys(self, codes: np.ndarray) -> np.ndarray:
+        """Combine the integer hash codes of each table into one bucket key."""
+        # Integer overflow wraps around, which is fine for hashing
+        return codes @ self._key_weights
+
+    def _hash(self, reduced: np.ndarray) -> np.ndarray:
+        """Return one integer bucket key per table for each row."""
+        return self._keys(np.floor(self._positions(reduced)).astype(np.int64))
+
+    def _probe_candidates(self, keys: np.ndarray, fractions: np.ndarray, candidates: np.ndarray,
+                          k: int) -> np.ndarray:
+        """
+        Add the rows of neighbouring buckets, closest bucket boundary first, until there are k candidates.
+
+        A neighbouring bucket differs in one hash code by one. Its key is the
+        query key shifted by that code's weight, and its score is the
+        distance of the query to the shared boundary.
+        """
+        # Shifting a code by -1 or +1 moves the key by -weight or +weight (wrapping like the key itself)
+        shifts = np.stack((-self._key_weights, self._key_weights), axis=1)
+        probe_keys = keys[:, None, None] + shifts[None, :, :]
+        scores = np.stack((fractions, 1 - fractions), axis=2)
+        tables = np.broadcast_to(np.arange(self.n_tables)[:, None, None], scores.shape)
+
+        found = [candidates]
+        total = len(candidates)
+        for probe in np.argsort(scores, axis=None, kind="stable"):
+            bucket = self._bucket_array(int(tables.flat[probe]), int(probe_keys.flat[probe]))
+            if len(bucket):
+                found.append(bucket)
+                total += len(bucket)
+                if total >= k:
+                    merged = np.unique(np.concatenate(found))
+                    if len(merged) >= k:
+                        return merged
+        return np.unique(np.concatenate(found))
+
+    def _window_candidates(self, vector: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Rows nearest to the query along the first principal component, widened until the k nearest are exact.
+
+        The distance along one component is a lower bound of the full
+        distance, so once the k-th nearest row in the window is closer than
+        both window edges, no row outside the window can be closer. The
+        window stops growing at ``max_candidates`` rows. The vectors are kept
+        sorted by the first component, so each window is a contiguous slice.
+
+        Returns:
+            Tuple of (rows, distances to the query)
+        """
+        if self._order is None:
+            self._order = np.argsort(self._vectors[:self._size, 0], kind="stable")
+            self._sorted_vectors = self._vectors[self._order]
+        sorted_vectors = self._sorted_vectors
+        first = sorted_vectors[:, 0]
+        limit = min(self.max_candidates, self._size)
+        center = int(np.searchsorted(first, vector[0]))
+        half_width = max(k, 32)
+        while True:
+            low, high = max(0, center - half_width), min(self._size, center + half_width)
+            if high - low >= limit:
+                low = max(0, min(center - limit // 2, self._size - limit))
+                high = low + limit
+                return self._order[low:high], _distances(sorted_vectors[low:high], vector)
+            if high - low >= k:
+                window_distances = _distances(sorted_vectors[low:high], vector)
+                kth = np.partition(window_distances, k - 1)[k - 1]
+                below = vector[0] - first[low - 1] if low > 0 else np.inf
+                above = first[high] - vector[0] if high < self._size else np.inf
+                if kth <= min(below, above):
+                    return self._order[low:high], window_distances
+            half_width *= 2
+
+    def _insert(self, reduced: np.ndarray, cycle_ids: Optional[np.ndarray]) -> None:
+        """Append reduced vectors and register them in the hash tables."""
+        n_new = len(reduced)
+        if n_new == 0:
+            return
+        if cycle_ids is None:
+            cycle_ids = np.arange(self._size, self._size + n_new)
+        cycle_ids = np.asarray(cycle_ids, dtype=np.int64)
+        if len(cycle_ids) != n_new:
+            raise ValueError("cycle_ids must have one entry per feature row")
+
+        # Grow storage geometrically so repeated inserts stay amortized O(1)
+        required = self._size + n_new
+        if required > len(self._vectors):
+            capacity = max(required, 2 * len(self._vectors))
+            vectors = np.empty((capacity, reduced.shape[1]), dtype=np.float32)
+            vectors[:self._size] = self._vectors[:self._size]
+            ids = np.empty(capacity, dtype=np.int64)
+            ids[:self._size] = self._cycle_ids[:self._size]
+            self._vectors, self._cycle_ids = vectors, ids
+
+        rows = np.arange(self._size, required)
+        self._vectors[rows] = reduced
+        self._cycle_ids[rows] = cycle_ids
+        self._size = required
+        self._order = self._sorted_vectors = None
+
+        keys = self._hash(reduced)
+        for table in range(self.n_tables):
+            buckets = self._buckets[table]
+            cache = self._bucket_cache[table]
+            unique_keys, inverse = np.unique(keys[:, table], return_inverse=True)
+            order = np.argsort(inverse, kind="stable")
+            groups = np.split(rows[order], np.cumsum(np.bincount(inverse))[:-1])
+            for key, group in zip(unique_keys.tolist(), groups):
+                buckets.setdefault(key, []).extend(group.tolist())
+                cache.pop(key, None)
+
+    def _estimate_bucket_width(self, reduced: np.ndarray, rng: np.random.Generator) -> float:
+        """
+        Choose the bucket width giving about ``target_candidates`` rows per bucket.
+
+        The expected bucket size of a random row is measured on the first hash
+        table over a sample, scaled to the full data, and the width is found by
+        bisection in log space.
+        """
+        sample_size = min(len(reduced), 100000)
+        sample = reduced[rng.choice(len(reduced), sample_size, replace=False)]
+        scale = len(reduced) / sample_size
+        projected = sample @ self._projections[:, :self.n_bits]
+        phases = self._offsets[:self.n_bits]
+
+        def expected_bucket_size(width: float) -> float:
+            codes = np.floor(projected / width + phases).astype(np.int64)
+            keys = codes @ self._key_weights
+            _, counts = np.unique(keys, return_counts=True)
+            return float((counts.astype(np.float64) ** 2).sum() / sample_size * scale)
+
+        spread = float(projected.max() - projected.min())
+        if spread <= 0:
+            return 1.0
+        low, high = np.log(spread * 1e-6), np.log(spread * 2)
+        for _ in range(30):
+            middle = (low + high) / 2
+            if expected_bucket_size(np.exp(middle)) > self.target_candidates:
+                high = middle
+            else:
+                low = middle
+        return float(np.exp(low))
@@ -6,6 +6,7 @@ import pandas as pd
 import numpy as np
 from typing import Dict, Tuple, Optional
 import logging
+from machine_analyzer.sharding import default_shard_size, resolve_workers, run_sharded, shard_bounds
 
 logger = logging.getLogger(__name__)
 
@@ -30,6 +31,49 @@ def calculate_iqr_bounds(dataframe: pd.DataFrame, column_name: str, upper_coeffi
     return (mean_value - iqr * lower_coefficient, mean_value + iqr * upper_coefficient)
 
 
+# Machine states in the order of the codes returned by detect_state_codes
+STATE_NAMES = ("off", "on", "standby", "production")
+
+
+def detect_state_codes(values: np.ndarray, window_size: int = 20, production_threshold: float = 5,
+                       shard_size: int = 65536) -> np.ndarray:
+    """
+    Detect machine states on a plain energy array, without building DataFrame columns.
+    
+    Applies the same rules as ``StateDetector.detect_states``. The rolling
+    median is computed shard by shard into one output array, so temporary
+    memory is bounded by the shard size rather than the length of the data.
+    
+    Args:
+        values: Energy values in time order
+        window_size: Rolling window size for calculations
+        production_threshold: Maximum energy threshold for production state
+        shard_size: Number of rows per rolling median shard
+        
+    Returns:
+        uint8 array of indices into STATE_NAMES, one per value
+    """
+    threshold = np.empty(len(values), dtype=np.float64)
+    for start, end, core_start, core_end in shard_bounds(len(values), shard_size, overlap=window_size):
+        threshold[core_start:core_end] = _rolling_median_shard(
+            (values[start:end], window_size, core_start - start, core_end - start))
+    filled = pd.Series(threshold, copy=False)
+    filled.bfill(inplace=True)
+    filled.ffill(inplace=True)
+    
+    codes = np.full(len(values), STATE_NAMES.index("production"), dtype=np.uint8)
+    codes[threshold < production_threshold] = STATE_NAMES.index("standby")
+    codes[(values == 0) & (threshold == 0)] = STATE_NAMES.index("off")
+    return codes
+
+
+def _rolling_median_shard(task: Tuple[np.ndarray, int, int, int]) -> np.ndarray:
+    """Compute the centered rolling median of one shard and return its core rows."""
+    values, window_size, core_start, core_end = task
+    medians = pd.Series(values).rolling(window=window_size, center=True).median().to_numpy()
+    return medians[core_start:core_end]
+
+
 class StateDetector:
     """
     Detects machine states and manages state masks.
@@ -68,7 +112,53 @@ class StateDetector:
             raise ValueError("Energy data must be provided before state detection")
         
         # Calculate moving average 
-        self.energy_data["moving_median"] = self.energy_data[self.energy_column].rolling(window=window_size,center = True).median()
+        moving_median = self.energy_data[self.energy_column].rolling(window=window_size,center = True).median()
+        
+        return self._assign_states(moving_median, production_threshold, keep_threshold_column)
+    
+    def detect_states_sharded(self, window_size: int = 20, production_threshold: float = 5,
+                              keep_threshold_column: bool = False, n_workers: Optional[int] = None,
+                              shard_size: Optional[int] = None) -> Dict[str, pd.Series]:
+        """
+        Detect machine states by computing the rolling median over time shards in a process pool.
+        
+        Shards overlap by ``window_size`` rows so the centered rolling median is
+        exact in each shard core. The result is identical to ``detect_states``.
+        
+        Args:
+            window_size: Rolling window size for calculations
+            production_threshold: Maximum energy threshold for production state
+            keep_threshold_column: Whether to keep the threshold column
+            n_workers: Number of worker processes (None uses all cores)
+            shard_size: Number of rows per shard (None gives one shard per worker)
+            
+        Returns:
+            Dictionary containing state masks
+        """
+        if self.energy_data is None:
+            raise ValueError("Energy data must be provided before state detection")
+        
+        n_workers = resolve_workers(n_workers)
+        values = self.energy_data[self.energy_column].to_numpy(dtype=np.float64)
+        if shard_size is None:
+            shard_size = default_shard_size(len(values), n_workers)
+        
+        tasks = [
+            (values[start:end], window_size, core_start - start, core_end - start)
+            for start, end, core_start, core_end in shard_bounds(len(values), shard_size, overlap=window_size)
+        ]
+        medians = run_sharded(_rolling_median_shard, tasks, n_workers)
+        moving_median = pd.Series(
+            np.concatenate(medians) if medians else np.array([], dtype=np.float64),
+            index=self.energy_data.index
+        )
+        
+        return self._assign_states(moving_median, production_threshold, keep_threshold_column)
+    
+    def _assign_states(self, moving_median: pd.Series, production_threshold: float,
+                       keep_threshold_column: bool) -> Dict[str, pd.Series]:
+        """Derive state columns and masks from the moving median of the energy column."""
+        self.energy_data["moving_median"] = moving_median
         
         self.energy_data["dynamic_threshold"] = self.energy_data["moving_median"]
         
@@ -0,0 +1,104 @@
+"""
+Template Deviation - Compare cycle profiles with reference ("golden") cycles.
+"""
+
+import numpy as np
+from typing import Optional, Tuple
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class TemplateDeviation:
+    """
+    Deviation of length-normalized cycle profiles from reference templates.
+
+    Every cycle is compared with every template in one broadcast operation
+    per chunk of cycles. Each cycle is assigned the template with the
+    smallest integrated (mean absolute) deviation, and that template's
+    integrated and maximum absolute deviations are reported.
+    """
+
+    def __init__(self, templates: np.ndarray, max_deviation: Optional[float] = None,
+                 integrated_deviation: Optional[float] = None, relative: bool = True,
+                 chunk_size: int = 4096):
+        """
+        Initialize the template comparison.
+
+        Args:
+            templates: Reference profiles of shape (n_templates, length)
+            max_deviation: Limit on the maximum absolute deviation
+            integrated_deviation: Limit on the mean absolute deviation. When
+                neither limit is set, cycles are flagged statistically on the
+                integrated deviation with the "template" threshold factor.
+            relative: Whether deviations are divided by the mean absolute
+                level of the template
+            chunk_size: Number of cycles compared at once
+        """
+        templates = np.atleast_2d(np.asarray(templates, dtype=np.float64))
+        if templates.shape[0] == 0 or templates.shape[1] < 2:
+            raise ValueError("templates must have at least one profile of length 2 or more")
+        self.templates = templates
+        self.length = templates.shape[1]
+        self.max_deviation = max_deviation
+        self.integrated_deviation = integrated_deviation
+        self.relative = relative
+        self.chunk_size = chunk_size
+
+        level = np.abs(templates).mean(axis=1)
+        self._scale = np.where(level > 0, level, 1.0) if relative else np.ones(len(templates))
+
+    def compute(self, shapes: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Compute the deviation of every cycle from its closest template.
+
+        Args:
+            shapes: Cycle profiles of shape (n_cycles, length), e.g. from
+                ``CycleSegmenter.get_cycle_shape_matrix``
+
+        Returns:
+            Tuple of (template index, integrated deviation, maximum deviation)
+        """
+        shapes = np.atleast_2d(np.asarray(shapes, dtype=np.float64))
+        if shapes.shape[1] != self.length:
+            raise ValueError(f"Cycle shapes must have length {self.length}, got {shapes.shape[1]}")
+
+        n_cycles = len(shapes)
+        template_index = np.zeros(n_cycles, dtype=np.int64)
+        integrated = np.empty(n_cycles)
+        maximum = np.empty(n_cycles)
+        rows = max(1, self.chunk_size // len(self.templates))
+        for start in range(0, n_cycles, rows):
+            chunk = shapes[start:start + rows]
+            deviation = np.abs(chunk[:, None, :] - self.templates[None, :, :]) / self._scale[None, :, None]
+            chunk_integrated = deviation.mean(axis=2)
+            best = chunk_integrated.argmin(axis=1)
+            picked = np.arange(len(chunk))
+            template_index[start:start + len(chunk)] = best
+            integrated[start:start + len(chunk)] = chunk_integrated[picked, best]
+            maximum[start:start + len(chunk)] = deviation[picked, best].max(axis=1)
+        return template_index, integrated, maximum
+
+    def check(self, shapes: np.ndarray, threshold_factor: float = 2.0) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Flag cycles that deviate too much from their closest template.
+
+        Args:
+            shapes: Cycle profiles of shape (n_cycles, length)
+            threshold_factor: Standard deviations above the mean integrated
+                deviation used when no explicit limit is set
+
+        Returns:
+            Tuple of (failed mask, template index, integrated deviation)
+        """
+        template_index, integrated, maximum = self.compute(shapes)
+        if self.max_deviation is None and self.integrated_deviation is None:
+            failed = integrated > integrated.mean() + threshold_factor * integrated.std() if len(integrated) else \
+                np.zeros(0, dtype=bool)
+        else:
+            failed = np.zeros(len(integrated), dtype=bool)
+            if self.max_deviation is not None:
+                failed |= maximum > self.max_deviation
+            if self.integrated_deviation is not None:
+                failed |= integrated > self.integrated_deviation
+        return failed, template_index, integrated
@@ -22,7 +22,7 @@ from machine_analyzer import (
 def create_test_dataset(size):
     """Create a test dataset of specified size."""
     np.random.seed(42)
-    timestamps = pd.date_range('2023-01-01', periods=size, freq='1S')
+    timestamps = pd.date_range('2023-01-01', periods=size, freq='1s')
     energy_values = np.random.normal(50, 20, size)
     
     # Add production cycles
@@ -178,6 +178,40 @@ def run_scalability_test():
               f"({result['cycles_found']} cycles)")
 
 
+def run_sharding_benchmark(dataset_size, max_workers):
+    """Benchmark sharded state detection and segmentation from 1 to max_workers cores."""
+    print("=== Sharded Segmentation Scaling Benchmark ===")
+    
+    data = create_test_dataset(dataset_size).set_index('timestamp')
+    
+    serial_detector = StateDetector(data, "value")
+    serial_masks = serial_detector.detect_states()
+    serial_cycles = CycleSegmenter(serial_detector.get_processed_data(), serial_masks, "value").segment_cycles()
+    
+    results = {}
+    for n_workers in range(1, max_workers + 1):
+        start_time = time.time()
+        detector = StateDetector(data, "value")
+        state_masks = detector.detect_states_sharded(n_workers=n_workers)
+        segmenter = CycleSegmenter(detector.get_processed_data(), state_masks, "value")
+        cycles = segmenter.segment_cycles_sharded(n_workers=n_workers)
+        execution_time = time.time() - start_time
+        
+        results[n_workers] = {
+            'execution_time': execution_time,
+            'cycles_found': len(cycles),
+            'matches_serial': cycles == serial_cycles
+        }
+    
+    baseline = results[1]['execution_time']
+    for n_workers, result in results.items():
+        print(f"Workers {n_workers}: {result['execution_time']:.2f}s "
+              f"(speedup {baseline / result['execution_time']:.2f}x, "
+              f"{result['cycles_found']} cycles, matches serial: {result['matches_serial']})")
+    
+    return results
+
+
 def main():
     parser = argparse.ArgumentParser(description='Load testing for machine_analyzer')
     parser.add_argument('--dataset-size', type=int, default=1000,
@@ -188,11 +222,17 @@ def main():
                        help='Use processes instead of threads')
     parser.add_argument('--scalability', action='store_true',
                        help='Run scalability test')
+    parser.add_argument('--sharding', action='store_true',
+                       help='Run sharded segmentation scaling benchmark')
+    parser.add_argument('--max-workers', type=int, default=mp.cpu_count(),
+                       help='Maximum number of workers for the sharding benchmark')
     
     args = parser.parse_args()
     
     if args.scalability:
         run_scalability_test()
+    elif args.sharding:
+        run_sharding_benchmark(args.dataset_size, args.max_workers)
     else:
         run_concurrent_tests(args.dataset_size, args.concurrent, args.use_processes)
 
@@ -0,0 +1,90 @@
+"""
+Tests for BaselineModel class.
+"""
+
+import pytest
+import numpy as np
+import pandas as pd
+from machine_analyzer.baseline_model import BaselineModel, hash_cycle_arrays
+from machine_analyzer.cycle_segmenter import ProductionCycle
+from machine_analyzer.quality_analyzer import QualityAnalyzer
+from machine_analyzer.running_statistics import CycleStatisticsAccumulator
+
+
+class TestBaselineModel:
+    """Test cases for BaselineModel class."""
+
+    @pytest.fixture
+    def history(self):
+        """Create 300 historical cycles over several days."""
+        rng = np.random.default_rng(3)
+        base_time = pd.Timestamp('2024-01-01')
+        cycles = []
+        for i in range(300):
+            duration = 900 + rng.normal(0, 20)
+            start = base_time + pd.Timedelta(minutes=30 * i)
+            cycles.append(ProductionCycle(i, start, start + pd.Timedelta(seconds=duration),
+                                          pd.Timedelta(seconds=duration), 1500 + rng.normal(0, 30),
+                                          150 + rng.normal(0, 3), 120.0, 0.2 + rng.normal(0, 0.01)))
+        return cycles
+
+    def test_build_records_metadata(self, history):
+        """Test that the model matches the history statistics and records its inputs."""
+        model = BaselineModel.from_cycles(history, threshold_factor={"energy": 3})
+
+        assert model.cycle_statistics == CycleStatisticsAccumulator().add_cycles(history).to_dict()
+        metadata = model.metadata
+        assert metadata['n_cycles'] == 300
+        assert metadata['model_version'] == 1
+        assert pd.Timestamp(metadata['start_time']) == history[0].start_time
+        assert pd.Timestamp(metadata['end_time']) == history[-1].start_time
+        assert metadata['parameters']['threshold_factor']['energy'] == 3
+        assert metadata['input_hash'] == hash_cycle_arrays(QualityAnalyzer({}, history).get_cycle_arrays())
+
+    def test_update_versions_and_chains_hash(self, history):
+        """Test that updates match a model built at once and change version and hash."""
+        model = BaselineModel.from_cycles(history[:200])
+        first_hash = model.metadata['input_hash']
+        model.update(QualityAnalyzer({}, history[200:]).get_cycle_arrays())
+
+        full = BaselineModel.from_cycles(history)
+        assert model.metadata['model_version'] == 2
+        assert model.metadata['input_hash'] not in (first_hash, full.metadata['input_hash'])
+        assert model.metadata['n_cycles'] == 300
+        assert model.cycle_statistics['energy_stats']['mean'] == pytest.approx(
+            full.cycle_statistics['energy_stats']['mean'])
+
+    def test_save_load_and_score(self, history, tmp_path):
+        """Test that a loaded model scores a new batch like a QualityAnalyzer on the history statistics."""
+        model = BaselineModel.from_cycles(history[:250], sketch_capacity=64)
+        path = str(tmp_path / "baseline.npz")
+        model.save(path)
+        loaded = BaselineModel.load(path)
+
+        assert loaded.metadata == model.metadata
+        assert loaded.accumulator.sketch_capacity == 64
+        assert loaded.cycle_statistics == model.cycle_statistics
+
+        batch = history[250:]
+        batch[5].energy_consumption = 2000
+        result = loaded.score(QualityAnalyzer({}, batch).get_cycle_arrays())
+        expected = QualityAnalyzer(model.cycle_statistics, batch).score_quality()
+        np.testing.assert_array_equal(result.issue_flags, expected.issue_flags)
+        assert batch[5].cycle_id in result.anomalous_units()
+
+        analyzer = loaded.create_analyzer(batch)
+        analyzer.analyze_quality()
+        assert analyzer.get_anomalous_units() == result.anomalous_units()
+
+    def test_empty_model(self, tmp_path):
+        """Test that an empty model cannot score and that unknown formats are rejected."""
+        model = BaselineModel()
+        with pytest.raises(ValueError):
+            model.score({'cycle_id': np.array([0]), 'duration': np.ones(1), 'energy': np.ones(1),
+                         'variation': np.ones(1)})
+
+        path = str(tmp_path / "baseline.npz")
+        model.metadata['format_version'] = 99
+        model.save(path)
+        with pytest.raises(ValueError):
+            BaselineModel.load(path)
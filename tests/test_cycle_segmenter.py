@@ -2,6 +2,7 @@
 Comprehensive tests for CycleSegmenter class.
 """
 
+import os
 import pytest
 import pandas as pd
 import numpy as np
@@ -204,6 +205,168 @@ class TestCycleSegmenter:
         with pytest.raises(ValueError, match="Production state mask not found"):
             segmenter.find_production_segments()
 
+    def test_segment_cycles_sharded_matches_serial(self, sample_energy_data, sample_state_masks):
+        """Test that sharded segmentation reproduces the serial result exactly."""
+        serial = CycleSegmenter(sample_energy_data, sample_state_masks, 'value')
+        expected = serial.segment_cycles(min_duration="1s")
+        
+        # Shard sizes chosen so that cycles cross shard boundaries
+        for shard_size in [1, 7, 30, 290, 1000]:
+            sharded = CycleSegmenter(sample_energy_data, sample_state_masks, 'value')
+            cycles = sharded.segment_cycles_sharded(min_duration="1s", n_workers=1, shard_size=shard_size)
+            
+            assert cycles == expected
+            assert [cycle.cycle_id for cycle in cycles] == list(range(len(expected)))
+            assert sharded.get_cycle_statistics() == serial.get_cycle_statistics()
+    
+    def test_segment_cycles_sharded_process_pool(self, sample_energy_data, sample_state_masks):
+        """Test sharded segmentation with a process pool."""
+        serial = CycleSegmenter(sample_energy_data, sample_state_masks, 'value')
+        sharded = CycleSegmenter(sample_energy_data, sample_state_masks, 'value')
+        
+        assert sharded.segment_cycles_sharded(n_workers=2, shard_size=300) == serial.segment_cycles()
+
+    def test_cycle_summaries_match_pandas_reductions(self):
+        """Test that cycle summaries are bit-identical to per-cycle pandas reductions."""
+        rng = np.random.default_rng(7)
+        timestamps = pd.date_range(start=datetime(2023, 1, 1), periods=20000, freq='1s')
+        values = rng.normal(25.0, 4.0, len(timestamps))
+        values[rng.random(len(values)) < 0.02] = np.nan
+        energy_data = pd.DataFrame({'value': values}, index=timestamps)
+        
+        # Runs from a single sample up to several pairwise summation blocks
+        production_mask = pd.Series(False, index=timestamps)
+        position = 0
+        while position < len(timestamps):
+            length = int(rng.integers(1, 700))
+            production_mask.iloc[position:position + length] = True
+            position += length + int(rng.integers(1, 20))
+        state_masks = {'production_state': production_mask}
+        
+        segmenter = CycleSegmenter(energy_data, state_masks, 'value')
+        cycles = segmenter.segment_cycles(min_duration="0s", max_duration="1000s")
+        sharded = CycleSegmenter(energy_data, state_masks, 'value')
+        assert sharded.segment_cycles_sharded(min_duration="0s", max_duration="1000s",
+                                              n_workers=1, shard_size=1500) == cycles
+        
+        assert len(cycles) > 40
+        for cycle in cycles:
+            cycle_energy = energy_data['value'][cycle.start_time:cycle.end_time]
+            mean = cycle_energy.mean()
+            assert cycle.energy_consumption == cycle_energy.sum()
+            assert cycle.peak_energy == cycle_energy.max()
+            assert cycle.average_energy == mean
+            if len(cycle_energy.dropna()) > 1:
+                assert cycle.variation == (cycle_energy.std() / mean if mean > 0 else 0)
+
+    def test_cycle_views(self, cycle_segmenter, sample_energy_data):
+        """Test zero-copy views of the samples of each cycle."""
+        cycles = cycle_segmenter.segment_cycles()
+        values = cycle_segmenter.get_energy_values()
+
+        for i, (cycle, view) in enumerate(zip(cycles, cycle_segmenter.iter_cycle_views())):
+            expected = sample_energy_data.loc[cycle.start_time:cycle.end_time, 'value'].to_numpy()
+            np.testing.assert_array_equal(view, expected)
+            np.testing.assert_array_equal(cycle_segmenter.cycle_view(i), expected)
+            assert np.shares_memory(view, values)
+            assert not view.flags.writeable
+
+        assert len(cycle_segmenter.cycle_starts) == len(cycles)
+        assert not cycle_segmenter.cycle_ends.flags.writeable
+        with pytest.raises(IndexError):
+            cycle_segmenter.cycle_view(len(cycles))
+
+    def test_max_gap_splits_runs_in_index(self, sample_energy_data, sample_state_masks):
+        """Test that runs are split where the index itself has a long gap."""
+        keep = np.ones(len(sample_energy_data), dtype=bool)
+        keep[290:295] = False
+        energy_data = sample_energy_data[keep]
+        state_masks = {name: mask[keep] for name, mask in sample_state_masks.items()}
+
+        bridged = CycleSegmenter(energy_data, state_masks, 'value').segment_cycles(min_duration="1s")
+        segmenter = CycleSegmenter(energy_data, state_masks, 'value', max_gap="3s")
+        cycles = segmenter.segment_cycles(min_duration="1s")
+
+        assert len(cycles) == len(bridged) + 1
+        assert cycles[0].end_time == sample_energy_data.index[289]
+        assert cycles[1].start_time == sample_energy_data.index[295]
+
+        report = segmenter.get_gap_report()
+        assert len(report) == 1
+        assert report['gap_seconds'].iloc[0] == 6.0
+        assert report['cycle_before'].iloc[0] == 0
+        assert report['cycle_after'].iloc[0] == 1
+
+    def test_max_gap_with_sample_index(self, sample_energy_data, sample_state_masks):
+        """Test that interpolated rows inside a raw sampling gap are excluded."""
+        samples = sample_energy_data.index.delete(range(300, 310))
+        segmenter = CycleSegmenter(sample_energy_data, sample_state_masks, 'value',
+                                   max_gap="5s", sample_index=samples)
+        cycles = segmenter.segment_cycles(min_duration="1s")
+
+        assert cycles[0].end_time == sample_energy_data.index[299]
+        assert cycles[1].start_time == sample_energy_data.index[310]
+        assert segmenter.get_gap_report()['cycle_after'].iloc[0] == 1
+
+        sharded = CycleSegmenter(sample_energy_data, sample_state_masks, 'value',
+                                 max_gap="5s", sample_index=samples)
+        for shard_size in [7, 300, 310]:
+            assert sharded.segment_cycles_sharded(min_duration="1s", n_workers=1, shard_size=shard_size) == cycles
+
+    def test_append_and_merge_statistics(self, sample_energy_data, sample_state_masks):
+        """Test that statistics can be extended incrementally and merged."""
+        whole = CycleSegmenter(sample_energy_data, sample_state_masks, 'value')
+        cycles = whole.segment_cycles(min_duration="1s")
+        assert len(cycles) >= 2
+        expected = whole.get_cycle_statistics()
+
+        incremental = CycleSegmenter(sample_energy_data, sample_state_masks, 'value')
+        incremental.append_cycles(cycles[:1])
+        stats = incremental.append_cycles(cycles[1:])
+        assert stats['total_cycles'] == expected['total_cycles']
+        assert stats['duration_stats']['median'] == pytest.approx(expected['duration_stats']['median'])
+        assert stats['energy_stats']['std'] == pytest.approx(expected['energy_stats']['std'])
+
+        other = CycleSegmenter(sample_energy_data, sample_state_masks, 'value')
+        other.segment_cycles(min_duration="1s")
+        merged = other.merge_statistics(whole.statistics_accumulator)
+        assert merged['total_cycles'] == 2 * expected['total_cycles']
+        assert merged['energy_stats']['total_energy'] == pytest.approx(2 * expected['energy_stats']['total_energy'])
+
+    def test_get_cycle_shape_matrix(self, cycle_segmenter, sample_energy_data):
+        """Test fixed-length resampling of cycle energy profiles."""
+        cycles = cycle_segmenter.segment_cycles()
+        matrix = cycle_segmenter.get_cycle_shape_matrix(length=16)
+        
+        assert matrix.shape == (len(cycles), 16)
+        assert matrix.dtype == np.float32
+        assert matrix.flags['C_CONTIGUOUS']
+        
+        for row, cycle in zip(matrix, cycles):
+            cycle_energy = sample_energy_data.loc[cycle.start_time:cycle.end_time, 'value'].to_numpy()
+            expected = np.interp(np.linspace(0, len(cycle_energy) - 1, 16),
+                                 np.arange(len(cycle_energy)), cycle_energy)
+            np.testing.assert_allclose(row, expected, rtol=1e-6)
+    
+    def test_get_cycle_shape_matrix_cache(self, cycle_segmenter, tmp_path):
+        """Test that the shape matrix is cached to disk and reused."""
+        cycle_segmenter.segment_cycles()
+        cache_path = str(tmp_path / "shapes.cache")
+        
+        matrix = cycle_segmenter.get_cycle_shape_matrix(length=8, cache_path=cache_path)
+        assert os.path.exists(cache_path)
+        
+        np.testing.assert_array_equal(cycle_segmenter.get_cycle_shape_matrix(length=8, cache_path=cache_path), matrix)
+        
+        # Changed energy values invalidate the cache
+        cycle_segmenter.energy_data = cycle_segmenter.energy_data * 0
+        recomputed = cycle_segmenter.get_cycle_shape_matrix(length=8, cache_path=cache_path)
+        assert matrix.any()
+        assert not recomputed.any()
+        
+        # So does a different length
+        assert cycle_segmenter.get_cycle_shape_matrix(length=4, cache_path=cache_path).shape == (len(matrix), 4)
+
 
 class TestProductionCycle:
     """Test cases for ProductionCycle dataclass."""
@@ -0,0 +1,64 @@
+"""
+Tests for the downsampling functions.
+"""
+
+import pytest
+import numpy as np
+from machine_analyzer.downsampling import lttb_indices, minmax_indices
+
+
+class TestDownsampling:
+    """Test cases for LTTB and min/max downsampling."""
+
+    @pytest.fixture
+    def series(self):
+        """Create a noisy sine series with a single spike."""
+        rng = np.random.default_rng(0)
+        x = np.arange(100_000, dtype=np.float64)
+        y = np.sin(x / 5000) + rng.normal(0, 0.01, len(x))
+        y[54_321] = 5.0
+        return x, y
+
+    def test_lttb(self, series):
+        """Test that LTTB keeps the end points and the spike."""
+        x, y = series
+        selected = lttb_indices(x, y, 500)
+
+        assert len(selected) == 500
+        assert selected[0] == 0 and selected[-1] == len(x) - 1
+        assert np.all(np.diff(selected) > 0)
+        assert 54_321 in selected
+
+    def test_minmax(self, series):
+        """Test that min/max keeps the extremes of every bucket."""
+        x, y = series
+        selected = minmax_indices(x, y, 200)
+
+        assert len(selected) <= 2 * 200 + 2
+        assert 54_321 in selected
+        assert np.argmin(y) in selected
+        assert selected[0] == 0 and selected[-1] == len(x) - 1
+
+    def test_minmax_keeps_gaps(self):
+        """Test that buckets follow x, so a gap in the data stays empty."""
+        x = np.r_[np.arange(1000), np.arange(9000, 10000)].astype(np.float64)
+        y = np.ones(len(x))
+        selected = minmax_indices(x, y, 10)
+
+        # Only the two populated buckets contribute points
+        assert len(selected) <= 2 * 2 + 2
+        assert set(np.floor(x[selected] / 1000).tolist()) == {0, 9}
+
+    def test_short_series_unchanged(self):
+        """Test that series shorter than the output are returned whole."""
+        x = np.arange(10.0)
+        np.testing.assert_array_equal(lttb_indices(x, x, 20), np.arange(10))
+        np.testing.assert_array_equal(minmax_indices(x, x, 20), np.arange(10))
+
+    def test_invalid_sizes(self):
+        """Test invalid output sizes."""
+        x = np.arange(10.0)
+        with pytest.raises(ValueError):
+            lttb_indices(x, x, 2)
+        with pytest.raises(ValueError):
+            minmax_indices(x, x, 0)
@@ -0,0 +1,109 @@
+"""
+Tests for DTWMatcher class.
+"""
+
+import pytest
+import numpy as np
+from machine_analyzer.dtw_matcher import DTWMatcher, DTWMatchResult, batch_dtw
+
+
+def naive_dtw(x, y, band):
+    """Reference O(L^2) squared DTW with a Sakoe-Chiba band."""
+    length = len(x)
+    cost = np.full((length + 1, length + 1), np.inf)
+    cost[0, 0] = 0
+    for i in range(1, length + 1):
+        for j in range(max(1, i - band), min(length, i + band) + 1):
+            cost[i, j] = (x[i - 1] - y[j - 1]) ** 2 + min(cost[i - 1, j - 1], cost[i - 1, j], cost[i, j - 1])
+    return cost[length, length]
+
+
+class TestDTWMatcher:
+    """Test cases for DTWMatcher class."""
+    
+    @pytest.fixture
+    def templates(self):
+        """Create reference profiles with different shapes."""
+        t = np.linspace(0, 1, 32)
+        return np.array([
+            np.sin(2 * np.pi * t),
+            np.where(t < 0.5, 1.0, 0.0),
+            t ** 2,
+            np.cos(4 * np.pi * t),
+        ])
+    
+    @pytest.fixture
+    def cycles(self, templates):
+        """Create noisy, time-shifted copies of the templates."""
+        rng = np.random.default_rng(0)
+        labels = rng.integers(0, len(templates), 200)
+        shifts = rng.integers(-2, 3, 200)
+        cycles = np.array([np.roll(templates[label], shift) for label, shift in zip(labels, shifts)])
+        return cycles + rng.normal(0, 0.05, cycles.shape), labels
+    
+    def test_batch_dtw_matches_naive(self):
+        """Test the vectorized DTW against a reference implementation."""
+        rng = np.random.default_rng(1)
+        x = rng.normal(size=(10, 20))
+        y = rng.normal(size=(10, 20))
+        
+        distances = batch_dtw(x, y, band=3)
+        
+        expected = [naive_dtw(a, b, 3) for a, b in zip(x, y)]
+        np.testing.assert_allclose(distances, expected, rtol=1e-9)
+    
+    def test_batch_dtw_early_abandon(self):
+        """Test that pairs above their threshold are abandoned."""
+        rng = np.random.default_rng(2)
+        x = rng.normal(size=(5, 16))
+        y = rng.normal(size=(5, 16))
+        exact = batch_dtw(x, y, band=2)
+        
+        thresholds = exact * 1.5
+        thresholds[::2] = exact[::2] * 0.5
+        distances = batch_dtw(x, y, band=2, thresholds=thresholds)
+        
+        assert np.all(np.isinf(distances[::2]))
+        np.testing.assert_allclose(distances[1::2], exact[1::2])
+    
+    def test_match_finds_exhaustive_best(self, templates, cycles):
+        """Test that pruning does not change the matching result."""
+        shapes, labels = cycles
+        matcher = DTWMatcher(templates, band=0.1, normalize=False)
+        
+        result = matcher.match(shapes)
+        
+        assert isinstance(result, DTWMatchResult)
+        for shape, index, distance in zip(shapes, result.template_index, result.distance):
+            exhaustive = [naive_dtw(shape, template, matcher.band) for template in templates]
+            assert distance ** 2 == pytest.approx(min(exhaustive), rel=1e-9)
+            assert exhaustive[index] == pytest.approx(min(exhaustive), rel=1e-9)
+        np.testing.assert_array_equal(result.template_index, labels)
+    
+    @pytest.fixture
+    def template_library(self):
+        """Create a fleet-sized library of distinct profiles with noisy cycles near them."""
+        rng = np.random.default_rng(3)
+        t = np.linspace(0, 1, 64)
+        centers = rng.uniform(0, 1, (64, 3))
+        heights = rng.uniform(0.5, 2.0, (64, 3))
+        library = (heights[:, :, None] * np.exp(-((t - centers[:, :, None]) / 0.08) ** 2)).sum(axis=1)
+        labels = rng.integers(0, len(library), 500)
+        shifts = rng.integers(-2, 3, 500)
+        cycles = np.array([np.roll(library[label], shift) for label, shift in zip(labels, shifts)])
+        return library, cycles + rng.normal(0, 0.05, cycles.shape)
+    
+    def test_match_prunes_most_pairs(self, template_library):
+        """Test that lower bounds skip more than 95% of full DTW computations."""
+        library, shapes = template_library
+        stats = DTWMatcher(library, band=0.1).match(shapes).pruning_stats
+        
+        accounted = sum(count for name, count in stats.items() if name != "pairs")
+        assert accounted == stats["pairs"]
+        # Abandoned pairs count as computed, since their DTW was started
+        assert stats["full_dtw"] + stats["abandoned"] < 0.05 * stats["pairs"]
+    
+    def test_match_length_mismatch(self, templates):
+        """Test error handling for cycles of the wrong length."""
+        with pytest.raises(ValueError, match="Cycles must have length"):
+            DTWMatcher(templates).match(np.zeros((3, 10)))
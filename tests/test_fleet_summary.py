@@ -0,0 +1,86 @@
+"""
+Tests for FleetSummary class.
+"""
+
+import pytest
+import pandas as pd
+import numpy as np
+from machine_analyzer.fleet_summary import FleetSummary, MachineResult, aggregate_machine
+from machine_analyzer.quality_analyzer import score_cycles
+
+
+def make_machine(name: str, seed: int, n_cycles: int = 200, energy_level: float = 1000.0) -> MachineResult:
+    """Create the analysis results of one machine."""
+    rng = np.random.default_rng(seed)
+    dates = pd.date_range('2024-01-01', periods=1000, freq='1min')
+    energy_data = pd.DataFrame({'value': rng.normal(100, 10, len(dates))}, index=dates)
+    cycle_arrays = {
+        'cycle_id': np.arange(n_cycles),
+        'start_time': dates[:n_cycles].to_numpy(),
+        'duration': rng.normal(900, 30, n_cycles),
+        'energy': rng.normal(energy_level, 20, n_cycles),
+        'peak': rng.normal(120, 5, n_cycles),
+        'variation': rng.normal(0.2, 0.02, n_cycles),
+    }
+    statistics = {'duration_stats': {'mean': 900, 'std': 30}, 'energy_stats': {'mean': 1000, 'std': 20},
+                  'variation_stats': {'mean': 0.2, 'std': 0.02}}
+    quality_result = score_cycles(cycle_arrays['cycle_id'], cycle_arrays['duration'], cycle_arrays['energy'],
+                                  cycle_arrays['variation'], statistics)
+    return MachineResult(name, energy_data, cycle_arrays, quality_result)
+
+
+class TestFleetSummary:
+    """Test cases for FleetSummary class."""
+
+    @pytest.fixture
+    def machines(self):
+        """Create a small fleet with one machine using much more energy."""
+        machines = [make_machine(f"M{i:02d}", i) for i in range(6)]
+        machines.append(make_machine("M99", 99, energy_level=1100.0))
+        return machines
+
+    def test_totals_match_pooled_data(self, machines):
+        """Test that the merged fleet totals equal the statistics of all data pooled."""
+        fleet = FleetSummary(machines, n_workers=1)
+
+        durations = np.concatenate([machine.cycle_arrays['duration'] for machine in machines])
+        energies = np.concatenate([machine.energy_data['value'].to_numpy() for machine in machines])
+        anomalous = sum(machine.quality_result.summary()['anomalous_cycles'] for machine in machines)
+        total = fleet.total
+        assert total.total_cycles == len(durations)
+        assert total.cycles.stats["duration"].mean == pytest.approx(durations.mean())
+        assert total.cycles.stats["duration"].std == pytest.approx(durations.std())
+        assert total.energy.total == pytest.approx(energies.sum())
+        assert total.anomalous_cycles == anomalous
+        assert total.grade_counts.sum() == len(durations)
+
+    def test_parallel_matches_serial(self, machines):
+        """Test that process-pool aggregation gives the same per-machine table."""
+        serial = FleetSummary(machines, n_workers=1).machine_frame()
+        parallel = FleetSummary(machines, n_workers=3).machine_frame()
+        pd.testing.assert_frame_equal(serial, parallel)
+        assert list(parallel.index) == [machine.machine for machine in machines]
+
+    def test_ranking(self, machines):
+        """Test the ranked machines."""
+        fleet = FleetSummary(machines, n_workers=1)
+
+        highest_energy = fleet.ranking("energy_per_cycle", top_n=3)
+        worst_anomalies = fleet.ranking("anomaly_rate", top_n=3)
+        assert len(highest_energy) == 3
+        assert highest_energy[0][0] == "M99"
+        assert worst_anomalies[0][0] == "M99"
+        assert [rate for _, rate in worst_anomalies] == sorted((rate for _, rate in worst_anomalies), reverse=True)
+
+    def test_machine_without_data(self):
+        """Test a machine without energy data, cycles or quality results."""
+        empty = MachineResult("idle", pd.DataFrame(), {'duration': np.empty(0)})
+        aggregate = aggregate_machine(empty)
+        assert aggregate.total_cycles == 0
+        assert aggregate.anomaly_rate == 0.0
+        assert np.isnan(aggregate.energy_per_cycle)
+
+    def test_duplicate_machines(self, machines):
+        """Test that machine names must be unique."""
+        with pytest.raises(ValueError):
+            FleetSummary([machines[0], machines[0]])
@@ -0,0 +1,119 @@
+"""
+Tests for MatrixProfile class.
+"""
+
+import pytest
+import pandas as pd
+import numpy as np
+from machine_analyzer.matrix_profile import MatrixProfile, moving_mean_std, sliding_dot_product
+
+
+def naive_profile(series, m, exclusion_zone):
+    """Reference matrix profile by comparing every pair of subsequences."""
+    windows = np.lib.stride_tricks.sliding_window_view(series, m)
+    normalized = (windows - windows.mean(axis=1, keepdims=True)) / windows.std(axis=1, keepdims=True)
+    distances = np.sqrt(((normalized[:, None, :] - normalized[None, :, :]) ** 2).sum(axis=2))
+    for i in range(len(windows)):
+        distances[i, max(0, i - exclusion_zone):i + exclusion_zone + 1] = np.inf
+    return distances.min(axis=1)
+
+
+class TestMatrixProfile:
+    """Test cases for MatrixProfile class."""
+    
+    @pytest.fixture
+    def energy_data(self):
+        """Create a noisy series with a repeated cycle shape and one anomaly."""
+        rng = np.random.default_rng(0)
+        values = rng.normal(10, 1, 3000)
+        cycle = 10 + 20 * np.sin(np.linspace(0, np.pi, 50))
+        for start in range(100, 2900, 400):
+            values[start:start + 50] = cycle + rng.normal(0, 0.3, 50)
+        values[1500:1550] = 10 + 20 * np.linspace(0, 1, 50) ** 4
+        timestamps = pd.date_range('2024-01-01', periods=3000, freq='1s')
+        return pd.DataFrame({'value': values}, index=timestamps)
+    
+    def test_sliding_dot_product(self):
+        """Test the FFT dot product against a direct computation."""
+        rng = np.random.default_rng(1)
+        series, query = rng.normal(size=100), rng.normal(size=7)
+        
+        expected = [series[i:i + 7] @ query for i in range(94)]
+        np.testing.assert_allclose(sliding_dot_product(query, series), expected, atol=1e-9)
+    
+    def test_exact_profile_matches_naive(self):
+        """Test the exact profile against a brute-force computation."""
+        rng = np.random.default_rng(2)
+        data = pd.DataFrame({'value': rng.normal(size=300)},
+                            index=pd.date_range('2024-01-01', periods=300, freq='1s'))
+        matrix_profile = MatrixProfile(data, window_size=12)
+        
+        profile, index = matrix_profile.compute()
+        
+        np.testing.assert_allclose(profile, naive_profile(data['value'].to_numpy(), 12,
+                                                          matrix_profile.exclusion_zone), atol=1e-6)
+        assert matrix_profile.get_progress() == 1.0
+        assert np.all(np.abs(index - np.arange(len(index))) > matrix_profile.exclusion_zone)
+    
+    def test_precision_on_long_offset_series(self):
+        """Test window statistics and diagonal distances on a long series far from zero."""
+        rng = np.random.default_rng(3)
+        n, m, k = 2_000_000, 50, 1000
+        series = 1000 + rng.normal(0, 0.01, n)
+        data = pd.DataFrame({'value': series}, index=pd.date_range('2024-01-01', periods=n, freq='1s'))
+        matrix_profile = MatrixProfile(data, window_size=m)
+        
+        tail = np.lib.stride_tricks.sliding_window_view(series[-m - 200:], m)
+        means, stds = moving_mean_std(series, m)
+        np.testing.assert_allclose(means[-201:], tail.mean(axis=1), rtol=1e-12)
+        np.testing.assert_allclose(stds[-201:], tail.std(axis=1), rtol=1e-6)
+        np.testing.assert_allclose(matrix_profile.stds[-201:], tail.std(axis=1), rtol=1e-6)
+        
+        rows, cols, distances = matrix_profile._diagonal_distances(k)
+        a = np.lib.stride_tricks.sliding_window_view(series[rows[-200]:rows[-1] + m], m)
+        b = np.lib.stride_tricks.sliding_window_view(series[cols[-200]:cols[-1] + m], m)
+        a = (a - a.mean(axis=1, keepdims=True)) / a.std(axis=1, keepdims=True)
+        b = (b - b.mean(axis=1, keepdims=True)) / b.std(axis=1, keepdims=True)
+        np.testing.assert_allclose(distances[-200:], np.sqrt(((a - b) ** 2).sum(axis=1)), rtol=1e-6)
+    
+    def test_anytime_profile_is_upper_bound(self, energy_data):
+        """Test that the anytime profile never underestimates the exact one."""
+        exact, _ = MatrixProfile(energy_data, window_size=50).compute()
+        approximate = MatrixProfile(energy_data, window_size=50)
+        profile, _ = approximate.compute(time_budget=0.05)
+        
+        assert np.all(profile >= exact - 1e-6)
+        assert 0 < approximate.get_progress() <= 1.0
+    
+    def test_find_motifs(self, energy_data):
+        """Test that the repeated cycle is found as the top motif."""
+        matrix_profile = MatrixProfile(energy_data, window_size=50)
+        matrix_profile.compute()
+        
+        motif = matrix_profile.find_motifs(k=1, radius_factor=3)[0]
+        
+        starts = np.arange(100, 2900, 400)
+        assert len(motif['occurrences']) == len(starts)
+        assert np.all(np.abs(motif['occurrences'] - starts) <= 2)
+        segments = matrix_profile.get_motif_segments(motif)
+        assert segments[0][1] - segments[0][0] == pd.Timedelta(seconds=49)
+    
+    def test_find_discords(self):
+        """Test that an anomalous cycle in a periodic series is the top discord."""
+        rng = np.random.default_rng(3)
+        period = np.concatenate([10 + 20 * np.sin(np.linspace(0, np.pi, 50)), np.full(50, 10.0)])
+        values = np.tile(period, 30) + rng.normal(0, 0.1, 3000)
+        values[1500:1550] = 10 + 20 * np.linspace(0, 1, 50) ** 4
+        data = pd.DataFrame({'value': values}, index=pd.date_range('2024-01-01', periods=3000, freq='1s'))
+        matrix_profile = MatrixProfile(data, window_size=100)
+        matrix_profile.compute()
+        
+        discord = matrix_profile.find_discords(k=1)[0]
+        
+        assert 1450 <= discord['discord_index'] <= 1550
+        assert discord['start_time'] == data.index[discord['discord_index']]
+    
+    def test_requires_profile(self, energy_data):
+        """Test error handling when the profile has not been computed."""
+        with pytest.raises(ValueError, match="must be computed"):
+            MatrixProfile(energy_data, window_size=50).find_motifs()
@@ -0,0 +1,94 @@
+"""
+Tests for MultivariateScorer class.
+"""
+
+import pytest
+import numpy as np
+from machine_analyzer.multivariate_scorer import MultivariateScorer
+
+
+class TestMultivariateScorer:
+    """Test cases for MultivariateScorer class."""
+
+    @pytest.fixture
+    def correlated_features(self):
+        """Create features where energy follows duration, with a few gross outliers."""
+        rng = np.random.default_rng(0)
+        duration = rng.normal(60, 5, 2000)
+        energy = 5 * duration + rng.normal(0, 5, 2000)
+        features = np.column_stack([duration, energy, rng.normal(20, 1, 2000), rng.normal(2, 0.2, 2000)])
+        features[:20, 1] += 200
+        return features
+
+    def test_mahalanobis_flags_combination(self, correlated_features):
+        """Test that a cycle normal in each feature but not in combination is flagged."""
+        scorer = MultivariateScorer("mahalanobis").fit(correlated_features)
+        # Long duration with the energy of a short cycle
+        unusual = np.array([[68.0, 260.0, 20.0, 2.0]])
+        typical = np.array([[68.0, 340.0, 20.0, 2.0]])
+
+        assert scorer.predict(unusual)[0]
+        assert not scorer.predict(typical)[0]
+        # The robust fit is not pulled towards the gross outliers
+        assert scorer.predict(correlated_features[:20]).all()
+
+    def test_isolation_forest_scores(self, correlated_features):
+        """Test that the isolation forest ranks outliers above typical cycles."""
+        scorer = MultivariateScorer("isolation_forest", n_trees=50, seed=1).fit(correlated_features)
+        scores = scorer.score(correlated_features)
+
+        assert scores.shape == (len(correlated_features),)
+        assert ((scores > 0) & (scores <= 1)).all()
+        assert scores[:20].mean() > np.quantile(scores[20:], 0.95)
+        assert scorer.predict(correlated_features).mean() == pytest.approx(0.01, abs=0.005)
+
+    def test_chunked_scoring(self, correlated_features):
+        """Test that chunk size does not change the scores."""
+        scorer = MultivariateScorer("isolation_forest", n_trees=20).fit(correlated_features)
+        expected = scorer.score(correlated_features)
+        scorer.chunk_size = 7
+        np.testing.assert_array_equal(scorer.score(correlated_features), expected)
+
+    @pytest.mark.parametrize("method", ["mahalanobis", "isolation_forest"])
+    def test_save_and_load(self, correlated_features, method, tmp_path):
+        """Test that a saved scorer gives the same scores."""
+        scorer = MultivariateScorer(method, n_trees=20).fit(correlated_features)
+        path = str(tmp_path / "scorer.npz")
+        scorer.save(path)
+
+        loaded = MultivariateScorer.load(path)
+        assert loaded.method == method
+        assert loaded.threshold == scorer.threshold
+        np.testing.assert_array_equal(loaded.score(correlated_features), scorer.score(correlated_features))
+
+    @pytest.mark.parametrize("method", ["mahalanobis", "isolation_forest"])
+    def test_missing_features_are_imputed(self, correlated_features, method):
+        """Test that NaN feature values are imputed with the fitted centre."""
+        features = correlated_features.copy()
+        features[100, 2] = np.nan
+        features[200, :] = np.nan
+        scorer = MultivariateScorer(method, n_trees=20).fit(features)
+        scores = scorer.score(features)
+
+        assert np.isfinite(scorer.threshold)
+        assert np.isfinite(scores).all()
+        imputed = features[100].copy()
+        imputed[2] = scorer._center[2]
+        assert scores[100] == pytest.approx(scorer.score(imputed)[0])
+        assert scores[:20].mean() > np.quantile(scores[20:], 0.95)
+
+        features[300, 1] = np.inf
+        with pytest.raises(ValueError, match="infinite"):
+            scorer.score(features)
+        with pytest.raises(ValueError, match="infinite"):
+            MultivariateScorer(method).fit(features)
+
+    def test_errors(self, correlated_features):
+        """Test invalid usage."""
+        with pytest.raises(ValueError):
+            MultivariateScorer("lof")
+        with pytest.raises(ValueError):
+            MultivariateScorer().score(correlated_features)
+        scorer = MultivariateScorer().fit(correlated_features)
+        with pytest.raises(ValueError):
+            scorer.score(correlated_features[:, :2])
@@ -0,0 +1,98 @@
+"""
+Tests for OnlineQualityAnalyzer class.
+"""
+
+import pytest
+import pandas as pd
+import numpy as np
+from machine_analyzer.cycle_segmenter import ProductionCycle
+from machine_analyzer.online_quality_analyzer import OnlineQualityAnalyzer
+from machine_analyzer.quality_analyzer import QualityMetrics, score_cycles
+from machine_analyzer.running_statistics import CycleStatisticsAccumulator
+
+
+def make_cycle(cycle_id, duration=60.0, energy=300.0, variation=2.0):
+    start_time = pd.Timestamp('2024-01-01') + pd.Timedelta(minutes=2 * cycle_id)
+    return ProductionCycle(
+        cycle_id=cycle_id,
+        start_time=start_time,
+        end_time=start_time + pd.Timedelta(seconds=duration),
+        duration=pd.Timedelta(seconds=duration),
+        energy_consumption=energy,
+        peak_energy=energy / 10,
+        average_energy=energy / duration,
+        variation=variation
+    )
+
+
+class TestOnlineQualityAnalyzer:
+    """Test cases for OnlineQualityAnalyzer class."""
+
+    @pytest.fixture
+    def normal_cycles(self):
+        """Create cycles with normally distributed features."""
+        rng = np.random.default_rng(0)
+        return [make_cycle(i, rng.normal(60, 2), rng.normal(300, 10), rng.normal(2, 0.1)) for i in range(200)]
+
+    @pytest.mark.parametrize("method", ["mean_std", "robust"])
+    def test_flags_outlier_after_warmup(self, normal_cycles, method):
+        """Test that an outlier is flagged once the baseline is learned."""
+        analyzer = OnlineQualityAnalyzer(method=method, warmup_cycles=20)
+        metrics = [analyzer.update(cycle) for cycle in normal_cycles]
+
+        assert all(isinstance(metric, QualityMetrics) for metric in metrics)
+        assert not any(metric.is_anomalous for metric in metrics[:20])
+        assert analyzer.baseline_count == len(normal_cycles)
+
+        outlier = analyzer.update(make_cycle(999, duration=40.0, energy=400.0, variation=2.0))
+        assert outlier.is_anomalous
+        assert outlier.issues == ["Duration is too short", "Energy consumption is too high"]
+        assert outlier.quality_grade == "D"
+        assert 999 in analyzer.anomalous_units
+
+    def test_score_does_not_learn(self, normal_cycles):
+        """Test that score leaves the baseline unchanged."""
+        analyzer = OnlineQualityAnalyzer()
+        for cycle in normal_cycles[:50]:
+            analyzer.update(cycle)
+        baseline = analyzer.get_baseline()
+
+        analyzer.score(make_cycle(999, energy=1000.0))
+        assert analyzer.get_baseline() == baseline
+        assert baseline['energy']['center'] == pytest.approx(
+            np.mean([cycle.energy_consumption for cycle in normal_cycles[:50]]))
+
+    def test_from_accumulator(self, normal_cycles):
+        """Test seeding the baseline with historical statistics."""
+        history = CycleStatisticsAccumulator().add_cycles(normal_cycles)
+        analyzer = OnlineQualityAnalyzer.from_accumulator(history, warmup_cycles=10)
+
+        assert analyzer.baseline_count == len(normal_cycles)
+        assert analyzer.update(make_cycle(999, variation=3.0)).issues == ["Variation is too high"]
+        assert not analyzer.update(make_cycle(1000)).is_anomalous
+
+    def test_robust_from_accumulator_checks_energy(self, normal_cycles):
+        """Test that a robust baseline seeded from an accumulator flags high energy right away."""
+        history = CycleStatisticsAccumulator().add_cycles(normal_cycles)
+        analyzer = OnlineQualityAnalyzer.from_accumulator(history, method="robust", refresh_interval=64)
+
+        assert np.isfinite(analyzer.get_baseline()['energy']['center'])
+        assert analyzer.update(make_cycle(999, energy=400.0)).issues == ["Energy consumption is too high"]
+        assert not analyzer.update(make_cycle(1000)).is_anomalous
+
+    def test_scores_match_batch_scores(self, normal_cycles):
+        """Test that online scores equal the batch scores expanded to QualityMetrics."""
+        history = CycleStatisticsAccumulator().add_cycles(normal_cycles)
+        analyzer = OnlineQualityAnalyzer.from_accumulator(history)
+        online = analyzer.score(make_cycle(999, variation=3.0))
+
+        batch = score_cycles(np.array([999]), np.array([60.0]), np.array([300.0]), np.array([3.0]),
+                             history.to_dict()).metric(0)
+        assert online.issues == batch.issues == ["Variation is too high"]
+        assert online.quality_score == batch.quality_score
+        assert online.quality_grade == batch.quality_grade
+
+    def test_invalid_method(self):
+        """Test that an unknown baseline method is rejected."""
+        with pytest.raises(ValueError):
+            OnlineQualityAnalyzer(method="unknown")
@@ -0,0 +1,89 @@
+"""
+Tests for PhaseDetector class.
+"""
+
+import pytest
+import pandas as pd
+import numpy as np
+from machine_analyzer.cycle_segmenter import CycleSegmenter
+from machine_analyzer.phase_detector import PhaseDetector, pelt_batch
+
+
+def optimal_partition_cost(series, penalty, min_size):
+    """Reference O(n^2) optimal partitioning without pruning."""
+    n = len(series)
+    best = np.full(n + 1, np.inf)
+    best[0] = -penalty
+    for t in range(min_size, n + 1):
+        for s in range(0, t - min_size + 1):
+            if np.isfinite(best[s]):
+                segment = series[s:t]
+                cost = ((segment - segment.mean()) ** 2).sum()
+                best[t] = min(best[t], best[s] + cost + penalty)
+    return best[n]
+
+
+class TestPhaseDetector:
+    """Test cases for PhaseDetector class."""
+    
+    @pytest.fixture
+    def segmenter(self):
+        """Create cycles made of three phases separated by idle periods."""
+        rng = np.random.default_rng(0)
+        pattern = np.concatenate([np.full(20, 10.0), np.full(30, 40.0), np.full(15, 15.0), np.full(10, 1.0)])
+        values = np.tile(pattern, 40) + rng.normal(0, 0.5, len(pattern) * 40)
+        timestamps = pd.date_range('2024-01-01', periods=len(values), freq='1s')
+        production_mask = pd.Series(np.tile(np.r_[np.ones(65, bool), np.zeros(10, bool)], 40), index=timestamps)
+        
+        segmenter = CycleSegmenter(pd.DataFrame({'value': values}, index=timestamps),
+                                   {'production_state': production_mask}, 'value')
+        segmenter.segment_cycles()
+        return segmenter
+    
+    def test_pelt_batch_matches_optimal_partitioning(self):
+        """Test that pruning keeps the optimal segmentation cost."""
+        rng = np.random.default_rng(1)
+        lengths = np.array([12, 25, 40, 7])
+        values = np.zeros((4, 40))
+        for row, length in enumerate(lengths):
+            values[row, :length] = np.repeat(rng.normal(0, 5, 4), 10)[:length] + rng.normal(0, 1, length)
+        penalties = np.array([3.0, 5.0, 8.0, 2.0])
+        
+        _, costs = pelt_batch(values, lengths, penalties, min_size=2)
+        
+        for row, length in enumerate(lengths):
+            expected = optimal_partition_cost(values[row, :length], penalties[row], 2)
+            assert costs[row] == pytest.approx(expected)
+    
+    def test_detect_phases(self, segmenter):
+        """Test phase detection on cycles with three clear phases."""
+        phase_table = PhaseDetector(segmenter).detect_phases()
+        
+        assert list(phase_table.columns) == ['cycle_id', 'phase', 'start_time', 'end_time',
+                                             'n_samples', 'energy', 'mean_energy']
+        phases_per_cycle = phase_table.groupby('cycle_id').size()
+        assert len(phases_per_cycle) == len(segmenter.get_cycles())
+        assert (phases_per_cycle == 3).mean() >= 0.9
+        three_phase = phase_table[phase_table['cycle_id'].isin(phases_per_cycle[phases_per_cycle == 3].index)]
+        assert three_phase['n_samples'].groupby(three_phase['phase']).median().tolist() == [20, 30, 15]
+        
+        cycle_energy = {cycle.cycle_id: cycle.energy_consumption for cycle in segmenter.get_cycles()}
+        phase_energy = phase_table.groupby('cycle_id')['energy'].sum()
+        for cycle_id, energy in phase_energy.items():
+            assert energy == pytest.approx(cycle_energy[cycle_id])
+    
+    def test_detect_phases_chunked(self, segmenter):
+        """Test that chunking does not change the result."""
+        expected = PhaseDetector(segmenter).detect_phases()
+        chunked = PhaseDetector(segmenter, chunk_size=7).detect_phases()
+        
+        pd.testing.assert_frame_equal(chunked, expected)
+    
+    def test_detect_phases_no_cycles(self):
+        """Test phase detection without cycles."""
+        timestamps = pd.date_range('2024-01-01', periods=10, freq='1s')
+        segmenter = CycleSegmenter(pd.DataFrame({'value': np.zeros(10)}, index=timestamps),
+                                   {'production_state': pd.Series(False, index=timestamps)}, 'value')
+        segmenter.segment_cycles()
+        
+        assert PhaseDetector(segmenter).detect_phases().empty
@@ -0,0 +1,118 @@
+"""
+Tests for AnalysisPipeline class.
+"""
+
+import pytest
+import os
+import tracemalloc
+import pandas as pd
+import numpy as np
+from machine_analyzer.pipeline import AnalysisPipeline
+from machine_analyzer.state_detector import StateDetector
+from machine_analyzer.cycle_segmenter import CycleSegmenter
+from machine_analyzer.quality_analyzer import QualityAnalyzer
+from machine_analyzer.machine_data_loader import MachineDataLoader
+
+
+def make_energy_data(n_samples: int, seed: int = 0) -> pd.DataFrame:
+    """Create energy data with production cycles, standby and off periods."""
+    rng = np.random.default_rng(seed)
+    dates = pd.date_range('2024-01-01', periods=n_samples, freq='1s')
+    phase = np.arange(n_samples) % 120
+    values = np.where(phase < 60, 50 + rng.normal(0, 5, n_samples) + rng.integers(0, 10, n_samples // 120 + 1)
+                      .repeat(120)[:n_samples], 2.0)
+    values[(np.arange(n_samples) // 3600) % 5 == 4] = 0.0
+    return pd.DataFrame({'value': values}, index=dates)
+
+
+class TestAnalysisPipeline:
+    """Test cases for AnalysisPipeline class."""
+
+    @pytest.fixture
+    def energy_data(self):
+        return make_energy_data(20_000)
+
+    def test_matches_stage_by_stage_analysis(self, energy_data):
+        """Test that the pipeline gives the same states, cycles and scores as the separate stages."""
+        # Small shards so that the rolling median and summaries cross shard boundaries
+        pipeline = AnalysisPipeline(min_duration="30s", max_duration="120s", shard_size=4096)
+        result = pipeline.run(energy_data)
+
+        detector = StateDetector(energy_data, "value")
+        state_masks = detector.detect_states()
+        segmenter = CycleSegmenter(energy_data, state_masks, "value")
+        segmenter.segment_cycles(min_duration="30s", max_duration="120s")
+        analyzer = QualityAnalyzer.from_segmenter(segmenter)
+        expected = analyzer.score_quality()
+
+        for name, mask in pipeline.state_masks().items():
+            np.testing.assert_array_equal(mask, np.asarray(state_masks[name]))
+        arrays = analyzer.get_cycle_arrays()
+        assert len(pipeline.cycle_arrays['duration']) == len(arrays['duration']) > 0
+        for name in ('duration', 'energy', 'peak', 'variation'):
+            np.testing.assert_allclose(pipeline.cycle_arrays[name], arrays[name])
+        np.testing.assert_array_equal(result.issue_flags, expected.issue_flags)
+        np.testing.assert_allclose(result.quality_scores, expected.quality_scores)
+
+    def test_preprocessing_matches_loader(self, energy_data):
+        """Test that resampling and cleaning give the loader's preprocessed values."""
+        energy_data = energy_data.copy()
+        energy_data.iloc[100:110, 0] = np.nan
+        energy_data.iloc[200, 0] = -5.0
+        pipeline = AnalysisPipeline(frequency="2s").load(energy_data)
+
+        expected = MachineDataLoader().preprocess_data(energy_data, "value", "2s")
+        np.testing.assert_allclose(pipeline.values, expected['value'].to_numpy())
+        np.testing.assert_array_equal(pipeline.times, expected.index.to_numpy().astype("datetime64[ns]"))
+
+    def test_max_gap_matches_segmenter(self, energy_data):
+        """Test that cycles are split at sampling gaps as by CycleSegmenter."""
+        # Drop samples in the middle of production runs; resampling fills them back in
+        raw = energy_data.drop(energy_data.index[[30, 31, 32, 33, 150, 151, 152, 153, 154, 155]])
+        pipeline = AnalysisPipeline(frequency="1s", min_duration="5s", max_duration="120s", max_gap="3s")
+        pipeline.run(raw)
+
+        preprocessed = MachineDataLoader().preprocess_data(raw, "value", "1s")
+        state_masks = StateDetector(preprocessed, "value").detect_states()
+        segmenter = CycleSegmenter(preprocessed, state_masks, "value", max_gap="3s", sample_index=raw.index)
+        segmenter.segment_cycles(min_duration="5s", max_duration="120s")
+        ungapped = AnalysisPipeline(frequency="1s", min_duration="5s", max_duration="120s").run(raw)
+
+        np.testing.assert_array_equal(pipeline.cycle_starts, segmenter._cycle_starts)
+        np.testing.assert_array_equal(pipeline.cycle_ends, segmenter._cycle_ends)
+        assert len(pipeline.cycle_starts) > len(ungapped)
+
+    def test_views_and_timings(self, energy_data, tmp_path):
+        """Test that stages share the energy array and report their timings."""
+        pipeline = AnalysisPipeline(min_duration="30s", max_duration="120s")
+        pipeline.run(energy_data, output_dir=str(tmp_path))
+
+        assert set(pipeline.timings) == {"load", "states", "segment", "quality", "report"}
+        assert all(seconds >= 0 for seconds in pipeline.timings.values())
+        assert np.shares_memory(pipeline.cycle_view(0), pipeline.values)
+        assert np.shares_memory(pipeline.energy_frame()['value'].to_numpy(), pipeline.values)
+        assert len(os.listdir(tmp_path)) == 1
+        assert list(pipeline.energy_frame(with_states=True)['machine_state'].cat.categories) == \
+            ["off", "on", "standby", "production"]
+
+    def test_peak_memory(self):
+        """Test that the pipeline's peak allocation stays close to the size of the data."""
+        energy_data = make_energy_data(500_000)
+        raw_size = energy_data['value'].to_numpy().nbytes + energy_data.index.to_numpy().nbytes
+
+        tracemalloc.start()
+        pipeline = AnalysisPipeline(min_duration="30s", max_duration="120s")
+        pipeline.run(energy_data)
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        assert len(pipeline.quality_result) > 0
+        assert peak < 2 * raw_size
+
+    def test_stage_order(self):
+        """Test that stages require the previous stages."""
+        pipeline = AnalysisPipeline()
+        with pytest.raises(ValueError):
+            pipeline.detect_states()
+        with pytest.raises(ValueError):
+            pipeline.load(pd.DataFrame({'value': [1.0, 2.0]}))
@@ -6,7 +6,8 @@ import pytest
 import pandas as pd
 import numpy as np
 from datetime import datetime, timedelta
-from machine_analyzer.quality_analyzer import QualityAnalyzer, QualityMetrics
+from machine_analyzer.quality_analyzer import (QualityAnalyzer, QualityIssue, QualityMetrics, QualityResult,
+                                               grade_scores, score_cycles)
 from machine_analyzer.cycle_segmenter import ProductionCycle
 
 
@@ -134,6 +135,22 @@ class TestQualityAnalyzer:
         summary = analyzer.get_quality_summary()
         assert summary == {}
     
+    def test_assign_quality_metrics(self, sample_cycle_statistics, sample_production_cycles):
+        """Test that quality metrics can still be assigned like a plain attribute."""
+        analyzer = QualityAnalyzer(sample_cycle_statistics, sample_production_cycles)
+        analyzer.analyze_quality()
+        metrics = [QualityMetrics(1, 1.0, "A", False, []),
+                   QualityMetrics(2, 0.5, "C", True, ["Variation is too high"])]
+        
+        analyzer.quality_metrics = metrics
+        analyzer.anomalous_units = [2]
+        
+        assert analyzer.quality_result is None
+        assert analyzer.get_quality_metrics() is metrics
+        assert analyzer.get_quality_summary() == {'total_cycles': 2, 'anomalous_cycles': 1,
+                                                  'average_quality_score': 0.75,
+                                                  'quality_grade_distribution': {"A": 1, "C": 1}}
+    
     def test_get_anomalous_units(self, sample_cycle_statistics, sample_production_cycles):
         """Test getting anomalous units."""
         analyzer = QualityAnalyzer(sample_cycle_statistics, sample_production_cycles)
@@ -157,6 +174,85 @@ class TestQualityAnalyzer:
         assert len(metrics) == len(sample_production_cycles)
         assert all(isinstance(metric, QualityMetrics) for metric in metrics)
 
+    def test_score_quality_columnar(self, sample_cycle_statistics, sample_production_cycles):
+        """Test the columnar result and its expansion to QualityMetrics."""
+        analyzer = QualityAnalyzer(sample_cycle_statistics, sample_production_cycles)
+        result = analyzer.score_quality({"variation": 1, "duration": 2, "energy": 2})
+
+        assert isinstance(result, QualityResult)
+        assert len(result) == len(sample_production_cycles)
+        # Variation limit is 0.25, so cycles with variation 0.23 and 0.24 pass
+        np.testing.assert_array_equal(result.issue_flags, [0, 0, 0, 0, 0])
+        assert analyzer.anomalous_units == []
+
+        result = analyzer.score_quality({"variation": 0.3, "duration": 2, "energy": 2})
+        np.testing.assert_array_equal(result.is_anomalous, [False, False, True, True, True])
+        assert analyzer.anomalous_units == [3, 4, 5]
+        metric = analyzer.get_quality_metrics()[4]
+        assert metric == QualityMetrics(cycle_id=5, quality_score=1 - 1 / 3, quality_grade="B",
+                                        is_anomalous=True, issues=["Variation is too high"])
+        assert analyzer.get_quality_summary()['quality_grade_distribution'] == {"A": 2, "B": 3}
+        # Grades are listed in order of first appearance, as in the list-based summary
+        scores = np.array([1 - 2 / 3, 1.0, 1 - 1 / 3, 1.0])
+        result = QualityResult(np.arange(4), scores, grade_scores(scores), np.array([3, 0, 1, 0]))
+        assert list(result.summary()['quality_grade_distribution'].items()) == [("D", 1), ("A", 2), ("B", 1)]
+    
+    def test_result_summary(self):
+        """Test that the cached summary matches list-based aggregation."""
+        rng = np.random.default_rng(2)
+        flags = rng.integers(0, 8, 1000).astype(np.uint8)
+        scores = 1 - np.unpackbits(flags[:, None], axis=1).sum(axis=1) / 3
+        result = QualityResult(np.arange(1000), scores, grade_scores(scores), flags)
+
+        assert result.quality_scores.dtype == np.float32
+        assert result.quality_grades.categories.tolist() == ["A", "B", "C", "D"]
+        summary = result.summary()
+        assert summary is result.summary()
+        metrics = result.to_metrics()
+        assert summary['total_cycles'] == 1000
+        assert summary['anomalous_cycles'] == sum(metric.is_anomalous for metric in metrics)
+        assert summary['anomaly_rate'] == pytest.approx(np.mean(flags != 0))
+        assert summary['average_quality_score'] == pytest.approx(np.mean(scores))
+        grades = [metric.quality_grade for metric in metrics]
+        assert summary['quality_grade_distribution'] == {grade: grades.count(grade) for grade in set(grades)}
+        assert summary['issue_counts']["Duration is too short"] == int(np.count_nonzero(flags & 2))
+        for p, value in summary['quality_score_percentiles'].items():
+            assert value == pytest.approx(np.percentile(scores, p, method="inverted_cdf"), abs=1e-6)
+
+
+class TestScoreCycles:
+    """Test cases for the vectorized cycle scorer."""
+
+    def test_matches_per_cycle_checks(self):
+        """Test that the vectorized scorer matches per-cycle threshold checks."""
+        rng = np.random.default_rng(0)
+        n_cycles = 500
+        durations = rng.normal(60, 5, n_cycles)
+        energies = rng.normal(300, 30, n_cycles)
+        variations = rng.normal(2, 0.5, n_cycles)
+        statistics = {
+            'duration_stats': {'mean': 60.0, 'std': 3.0},
+            'energy_stats': {'mean': 300.0, 'std': 20.0},
+            'variation_stats': {'mean': 2.0, 'std': 0.3}
+        }
+        result = score_cycles(np.arange(n_cycles), durations, energies, variations, statistics)
+
+        for i in range(n_cycles):
+            expected = QualityIssue(0)
+            if variations[i] > 2.0 + 2 * 0.3:
+                expected |= QualityIssue.HIGH_VARIATION
+            if durations[i] < 60.0 - 2 * 3.0:
+                expected |= QualityIssue.SHORT_DURATION
+            if energies[i] > 300.0 + 2 * 20.0:
+                expected |= QualityIssue.HIGH_ENERGY
+            assert result.issue_flags[i] == expected
+            assert result.quality_scores[i] == 1 - bin(expected).count("1") / 3
+
+    def test_grade_scores(self):
+        """Test grade boundaries."""
+        grades = grade_scores(np.array([1.0, 0.8, 0.79, 0.6, 0.4, 0.39, 0.0]))
+        np.testing.assert_array_equal(grades, [0, 0, 1, 1, 2, 3, 3])
+
 
 class TestQualityMetrics:
     """Test cases for QualityMetrics dataclass."""
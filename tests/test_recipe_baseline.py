@@ -0,0 +1,91 @@
+"""
+Tests for RecipeBaselineCache class.
+"""
+
+import pytest
+import numpy as np
+import pandas as pd
+from machine_analyzer.cycle_segmenter import ProductionCycle
+from machine_analyzer.quality_analyzer import QualityAnalyzer
+from machine_analyzer.recipe_baseline import RecipeBaselineCache
+from machine_analyzer.running_statistics import CycleStatisticsAccumulator
+
+
+class TestRecipeBaselineCache:
+    """Test cases for RecipeBaselineCache class."""
+
+    @pytest.fixture
+    def mixed_cycles(self):
+        """Create cycles of a short and a long product, alternating, with one bad long cycle."""
+        rng = np.random.default_rng(1)
+        base_time = pd.Timestamp('2024-01-01')
+        cycles, recipes = [], []
+        for i in range(200):
+            long_product = i % 2 == 1
+            duration = (1800 if long_product else 600) + rng.normal(0, 10)
+            energy = (5000 if long_product else 1000) + rng.normal(0, 20)
+            if i == 101:
+                energy += 400
+            start = base_time + pd.Timedelta(minutes=40 * i)
+            cycles.append(ProductionCycle(i, start, start + pd.Timedelta(seconds=duration),
+                                          pd.Timedelta(seconds=duration), energy, energy / 10, energy / 20, 0.2))
+            recipes.append("long" if long_product else "short")
+        return cycles, np.array(recipes)
+
+    def test_recipe_keys_remove_false_anomalies(self, mixed_cycles):
+        """Test that per-recipe baselines catch the bad cycle that the mixed baseline hides."""
+        cycles, recipes = mixed_cycles
+        analyzer = QualityAnalyzer(CycleStatisticsAccumulator().add_cycles(cycles).to_dict(), cycles)
+
+        cache = RecipeBaselineCache()
+        keys = cache.learn(analyzer.get_cycle_arrays(), recipes)
+        assert sorted(cache.keys) == ["long", "short"]
+        assert keys.tolist() == recipes.tolist()
+        assert cache.get_statistics("short")['total_cycles'] == 100
+
+        strict = {"variation": 4, "duration": 4, "energy": 4}
+        analyzer.score_quality(strict)
+        assert 101 not in analyzer.anomalous_units
+
+        result = analyzer.score_quality(strict, recipe_baselines=cache, recipes=recipes)
+        assert analyzer.anomalous_units == [101]
+        assert result.to_dataframe()['group'].tolist() == recipes.tolist()
+
+    def test_clustering_matches_recipes(self, mixed_cycles):
+        """Test that automatic clusters separate the two products."""
+        cycles, recipes = mixed_cycles
+        analyzer = QualityAnalyzer({}, cycles)
+        arrays = analyzer.get_cycle_arrays()
+
+        cache = RecipeBaselineCache(n_clusters=2)
+        keys = cache.learn(arrays)
+        assert set(keys[recipes == "short"]) == {"cluster_0"}
+        assert set(keys[recipes == "long"]) == {"cluster_1"}
+        assert cache.assign(np.array([590.0]), np.array([1010.0])).tolist() == ["cluster_0"]
+
+    def test_save_and_load(self, mixed_cycles, tmp_path):
+        """Test that a saved cache scores a new batch like the original."""
+        cycles, recipes = mixed_cycles
+        history = QualityAnalyzer({}, cycles[:100])
+        cache = RecipeBaselineCache(n_clusters=2, sketch_capacity=64)
+        cache.learn(history.get_cycle_arrays())
+
+        path = str(tmp_path / "baselines.npz")
+        cache.save(path)
+        loaded = RecipeBaselineCache.load(path)
+        assert loaded.keys == cache.keys
+        assert loaded.get_statistics("cluster_1") == cache.get_statistics("cluster_1")
+        np.testing.assert_array_equal(loaded.centroids, cache.centroids)
+        assert all(group.sketch_capacity == 64 for group in loaded.groups.values())
+
+        batch = QualityAnalyzer({}, cycles[100:])
+        expected = batch.score_quality(recipe_baselines=cache).issue_flags.copy()
+        np.testing.assert_array_equal(batch.score_quality(recipe_baselines=loaded).issue_flags, expected)
+        assert 101 in batch.anomalous_units
+
+    def test_missing_keys(self):
+        """Test that recipe keys are required without clustering."""
+        with pytest.raises(ValueError):
+            RecipeBaselineCache().group_keys(np.ones(3), np.ones(3))
+        with pytest.raises(ValueError):
+            RecipeBaselineCache(n_clusters=2).assign(np.ones(3), np.ones(3))
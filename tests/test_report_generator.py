@@ -6,9 +6,11 @@ import pytest
 import pandas as pd
 import numpy as np
 from datetime import datetime, timedelta
+import io
 import os
 from machine_analyzer.report_generator import ReportGenerator
-from machine_analyzer.quality_analyzer import QualityMetrics
+from machine_analyzer.quality_analyzer import QualityAnalyzer, QualityMetrics, QualityResult, grade_scores, score_cycles
+from machine_analyzer.fleet_summary import MachineResult
 from machine_analyzer.cycle_segmenter import ProductionCycle
 
 
@@ -125,6 +127,186 @@ class TestReportGenerator:
         assert 'quality_grade' in df.columns
         # Note: variation is not included in CSV output, only in cycle data
     
+    def test_reports_from_quality_result(self, sample_energy_data, sample_production_cycles,
+                                         sample_quality_metrics, tmp_path):
+        """Test that a columnar QualityResult gives the same reports as QualityMetrics."""
+        generator = ReportGenerator(str(tmp_path))
+        statistics = {group: {'mean': mean, 'std': std} for group, mean, std in
+                      [('duration_stats', 900, 1), ('energy_stats', 1550, 50), ('variation_stats', 0.21, 0.01)]}
+        analyzer = QualityAnalyzer(statistics, sample_production_cycles)
+        result = analyzer.score_quality()
+        
+        from_result = generator.generate_summary_statistics(
+            sample_energy_data, sample_production_cycles, result, analyzer.anomalous_units)
+        from_metrics = generator.generate_summary_statistics(
+            sample_energy_data, sample_production_cycles, analyzer.quality_metrics, analyzer.anomalous_units)
+        assert from_result['production_summary']['average_quality_score'] == pytest.approx(
+            from_metrics['production_summary']['average_quality_score'])
+        
+        csv_path = generator.generate_csv_report(sample_production_cycles, result)
+        df = pd.read_csv(csv_path)
+        assert df['quality_grade'].tolist() == result.quality_grades.tolist()
+        
+        report_path = generator.generate_simple_report(
+            sample_energy_data, sample_production_cycles, result, analyzer.anomalous_units)
+        with open(report_path, 'r', encoding='utf-8') as f:
+            assert 'Quality Grade Distribution:' in f.read()
+    
+    def test_streaming_report_matches_simple_report(self, sample_energy_data, sample_production_cycles,
+                                                    tmp_path):
+        """Test that the streaming report has the same content as the simple report."""
+        generator = ReportGenerator(str(tmp_path))
+        statistics = {group: {'mean': mean, 'std': std} for group, mean, std in
+                      [('duration_stats', 900, 1), ('energy_stats', 1550, 50), ('variation_stats', 0.21, 0.01)]}
+        analyzer = QualityAnalyzer(statistics, sample_production_cycles)
+        result = analyzer.score_quality()
+        
+        simple = generator._create_simple_report(sample_energy_data, sample_production_cycles,
+                                                 analyzer.quality_metrics, analyzer.anomalous_units)
+        buffer = io.StringIO()
+        generator.write_report(buffer, sample_energy_data, analyzer.get_cycle_arrays(), result)
+        
+        def without_header(text):
+            return [line for line in text.splitlines() if not line.startswith(("Generated on", "  Cycle ID"))]
+        assert without_header(buffer.getvalue()) == without_header(simple)
+        assert buffer.getvalue().count("Cycle IDs: ") == 1
+    
+    def test_streaming_report_pages_anomalies(self, tmp_path):
+        """Test that long anomaly lists are truncated and the report size stays bounded."""
+        generator = ReportGenerator(str(tmp_path))
+        n_cycles = 200000
+        flags = np.zeros(n_cycles, dtype=np.uint8)
+        flags[::2] = 1
+        scores = np.where(flags, 2 / 3, 1.0)
+        result = QualityResult(np.arange(n_cycles), scores, grade_scores(scores), flags)
+        arrays = {'duration': np.full(n_cycles, 60.0), 'energy': np.full(n_cycles, 10.0)}
+        
+        report_path = generator.generate_streaming_report(pd.DataFrame(), arrays, result,
+                                                          max_listed_anomalies=25, ids_per_line=10)
+        with open(report_path, 'r', encoding='utf-8') as f:
+            content = f.read()
+        assert "Found 100000 anomalous units:" in content
+        assert content.count("Cycle IDs: ") == 3
+        assert "... and 99975 more" in content
+        assert "Total Energy Consumed: 2000000.0" in content
+        assert "High anomalous unit rate detected" in content
+        assert len(content) < 2000
+    
+    @pytest.mark.parametrize("downsample", ["lttb", "minmax"])
+    def test_generate_html_report(self, downsample, tmp_path):
+        """Test that the HTML chart size does not grow with the length of the data."""
+        generator = ReportGenerator(str(tmp_path))
+        dates = pd.date_range('2024-01-01', periods=200_000, freq='1s')
+        values = np.where((np.arange(len(dates)) // 600) % 2 == 0, 120.0, 2.0)
+        energy_data = pd.DataFrame({'value': values,
+                                    'machine_state': np.where(values > 5, 'production', 'standby')}, index=dates)
+        cycle_arrays = {
+            'cycle_id': np.arange(1, 167),
+            'start_time': dates[::1200][:166].to_numpy(),
+            'duration': np.full(166, 600.0),
+            'energy': np.full(166, 72_000.0),
+        }
+        
+        report_path = generator.generate_html_report(energy_data, cycle_arrays, anomalous_units=[3, 4],
+                                                     width=400, downsample=downsample)
+        
+        with open(report_path, 'r', encoding='utf-8') as f:
+            content = f.read()
+        assert report_path.endswith(".html")
+        assert "<svg" in content and "Total Production Cycles" in content
+        points = content.split('<polyline points="')[1].split('"')[0].split()
+        assert len(points) <= 2 * 400 + 2
+        assert content.count('fill="#d62728"') == 1
+        assert content.count('<rect') <= 3 * 400
+        assert os.path.getsize(report_path) < 100_000
+    
+    def test_generate_html_report_empty_data(self, tmp_path):
+        """Test the HTML report without energy data or cycles."""
+        generator = ReportGenerator(str(tmp_path))
+        report_path = generator.generate_html_report(pd.DataFrame(), [])
+        with open(report_path, 'r', encoding='utf-8') as f:
+            assert "No energy data." in f.read()
+        with pytest.raises(ValueError):
+            generator.generate_html_report(pd.DataFrame(), [], downsample="random")
+    
+    @pytest.mark.parametrize("report_format", ["parquet", "arrow"])
+    def test_generate_columnar_report(self, sample_production_cycles, report_format, tmp_path):
+        """Test that columnar reports keep timestamp, categorical and flag types."""
+        pa = pytest.importorskip("pyarrow")
+        generator = ReportGenerator(str(tmp_path))
+        statistics = {group: {'mean': mean, 'std': std} for group, mean, std in
+                      [('duration_stats', 900, 1), ('energy_stats', 1550, 50), ('variation_stats', 0.21, 0.01)]}
+        analyzer = QualityAnalyzer(statistics, sample_production_cycles)
+        result = analyzer.score_quality()
+        
+        path = generator.generate_columnar_report(analyzer.get_cycle_arrays(), result, format=report_format,
+                                                  compression="zstd", machine="press_1")
+        if report_format == "parquet":
+            import pyarrow.parquet as pq
+            table = pq.read_table(path)
+        else:
+            with pa.memory_map(path) as source:
+                table = pa.ipc.open_file(source).read_all()
+        
+        assert table.schema.field('start_time').type == pa.timestamp('ns')
+        assert pa.types.is_dictionary(table.schema.field('quality_grade').type)
+        assert table.schema.field('quality_score').type == pa.float32()
+        df = table.to_pandas()
+        assert df['cycle_id'].tolist() == [cycle.cycle_id for cycle in sample_production_cycles]
+        assert df['end_time'].tolist() == [cycle.end_time for cycle in sample_production_cycles]
+        assert df['quality_grade'].astype(str).tolist() == result.quality_grades.astype(str).tolist()
+        assert df['issue_flags'].tolist() == result.issue_flags.tolist()
+        assert set(df['machine'].astype(str)) == {"press_1"}
+    
+    def test_generate_partitioned_report(self, tmp_path):
+        """Test partitioning a Parquet report by day and machine."""
+        pytest.importorskip("pyarrow")
+        import pyarrow.dataset as ds
+        generator = ReportGenerator(str(tmp_path))
+        n_cycles = 96
+        arrays = {
+            'cycle_id': np.arange(n_cycles),
+            'start_time': pd.date_range('2024-01-01', periods=n_cycles, freq='1h').to_numpy(),
+            'duration': np.full(n_cycles, 600.0),
+            'energy': np.arange(n_cycles, dtype=np.float64),
+        }
+        
+        path = generator.generate_columnar_report(arrays, partition_by=["machine", "day"], machine="press_1")
+        assert os.path.isdir(path)
+        assert sorted(os.listdir(os.path.join(path, "machine=press_1"))) == [
+            "day=2024-01-01", "day=2024-01-02", "day=2024-01-03", "day=2024-01-04"]
+        table = ds.dataset(path, format="parquet", partitioning="hive").to_table()
+        assert sorted(table.column('cycle_id').to_pylist()) == list(range(n_cycles))
+        
+        with pytest.raises(ValueError):
+            generator.generate_columnar_report(arrays, partition_by=["machine"])
+    
+    def test_generate_fleet_report(self, tmp_path):
+        """Test the fleet report rankings and machine sections."""
+        generator = ReportGenerator(str(tmp_path))
+        dates = pd.date_range('2024-01-01', periods=1000, freq='1min')
+        statistics = {'duration_stats': {'mean': 900, 'std': 30}, 'energy_stats': {'mean': 1000, 'std': 20},
+                      'variation_stats': {'mean': 0.2, 'std': 0.02}}
+        machines = []
+        for name, energy in [("press-1", 1000.0), ("press-2", 1200.0)]:
+            cycle_arrays = {'cycle_id': np.arange(200), 'start_time': dates[:200].to_numpy(),
+                            'duration': np.full(200, 900.0), 'energy': np.full(200, energy),
+                            'peak': np.full(200, 120.0), 'variation': np.full(200, 0.2)}
+            result = score_cycles(cycle_arrays['cycle_id'], cycle_arrays['duration'], cycle_arrays['energy'],
+                                  cycle_arrays['variation'], statistics)
+            machines.append(MachineResult(name, pd.DataFrame({'value': np.full(1000, 100.0)}, index=dates),
+                                          cycle_arrays, result))
+        
+        report_path = generator.generate_fleet_report(machines, n_workers=2, top_n=5)
+        
+        with open(report_path, 'r', encoding='utf-8') as f:
+            content = f.read()
+        assert "Machines: 2" in content
+        assert "Total Production Cycles: 400" in content
+        energy_ranking = content.split("HIGHEST ENERGY PER CYCLE")[1]
+        assert energy_ranking.index("1. press-2") < energy_ranking.index("2. press-1")
+        assert "MACHINE press-1" in content and "MACHINE press-2" in content
+    
     def test_generate_csv_report_empty_data(self, tmp_path):
         """Test CSV report generation with empty data."""
         generator = ReportGenerator(str(tmp_path))
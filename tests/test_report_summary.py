@@ -0,0 +1,87 @@
+"""
+Tests for ReportSummary class.
+"""
+
+import pytest
+import pandas as pd
+import numpy as np
+from machine_analyzer.cycle_segmenter import ProductionCycle
+from machine_analyzer.quality_analyzer import QualityAnalyzer
+from machine_analyzer.report_generator import ReportGenerator
+from machine_analyzer.report_summary import ReportSummary
+
+
+class TestReportSummary:
+    """Test cases for ReportSummary class."""
+
+    @pytest.fixture
+    def analysis(self):
+        """Create energy data, cycles and a scored quality analyzer."""
+        dates = pd.date_range('2024-01-01', periods=600, freq='1min')
+        energy_data = pd.DataFrame({'value': np.linspace(50, 150, 600)}, index=dates)
+        cycles = []
+        for i in range(20):
+            start = dates[0] + pd.Timedelta(minutes=30 * i)
+            duration = pd.Timedelta(minutes=20 + i % 3)
+            cycles.append(ProductionCycle(i, start, start + duration, duration, 1000.0 + 10 * i,
+                                          120.0, 100.0, 0.2 + (0.1 if i == 7 else 0)))
+        statistics = {group: {'mean': mean, 'std': std} for group, mean, std in
+                      [('duration_stats', 1260, 60), ('energy_stats', 1100, 60), ('variation_stats', 0.2, 0.02)]}
+        analyzer = QualityAnalyzer(statistics, cycles)
+        analyzer.analyze_quality()
+        return energy_data, cycles, analyzer
+
+    def test_list_and_columnar_inputs_agree(self, analysis):
+        """Test that cycle objects and cycle arrays give the same aggregates."""
+        energy_data, cycles, analyzer = analysis
+        from_objects = ReportSummary(energy_data, cycles, analyzer.quality_metrics, analyzer.anomalous_units)
+        from_arrays = ReportSummary(energy_data, analyzer.get_cycle_arrays(), analyzer.quality_result)
+
+        assert from_arrays.anomalous_units.tolist() == analyzer.anomalous_units == [7]
+        assert from_objects.statistics['production'] == pytest.approx(from_arrays.statistics['production'])
+        assert from_objects.statistics['energy_statistics']['total_energy'] == pytest.approx(
+            energy_data['value'].sum())
+        pd.testing.assert_frame_equal(from_objects.cycle_frame(), from_arrays.cycle_frame())
+        pd.testing.assert_frame_equal(from_objects.quality_frame(), from_arrays.quality_frame(),
+                                      check_dtype=False)
+
+    def test_reports_share_one_summary(self, analysis, tmp_path):
+        """Test that all report formats of one call render from one summary."""
+        energy_data, cycles, analyzer = analysis
+        generator = ReportGenerator(str(tmp_path))
+        metrics, anomalous = analyzer.quality_metrics, analyzer.anomalous_units
+
+        summary = generator.summarize(energy_data, cycles, metrics, anomalous)
+        statistics = summary.statistics
+        paths = generator.generate_all_reports(energy_data, cycles, metrics, anomalous)
+        stats = generator.generate_summary_statistics(energy_data, cycles, metrics, anomalous, summary=summary)
+
+        assert set(paths) == {"simple", "csv", "html"}
+        assert summary.statistics is statistics
+        assert stats['production_summary']['anomalous_units'] == 1
+        assert pd.read_csv(paths["csv"])['cycle_id'].tolist() == list(range(20))
+        with pytest.raises(ValueError, match="Unknown report formats"):
+            generator.generate_all_reports(energy_data, cycles, metrics, anomalous, formats=("pdf",))
+
+    def test_inputs_changed_in_place(self, analysis, tmp_path):
+        """Test that reports reflect inputs modified in place between calls."""
+        energy_data, cycles, analyzer = analysis
+        energy_data = energy_data.copy()
+        generator = ReportGenerator(str(tmp_path))
+        metrics, anomalous = list(analyzer.quality_metrics), list(analyzer.anomalous_units)
+        before = generator.generate_summary_statistics(energy_data, cycles, metrics, anomalous)
+
+        cycles.append(cycles[-1])
+        metrics.append(metrics[7])
+        anomalous.append(20)
+        energy_data.iloc[0, 0] += 100
+        after = generator.generate_summary_statistics(energy_data, cycles, metrics, anomalous)
+
+        assert after['production_summary']['total_cycles'] == before['production_summary']['total_cycles'] + 1
+        assert after['production_summary']['anomalous_units'] == 2
+        assert after['production_summary']['average_quality_score'] < \
+            before['production_summary']['average_quality_score']
+        assert after['energy_statistics']['total_energy'] == pytest.approx(
+            before['energy_statistics']['total_energy'] + 100)
+        csv_path = generator.generate_csv_report(cycles, metrics)
+        assert len(pd.read_csv(csv_path)) == 21
@@ -0,0 +1,89 @@
+"""
+Tests for ReportWorkerPool class.
+"""
+
+import pytest
+import asyncio
+import os
+import pandas as pd
+import numpy as np
+from machine_analyzer.cycle_segmenter import ProductionCycle
+from machine_analyzer.quality_analyzer import QualityAnalyzer
+from machine_analyzer.report_generator import ReportGenerator
+from machine_analyzer.report_workers import ReportWorkerPool
+
+
+class TestReportWorkerPool:
+    """Test cases for ReportWorkerPool class."""
+
+    @pytest.fixture
+    def analysis(self):
+        """Create energy data, cycles and quality metrics."""
+        dates = pd.date_range('2024-01-01', periods=200, freq='1min')
+        energy_data = pd.DataFrame({'value': np.linspace(50, 150, 200)}, index=dates)
+        cycles = []
+        for i in range(10):
+            start = dates[0] + pd.Timedelta(minutes=20 * i)
+            duration = pd.Timedelta(minutes=15)
+            cycles.append(ProductionCycle(i, start, start + duration, duration, 1000.0 + i, 120.0, 100.0, 0.2))
+        statistics = {group: {'mean': mean, 'std': std} for group, mean, std in
+                      [('duration_stats', 900, 10), ('energy_stats', 1000, 2), ('variation_stats', 0.2, 0.01)]}
+        analyzer = QualityAnalyzer(statistics, cycles)
+        analyzer.analyze_quality()
+        return energy_data, cycles, analyzer
+
+    @pytest.mark.parametrize("use_processes", [False, True])
+    def test_concurrent_reports_do_not_collide(self, analysis, use_processes, tmp_path):
+        """Test that many reports submitted at once all get their own file."""
+        energy_data, cycles, analyzer = analysis
+        generator = ReportGenerator(str(tmp_path))
+
+        with ReportWorkerPool(generator, max_writers=3, use_processes=use_processes) as pool:
+            futures = [pool.submit("simple", energy_data, cycles, analyzer.quality_metrics, analyzer.anomalous_units)
+                       for _ in range(6)]
+            futures += [pool.submit("csv", cycles, analyzer.quality_result) for _ in range(6)]
+            paths = [future.result(timeout=60) for future in futures]
+
+        assert len(set(paths)) == 12
+        assert all(os.path.getsize(path) > 0 for path in paths)
+        assert pool.pending == 0
+        df = pd.read_csv(paths[-1])
+        assert df['cycle_id'].tolist() == list(range(10))
+
+    def test_concurrent_summaries_of_different_inputs(self, analysis, tmp_path):
+        """Test that threads sharing the summary cache each get the summary of their own inputs."""
+        energy_data, cycles, _ = analysis
+        generator = ReportGenerator(str(tmp_path))
+
+        with ReportWorkerPool(generator, max_writers=4) as pool:
+            futures = [(n, pool.submit("summary", energy_data, cycles[:n], None, []))
+                       for _ in range(20) for n in range(1, 11)]
+            totals = [(n, future.result(timeout=60)['production_summary']['total_cycles']) for n, future in futures]
+
+        assert all(n == total for n, total in totals)
+
+    def test_awaitable_reports(self, analysis, tmp_path):
+        """Test the asyncio variant."""
+        energy_data, cycles, analyzer = analysis
+        generator = ReportGenerator(str(tmp_path))
+
+        async def write_reports(pool):
+            return await asyncio.gather(
+                pool.generate("simple", energy_data, cycles, analyzer.quality_metrics, analyzer.anomalous_units),
+                pool.generate("summary", energy_data, cycles, analyzer.quality_metrics, analyzer.anomalous_units))
+
+        with ReportWorkerPool(generator, max_writers=1) as pool:
+            report_path, summary = asyncio.run(write_reports(pool))
+        assert os.path.exists(report_path)
+        assert summary['production_summary']['total_cycles'] == 10
+
+    def test_errors(self, tmp_path):
+        """Test invalid report types and failing jobs."""
+        with ReportWorkerPool(ReportGenerator(str(tmp_path))) as pool:
+            with pytest.raises(ValueError):
+                pool.submit("pdf")
+            future = pool.submit("csv")
+            with pytest.raises(TypeError):
+                future.result(timeout=10)
+        with pytest.raises(ValueError):
+            ReportWorkerPool(ReportGenerator(str(tmp_path)), max_writers=0)
@@ -0,0 +1,100 @@
+"""
+Tests for RollingBaseline class.
+"""
+
+import pytest
+import pandas as pd
+import numpy as np
+from machine_analyzer.cycle_segmenter import ProductionCycle
+from machine_analyzer.online_quality_analyzer import OnlineQualityAnalyzer
+from machine_analyzer.quality_analyzer import QualityAnalyzer
+from machine_analyzer.rolling_baseline import RollingBaseline
+
+
+class TestRollingBaseline:
+    """Test cases for RollingBaseline class."""
+
+    @pytest.fixture
+    def drifting_series(self):
+        """Create drifting feature vectors at irregular times."""
+        rng = np.random.default_rng(0)
+        n_cycles = 300
+        values = np.cumsum(rng.normal(0, 1, (n_cycles, 2)), axis=0) + 1000
+        times = pd.Timestamp('2024-01-01') + pd.to_timedelta(np.cumsum(rng.integers(10, 100, n_cycles)), unit='s')
+        return values, times
+
+    @pytest.mark.parametrize("options", [
+        {"method": "rolling", "window": 20},
+        {"method": "rolling", "window": "15min"},
+        {"method": "ewm", "halflife": 10.0},
+        {"method": "ewm", "halflife": "10min"},
+    ])
+    def test_streaming_matches_batch(self, drifting_series, options):
+        """Test that streaming updates reproduce the vectorized baseline."""
+        values, times = drifting_series
+        baseline = RollingBaseline(min_periods=5, **options)
+        means, stds = baseline.compute(values, times)
+
+        streamed = [baseline.update(value, time) for value, time in zip(values, times)]
+        stream_means = np.array([mean for mean, _ in streamed])
+        stream_stds = np.array([std for _, std in streamed])
+
+        np.testing.assert_array_equal(np.isnan(means), np.isnan(stream_means))
+        np.testing.assert_allclose(means, stream_means, rtol=1e-10, equal_nan=True)
+        np.testing.assert_allclose(stds, stream_stds, rtol=1e-6, atol=1e-9, equal_nan=True)
+
+    def test_rolling_window_in_cycles(self):
+        """Test the baseline of a count window against a direct computation."""
+        values = np.arange(10, dtype=np.float64) ** 2
+        means, stds = RollingBaseline(window=3, min_periods=2).compute(values)
+
+        assert np.isnan(means[:2]).all()
+        assert means[5] == pytest.approx(values[2:5].mean())
+        assert stds[5] == pytest.approx(values[2:5].std())
+
+    def test_invalid_configuration(self):
+        """Test that invalid configurations are rejected."""
+        with pytest.raises(ValueError):
+            RollingBaseline(method="median")
+        with pytest.raises(ValueError):
+            RollingBaseline(method="ewm")
+        with pytest.raises(ValueError):
+            RollingBaseline(window=5, min_periods=10)
+        with pytest.raises(ValueError):
+            RollingBaseline(window="1h").compute(np.ones(5))
+
+
+class TestDriftAwareQuality:
+    """Test drift-aware thresholds in the quality analyzers."""
+
+    @pytest.fixture
+    def worn_tool_cycles(self):
+        """Create cycles whose energy rises steadily with tool wear, with one spike."""
+        rng = np.random.default_rng(1)
+        cycles = []
+        for i in range(400):
+            energy = 300 + 0.5 * i + rng.normal(0, 2) + (40 if i == 300 else 0)
+            start_time = pd.Timestamp('2024-01-01') + pd.Timedelta(minutes=i)
+            cycles.append(ProductionCycle(
+                cycle_id=i, start_time=start_time, end_time=start_time + pd.Timedelta(seconds=50),
+                duration=pd.Timedelta(seconds=50), energy_consumption=energy, peak_energy=10.0,
+                average_energy=energy / 50, variation=1.0
+            ))
+        return cycles
+
+    def test_rolling_baseline_follows_drift(self, worn_tool_cycles):
+        """Test that a rolling baseline flags the spike but not the worn-tool cycles."""
+        energies = np.array([cycle.energy_consumption for cycle in worn_tool_cycles])
+        statistics = {'energy_stats': {'mean': energies.mean(), 'std': energies.std()}}
+
+        global_result = QualityAnalyzer(statistics, worn_tool_cycles).score_quality({"energy": 1.5})
+        assert global_result.is_anomalous[-20:].all()
+
+        analyzer = QualityAnalyzer(statistics, worn_tool_cycles)
+        result = analyzer.score_quality({"energy": 4}, baseline=RollingBaseline(window="30min"))
+        assert analyzer.anomalous_units == [300]
+
+        online = OnlineQualityAnalyzer({"energy": 4}, rolling_baseline=RollingBaseline(window="30min"))
+        flagged = [cycle.cycle_id for cycle in worn_tool_cycles if online.update(cycle).issues]
+        assert flagged == [300]
+        np.testing.assert_array_equal(result.is_anomalous, np.isin(np.arange(400), flagged))
@@ -0,0 +1,121 @@
+"""
+Tests for RollupStore class.
+"""
+
+import pytest
+import pandas as pd
+import numpy as np
+from machine_analyzer.quality_analyzer import QualityResult, grade_scores
+from machine_analyzer.report_generator import ReportGenerator
+from machine_analyzer.rollup_store import RollupStore
+
+
+def make_day(day: str, n_cycles: int = 48, seed: int = 0):
+    """Create one day of minute energy data, cycles every 30 minutes and their quality result."""
+    rng = np.random.default_rng(seed)
+    index = pd.date_range(day, periods=24 * 60, freq='1min')
+    energy_data = pd.DataFrame({'value': rng.uniform(50, 150, len(index))}, index=index)
+    arrays = {
+        'cycle_id': np.arange(n_cycles),
+        'start_time': (index[0] + pd.to_timedelta(np.arange(n_cycles) * 30, unit='min')).to_numpy(),
+        'duration': rng.normal(1200, 30, n_cycles),
+        'energy': rng.normal(2000, 50, n_cycles),
+    }
+    flags = (rng.random(n_cycles) < 0.2).astype(np.uint8)
+    scores = 1 - flags / 3
+    return energy_data, arrays, QualityResult(arrays['cycle_id'], scores, grade_scores(scores), flags)
+
+
+class TestRollupStore:
+    """Test cases for RollupStore class."""
+
+    def test_daily_rows_match_raw_data(self):
+        """Test that hour, shift and day rows add up to the raw aggregates."""
+        store = RollupStore()
+        energy_data, arrays, result = make_day('2024-03-01')
+        assert store.add(energy_data, arrays, result, machine="press_1") == 24 + 4 + 1
+
+        day = store.query("day").iloc[0]
+        assert day['energy_total'] == pytest.approx(energy_data['value'].sum())
+        assert day['energy_peak'] == pytest.approx(energy_data['value'].max())
+        assert day['cycle_count'] == 48
+        assert day['anomaly_count'] == int(result.is_anomalous.sum())
+        assert day['grade_a'] + day['grade_b'] == 48
+
+        hours = store.query("hour")
+        assert len(hours) == 24 and hours['cycle_count'].tolist() == [2] * 24
+        shifts = store.query("shift")
+        # Shifts start at 06, 14 and 22; the first hours belong to the previous day's night shift
+        assert shifts.index.strftime("%m-%d %H").tolist() == ["02-29 22", "03-01 06", "03-01 14", "03-01 22"]
+        assert shifts['cycle_count'].tolist() == [12, 16, 16, 4]
+        assert shifts['energy_total'].sum() == pytest.approx(day['energy_total'])
+
+    def test_monthly_rollup_from_daily_runs(self, tmp_path):
+        """Test that a monthly rollup of daily runs matches the combined raw data."""
+        path = str(tmp_path / "rollups.sqlite")
+        runs = [make_day(day.strftime('%Y-%m-%d'), seed=i)
+                for i, day in enumerate(pd.date_range('2024-01-30', periods=4, freq='D'))]
+        for energy_data, arrays, result in runs:
+            RollupStore(path).add(energy_data, arrays, result)
+        # Re-running a day replaces its rows
+        store = RollupStore(path)
+        store.add(*runs[0], replace=True)
+
+        months = store.rollup("MS")
+        assert months.index.strftime("%Y-%m").tolist() == ["2024-01", "2024-02"]
+        assert months['cycle_count'].tolist() == [96, 96]
+        january = pd.concat([runs[0][0], runs[1][0]])['value']
+        assert months['energy_total'].iloc[0] == pytest.approx(january.sum())
+        assert months['average_energy'].iloc[0] == pytest.approx(january.mean())
+        anomalies = sum(int(result.is_anomalous.sum()) for _, _, result in runs[2:])
+        assert months['anomaly_rate'].iloc[1] == pytest.approx(anomalies / 96)
+
+    def test_additive_runs(self):
+        """Test that runs splitting a day add up when not replacing."""
+        store = RollupStore()
+        energy_data, arrays, result = make_day('2024-03-01')
+        half = len(energy_data) // 2
+        first = {key: value[:24] for key, value in arrays.items()}
+        second = {key: value[24:] for key, value in arrays.items()}
+        store.add(energy_data.iloc[:half], first, QualityResult(
+            result.cycle_ids[:24], result.quality_scores[:24], result.grade_codes[:24], result.issue_flags[:24]))
+        store.add(energy_data.iloc[half:], second, QualityResult(
+            result.cycle_ids[24:], result.quality_scores[24:], result.grade_codes[24:], result.issue_flags[24:]))
+
+        day = store.query("day").iloc[0]
+        assert day['cycle_count'] == 48
+        assert day['energy_total'] == pytest.approx(energy_data['value'].sum())
+        assert day['energy_peak'] == pytest.approx(energy_data['value'].max())
+
+    def test_consecutive_days_accumulate(self):
+        """Test that the night shift crossing midnight holds the samples of both days."""
+        store = RollupStore()
+        runs = [make_day('2024-01-01', seed=0), make_day('2024-01-02', seed=1)]
+        for run in runs:
+            store.add(*run)
+
+        shifts = store.query("shift")
+        night = shifts.loc[pd.Timestamp('2024-01-01 22:00')]
+        assert night['energy_samples'] == 480
+        assert night['cycle_count'] == 16
+        both_days = pd.concat([runs[0][0], runs[1][0]])['value']
+        assert shifts['energy_total'].sum() == pytest.approx(both_days.sum())
+        assert store.query("day")['energy_total'].sum() == pytest.approx(both_days.sum())
+
+        # Re-running the second day replaces its hours and rebuilds the shifts it touches
+        store.add(*runs[1], replace=True)
+        rerun = store.query("shift")
+        pd.testing.assert_frame_equal(rerun, shifts)
+        assert store.query("hour")['energy_samples'].sum() == len(both_days)
+
+    def test_report_generator_rollups(self, tmp_path):
+        """Test the rollup report of ReportGenerator."""
+        generator = ReportGenerator(str(tmp_path))
+        energy_data, arrays, result = make_day('2024-03-01')
+        generator.update_rollups(energy_data, arrays, result, machine="press_1")
+        generator.update_rollups(energy_data, arrays, result, machine="press_1", replace=True)
+
+        report = pd.read_csv(generator.generate_rollup_report("MS"))
+        assert report['period_start'].tolist() == ["2024-03-01"]
+        assert report['cycle_count'].tolist() == [48]
+        assert (tmp_path / "rollups.sqlite").exists()
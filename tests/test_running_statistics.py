@@ -0,0 +1,128 @@
+"""
+Tests for the mergeable running statistics.
+"""
+
+import pytest
+import numpy as np
+from machine_analyzer.running_statistics import CycleStatisticsAccumulator, QuantileSketch, RunningStats
+
+
+class TestRunningStats:
+    """Test cases for RunningStats class."""
+
+    def test_update_matches_numpy(self):
+        """Batch updates give the same moments as numpy."""
+        values = np.random.default_rng(0).normal(5, 2, 1000)
+        stats = RunningStats().update(values[:300]).update(values[300:])
+
+        assert stats.count == 1000
+        assert stats.mean == pytest.approx(values.mean())
+        assert stats.std == pytest.approx(values.std())
+        assert stats.min == values.min()
+        assert stats.max == values.max()
+        assert stats.total == pytest.approx(values.sum())
+
+    def test_push_and_merge(self):
+        """Single pushes and merges agree with one batch update."""
+        values = np.random.default_rng(1).exponential(3, 200)
+        pushed = RunningStats()
+        for value in values[:50]:
+            pushed.push(value)
+        merged = pushed.merge(RunningStats().update(values[50:]))
+
+        assert merged.mean == pytest.approx(values.mean())
+        assert merged.variance == pytest.approx(values.var())
+
+    def test_state_round_trip(self):
+        """Serialized state restores the accumulator."""
+        stats = RunningStats().update([1.0, 2.0, 4.0])
+        restored = RunningStats.from_state(stats.get_state())
+        assert restored.count == 3
+        assert restored.std == stats.std
+
+
+class TestQuantileSketch:
+    """Test cases for QuantileSketch class."""
+
+    def test_exact_below_capacity(self):
+        """The sketch is exact until its capacity is exceeded."""
+        values = np.random.default_rng(2).normal(size=501)
+        sketch = QuantileSketch(capacity=1024).update(values)
+        assert sketch.is_exact
+        assert sketch.median() == np.median(values)
+
+    def test_approximate_rank_error(self):
+        """Compacted sketches keep the median within a small rank error."""
+        values = np.random.default_rng(3).uniform(size=100000)
+        sketch = QuantileSketch(capacity=256)
+        for chunk in np.array_split(values, 20):
+            sketch.update(chunk)
+
+        assert not sketch.is_exact
+        rank = (values < sketch.median()).mean()
+        assert abs(rank - 0.5) < 0.02
+        assert sum(len(level) for level in sketch.levels) < 5000
+
+    def test_merge(self):
+        """Merged sketches approximate the quantiles of the combined data."""
+        rng = np.random.default_rng(4)
+        first, second = rng.normal(0, 1, 20000), rng.normal(4, 1, 20000)
+        sketch = QuantileSketch(capacity=256).update(first).merge(QuantileSketch(capacity=256).update(second))
+
+        combined = np.concatenate((first, second))
+        assert sketch.count == len(combined)
+        rank = (combined < sketch.quantile(0.25)).mean()
+        assert abs(rank - 0.25) < 0.02
+
+    def test_invalid_capacity(self):
+        """A capacity below 2 is rejected."""
+        with pytest.raises(ValueError):
+            QuantileSketch(capacity=1)
+
+
+class TestCycleStatisticsAccumulator:
+    """Test cases for CycleStatisticsAccumulator class."""
+
+    def test_to_dict_matches_numpy(self):
+        """The statistics dictionary matches the numpy computation."""
+        rng = np.random.default_rng(5)
+        durations, energies = rng.uniform(10, 60, 100), rng.uniform(100, 500, 100)
+        peaks, variations = rng.uniform(5, 20, 100), rng.uniform(0, 3, 100)
+        stats = CycleStatisticsAccumulator().update(durations, energies, peaks, variations).to_dict()
+
+        assert stats['total_cycles'] == 100
+        assert stats['duration_stats']['median'] == np.median(durations)
+        assert stats['duration_stats']['std'] == pytest.approx(np.std(durations))
+        assert stats['energy_stats']['total_energy'] == pytest.approx(energies.sum())
+        assert stats['energy_stats']['std_peak'] == pytest.approx(np.std(peaks))
+        assert stats['variation_stats']['max'] == variations.max()
+
+    def test_merge_shards(self):
+        """Accumulators from two shards merge into the statistics of the whole."""
+        rng = np.random.default_rng(6)
+        data = [rng.uniform(1, 10, 80) for _ in range(4)]
+        whole = CycleStatisticsAccumulator().update(*data).to_dict()
+        first = CycleStatisticsAccumulator().update(*[column[:30] for column in data])
+        second = CycleStatisticsAccumulator().update(*[column[30:] for column in data])
+        merged = first.merge(second).to_dict()
+
+        assert merged['total_cycles'] == whole['total_cycles']
+        for group in ('duration_stats', 'energy_stats', 'variation_stats'):
+            for key, value in whole[group].items():
+                assert merged[group][key] == pytest.approx(value)
+
+    def test_state_round_trip_keeps_capacity(self):
+        """A restored accumulator keeps its sketch capacity, also for states without it."""
+        rng = np.random.default_rng(7)
+        accumulator = CycleStatisticsAccumulator(sketch_capacity=64).update(*[rng.uniform(1, 10, 500) for _ in range(4)])
+        state = accumulator.get_state()
+        restored = CycleStatisticsAccumulator.from_state(state)
+
+        assert restored.sketch_capacity == 64
+        assert restored.to_dict() == accumulator.to_dict()
+        state.pop("sketch_capacity")
+        assert CycleStatisticsAccumulator.from_state(state).sketch_capacity == 64
+
+    def test_empty(self):
+        """An empty accumulator gives an empty dictionary."""
+        assert CycleStatisticsAccumulator().to_dict() == {}
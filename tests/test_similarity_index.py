@@ -0,0 +1,132 @@
+"""
+Tests for CycleSimilarityIndex class.
+"""
+
+import pytest
+import time
+import pandas as pd
+import numpy as np
+from machine_analyzer import similarity_index
+from machine_analyzer.cycle_segmenter import CycleSegmenter
+from machine_analyzer.similarity_index import CycleSimilarityIndex
+
+
+class TestCycleSimilarityIndex:
+    """Test cases for CycleSimilarityIndex class."""
+    
+    @pytest.fixture
+    def clustered_features(self):
+        """Create cycle features drawn around a few cluster centres."""
+        rng = np.random.default_rng(0)
+        centres = rng.normal(0, 10, (5, 12))
+        labels = rng.integers(0, 5, 2000)
+        return centres[labels] + rng.normal(0, 0.5, (2000, 12))
+    
+    def test_query_returns_exact_match_first(self, clustered_features):
+        """Test that an indexed cycle is its own nearest neighbour."""
+        index = CycleSimilarityIndex(seed=1).fit(clustered_features)
+        
+        ids, distances = index.query(clustered_features[123], k=5)
+        
+        assert ids.shape == (5,)
+        assert ids[0] == 123
+        assert distances[0] == pytest.approx(0, abs=1e-4)
+        assert np.all(np.diff(distances) >= 0)
+    
+    def test_query_recall(self, clustered_features):
+        """Test that approximate neighbours match an exact scan."""
+        index = CycleSimilarityIndex(seed=1).fit(clustered_features)
+        queries = clustered_features[:50] + 0.05
+        
+        ids, _ = index.query(queries, k=5)
+        
+        reduced = index._transform(clustered_features)
+        hits = 0
+        for query, found in zip(index._transform(queries), ids):
+            exact = np.argsort(((reduced - query) ** 2).sum(axis=1))[:5]
+            hits += len(set(exact) & set(found))
+        assert hits / (5 * len(queries)) > 0.9
+    
+    def test_incremental_add(self, clustered_features):
+        """Test that cycles inserted after fitting can be found."""
+        index = CycleSimilarityIndex(seed=1).fit(clustered_features[:1500])
+        index.add(clustered_features[1500:], cycle_ids=np.arange(10000, 10500))
+        
+        assert len(index) == 2000
+        ids, _ = index.query(clustered_features[1700], k=1)
+        assert ids[0] == 10200
+    
+    def test_refit_reestimates_bucket_width(self, clustered_features):
+        """Test that the fitted bucket width does not overwrite the constructor argument."""
+        index = CycleSimilarityIndex(seed=1).fit(clustered_features)
+        first_width = index.bucket_width_
+        index.target_candidates = 8
+        index.fit(clustered_features)
+        
+        assert index.bucket_width is None
+        assert index.bucket_width_ < first_width
+        assert CycleSimilarityIndex(bucket_width=2.5).fit(clustered_features).bucket_width_ == 2.5
+    
+    def test_missing_features_are_imputed(self, clustered_features):
+        """Test that NaN feature values are imputed instead of poisoning the PCA."""
+        features = clustered_features.copy()
+        features[10, 3] = np.nan
+        index = CycleSimilarityIndex(seed=1).fit(features)
+        
+        assert np.isfinite(index._components).all()
+        ids, distances = index.query(clustered_features[123], k=5)
+        assert ids[0] == 123
+        assert np.isfinite(distances).all()
+        
+        features[11, 0] = np.inf
+        with pytest.raises(ValueError, match="infinite"):
+            CycleSimilarityIndex().fit(features)
+    
+    def test_outlier_query_latency(self, monkeypatch):
+        """Test that outlier queries probe and widen instead of scanning every cycle."""
+        rng = np.random.default_rng(3)
+        centres = rng.normal(0, 10, (5, 12))
+        features = centres[rng.integers(0, 5, 200000)] + rng.normal(0, 0.5, (200000, 12))
+        # A recurring fault far from normal production
+        fault = centres[0] + 25
+        features[:10] = fault + rng.normal(0, 0.5, (10, 12))
+        index = CycleSimilarityIndex(seed=1, max_candidates=8192).fit(features)
+        
+        ids, _ = index.query(fault + 0.1, k=5)
+        assert set(ids) <= set(range(10))
+        
+        ranked = []
+        distances = similarity_index._distances
+        monkeypatch.setattr(similarity_index, "_distances",
+                            lambda vectors, vector: ranked.append(len(vectors)) or distances(vectors, vector))
+        outliers = centres[rng.integers(0, 5, 50)] + rng.normal(0, 6, (50, 12))
+        index.query(outliers[:1], k=5)
+        ranked.clear()
+        start = time.perf_counter()
+        ids, found = index.query(outliers, k=5)
+        elapsed = (time.perf_counter() - start) / len(outliers)
+        
+        assert (ids >= 0).all() and np.isfinite(found).all()
+        # Widening doubles the window, so at most about twice max_candidates rows per query
+        assert sum(ranked) <= len(outliers) * 2 * 8192
+        assert elapsed < 0.005
+    
+    def test_query_before_fit(self):
+        """Test error handling when querying an unfitted index."""
+        with pytest.raises(ValueError, match="must be fitted"):
+            CycleSimilarityIndex().query(np.zeros(4))
+    
+    def test_from_segmenter(self):
+        """Test building the index from segmented cycles."""
+        timestamps = pd.date_range('2023-01-01', periods=2000, freq='1s')
+        values = np.where((np.arange(2000) // 20) % 2 == 0, 20.0 + np.arange(2000) % 7, 1.0)
+        energy_data = pd.DataFrame({'value': values}, index=timestamps)
+        production_mask = pd.Series(values > 5, index=timestamps)
+        
+        segmenter = CycleSegmenter(energy_data, {'production_state': production_mask}, 'value')
+        cycles = segmenter.segment_cycles()
+        index = CycleSimilarityIndex.from_segmenter(segmenter, shape_length=8)
+        
+        assert len(index) == len(cycles)
+        ids, _ = index.query(segmenter.get_cycle_feature_matrix(shape_length=8)[3], k=3)
+        assert cycles[3].cycle_id in ids
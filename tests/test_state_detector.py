@@ -1,4 +1,5 @@
 import pytest
+import numpy as np
 import pandas as pd
 from machine_analyzer.state_detector import StateDetector
 
@@ -17,4 +18,20 @@ def test_detect_states():
     # Check state distribution
     dist = detector.get_state_distribution()
     assert isinstance(dist, dict)
-    assert sum(dist.values()) == 5 
\ No newline at end of file
+    assert sum(dist.values()) == 5 
+
+def test_detect_states_sharded_matches_serial():
+    rng = np.random.default_rng(0)
+    values = np.where((np.arange(500) // 25) % 2 == 0, 20 + rng.normal(0, 2, 500), rng.random(500))
+    values[::17] = 0
+    df = pd.DataFrame({'value': values}, index=pd.date_range('2023-01-01', periods=500, freq='s'))
+    serial = StateDetector(df, 'value')
+    expected = serial.detect_states(window_size=7, production_threshold=5)
+    for shard_size in [1, 13, 100, 500]:
+        sharded = StateDetector(df, 'value')
+        masks = sharded.detect_states_sharded(window_size=7, production_threshold=5,
+                                              n_workers=1, shard_size=shard_size)
+        for name, mask in expected.items():
+            assert masks[name].equals(mask)
+        assert sharded.get_processed_data().equals(serial.get_processed_data())
+        assert sharded.get_state_distribution() == serial.get_state_distribution()
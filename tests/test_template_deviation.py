@@ -0,0 +1,84 @@
+"""
+Tests for TemplateDeviation class.
+"""
+
+import pytest
+import numpy as np
+import pandas as pd
+from machine_analyzer.cycle_segmenter import ProductionCycle
+from machine_analyzer.template_deviation import TemplateDeviation
+from machine_analyzer.quality_analyzer import QualityAnalyzer, QualityIssue
+
+
+class TestTemplateDeviation:
+    """Test cases for TemplateDeviation class."""
+
+    @pytest.fixture
+    def templates(self):
+        """Create a ramp and a plateau reference profile."""
+        x = np.linspace(0, 1, 32)
+        return np.vstack([100 + 50 * x, 100 + 50 * (x > 0.5)])
+
+    def test_matches_per_cycle_loop(self, templates):
+        """Test that the batched comparison matches a loop over cycles and templates."""
+        rng = np.random.default_rng(0)
+        shapes = templates[rng.integers(0, 2, 50)] + rng.normal(0, 5, (50, 32))
+        deviation = TemplateDeviation(templates, chunk_size=8)
+
+        index, integrated, maximum = deviation.compute(shapes)
+
+        for i, shape in enumerate(shapes):
+            errors = [np.abs(shape - t) / np.abs(t).mean() for t in templates]
+            best = int(np.argmin([e.mean() for e in errors]))
+            assert index[i] == best
+            assert integrated[i] == pytest.approx(errors[best].mean())
+            assert maximum[i] == pytest.approx(errors[best].max())
+
+    def test_explicit_limits(self, templates):
+        """Test flagging with maximum and integrated deviation limits."""
+        shapes = templates.copy()
+        shapes = np.vstack([shapes, templates[0] * 1.5])
+        shapes[1, 5] += 60
+
+        failed, index, _ = TemplateDeviation(templates, max_deviation=0.3).check(shapes)
+        assert failed.tolist() == [False, True, True]
+        assert index.tolist() == [0, 1, 0]
+
+        failed, _, _ = TemplateDeviation(templates, integrated_deviation=0.3).check(shapes)
+        assert failed.tolist() == [False, False, True]
+
+    def test_invalid_shapes(self, templates):
+        """Test that profile lengths must match the templates."""
+        with pytest.raises(ValueError):
+            TemplateDeviation(templates).compute(np.zeros((3, 16)))
+        with pytest.raises(ValueError):
+            TemplateDeviation(np.zeros((0, 32)))
+
+    def test_quality_analyzer_template_check(self, templates):
+        """Test that template deviations feed into the quality score and grade."""
+        n_cycles = 20
+        base_time = pd.Timestamp('2024-01-01')
+        cycles = [ProductionCycle(i, base_time + pd.Timedelta(minutes=20 * i),
+                                  base_time + pd.Timedelta(minutes=20 * i + 15), pd.Timedelta(minutes=15),
+                                  1500.0, 150.0, 125.0, 0.2) for i in range(n_cycles)]
+        statistics = {group: {'mean': mean, 'std': std} for group, mean, std in
+                      [('duration_stats', 900, 10), ('energy_stats', 1500, 10), ('variation_stats', 0.2, 0.01)]}
+        shapes = np.repeat(templates[:1], n_cycles, axis=0)
+        shapes[3] = templates[0][::-1]
+
+        analyzer = QualityAnalyzer(statistics, cycles, cycle_shapes=shapes)
+        result = analyzer.score_quality(template_deviation=TemplateDeviation(templates))
+
+        assert analyzer.anomalous_units == [3]
+        assert result.issue_flags[3] == QualityIssue.TEMPLATE_DEVIATION
+        assert result.quality_scores[3] == pytest.approx(0.75)
+        assert result.quality_grades[3] == "B"
+        assert np.all(result.quality_scores[result.cycle_ids != 3] == 1.0)
+        assert "template_deviation" in result.to_dataframe().columns
+        assert analyzer.quality_metrics[3].issues == ["Deviation from reference template is too high"]
+
+        # Without templates the score keeps its three checks
+        analyzer.analyze_quality()
+        assert analyzer.quality_result.template_index is None
+        with pytest.raises(ValueError):
+            QualityAnalyzer(statistics, cycles).score_quality(template_deviation=TemplateDeviation(templates))